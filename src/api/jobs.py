@@ -0,0 +1,76 @@
+# src/api/jobs.py
+from pathlib import Path
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from src.core import profiling, tracing
+from src.core.config import settings
+
+router = APIRouter()
+
+
+@router.get("/v1/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """RQ 작업 상태 + 단계별 span timeline (worker가 job.meta에 남긴 것)"""
+    from rq.exceptions import NoSuchJobError
+    from rq.job import Job
+
+    from src.tasks import redis_conn
+
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        raise HTTPException(status_code=404, detail=f"작업 없음: {job_id}")
+
+    status = job.get_status()
+    body = {
+        "job_id": job.id,
+        "status": status,
+        "trace_id": job.meta.get("trace_id"),
+        "timeline": job.meta.get("timeline"),
+    }
+    if status == "finished":
+        body["result"] = job.result
+    elif status == "failed" and job.exc_info:
+        body["error"] = job.exc_info.strip().splitlines()[-1]
+    return body
+
+
+@router.get("/v1/traces/{trace_id}")
+def get_trace_timeline(trace_id: str):
+    """이 API 프로세스에서 끝난 요청(예: /v1/storybook, 응답 헤더 X-Trace-Id)의 timeline"""
+    items = tracing.timeline(trace_id)
+    if items is None:
+        raise HTTPException(status_code=404, detail=f"trace 없음 (만료됐거나 다른 프로세스): {trace_id}")
+    return {"trace_id": trace_id, "timeline": items}
+
+
+def _inside_profile_dir(path: Path) -> bool:
+    """symlink / 상위 경로로 PROFILE_DIR 밖을 가리키지 않는지"""
+    return path.resolve().is_relative_to(Path(settings.PROFILE_DIR).resolve())
+
+
+def _profile_dir(profile_id: str, admin_token: str | None):
+    if not profiling.admin_allowed(admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 필요합니다")
+    path = profiling.profile_path(profile_id) if profiling.is_valid_profile_id(profile_id) else None
+    if path is None or not _inside_profile_dir(path) or not path.is_dir():
+        raise HTTPException(status_code=404, detail=f"프로파일 없음: {profile_id}")
+    return path
+
+
+@router.get("/v1/profiles/{profile_id}")
+def list_profile_files(profile_id: str, x_admin_token: str | None = Header(default=None)):
+    """X-Debug-Profile로 프로파일링한 요청의 결과 파일 목록 (응답 헤더 X-Profile-Id)"""
+    path = _profile_dir(profile_id, x_admin_token)
+    return {"profile_id": profile_id, "files": sorted(p.name for p in path.iterdir() if p.is_file())}
+
+
+@router.get("/v1/profiles/{profile_id}/{name}")
+def get_profile_file(profile_id: str, name: str, x_admin_token: str | None = Header(default=None)):
+    path = _profile_dir(profile_id, x_admin_token)
+    target = path / name
+    if not profiling.is_valid_profile_id(name) or not _inside_profile_dir(target) or not target.is_file():
+        raise HTTPException(status_code=404, detail=f"파일 없음: {name}")
+    return FileResponse(target)
@@ -1,5 +1,15 @@
-from fastapi import FastAPI
-from src.api import storybooks
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from src.api import jobs, storybooks
+from src.core import metrics, warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 무거운 라이브러리는 lazy import → ready 이후 백그라운드에서 미리 로드 (API_WARM_IMPORTS)
+    warmup.start_background_preload()
+    yield
 
 
 def create_app() -> FastAPI:
@@ -7,16 +17,26 @@ def create_app() -> FastAPI:
         title="Paper Storybook API",
         description="논문 PDF → 스토리북 변환 서비스",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     # Storybook 변환 API
     app.include_router(storybooks.router, tags=["storybooks"])
 
+    # 작업 상태 / trace timeline 조회 API
+    app.include_router(jobs.router, tags=["jobs"])
+
     # Health check 엔드포인트
     @app.get("/healthz")
     def healthz():
         return {"status": "ok"}
 
+    # Prometheus 지표 (단계별 소요시간, LLM 토큰, fallback 렌더)
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        body, content_type = metrics.render_latest()
+        return Response(content=body, media_type=content_type)
+
     # Root 엔드포인트 (Cloudtype 기본 헬스체크 대응)
     @app.get("/")
     def root():
@@ -1,63 +1,226 @@
 # src/api/storybooks.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+import hashlib
 import traceback
+import uuid
 
 from src.services.preprocess_arxiv_inmemory import extract_arxiv_id_from_pdf_bytes, fetch_arxiv_sources
 from src.texprep.pipeline_inmemory import run_pipeline_inmemory
-from src.services.llm.scene_splitter import split_into_scenes_with_narration
-from src.services.llm.viz_classifier import classify_scenes_iteratively
+from src.services.llm.scene_splitter import stream_scenes_with_narration
+from src.services.llm.viz_classifier import classify_scenes_batched, escalation_reason, reask_diagram
 from src.services.visualization.dot_cleaner import clean_viz_entry
+from src.services.visualization.dot_validator import ensure_valid_dot, fallback_dot
 from src.services.visualization.diagram import render_diagram
-from src.services.compositor.scene_composer import compose_scene
+from src.services.compositor.layout_engine import get_layout
+from src.services.compositor.scene_composer import compose_page
 from src.services.compositor.pdf_exporter import export_pdf
+from src.core import deadline, metrics, profiling, tracing
+from src.core.config import settings
+from src.services import checkpoint
 
 router = APIRouter()
 
+def _render_viz_scene(scene: dict) -> tuple[BytesIO, str]:
+    scene_id = scene.get("scene_id", 0)
+    # 정리/수리(재요청 포함)에 성공한 DOT만 checkpoint. PNG는 렌더 캐시가 성공한 것만 재사용
+    key = checkpoint.input_key(scene)
+    dot_code = checkpoint.load("dot_clean", key)
+    if dot_code is not None:
+        diagram_png = render_diagram(dot_code.decode("utf-8"), scene_id=scene_id, in_memory=True)
+        return diagram_png, scene.get("narration", "")
+
+    with metrics.stage("dot_clean") as m:
+        cleaned = clean_viz_entry(scene)
+        dot_code = cleaned.get("diagram", "digraph G { dummy; }")
+
+        # 렌더 전 검증/수리 → 못 고치면 이 scene만 재요청 → 그래도 안 되면 최소 다이어그램
+        check = ensure_valid_dot(
+            dot_code,
+            reask=lambda dot, issues: reask_diagram(scene, dot, issues),
+        )
+        if check.ok:
+            dot_code = check.dot
+        else:
+            dot_code = fallback_dot(scene.get("title", ""))
+            m.outcome = "fallback"
+            metrics.record_fallback_render("invalid_dot")
+    # fallback 다이어그램은 저장하지 않음 → 재시도 때 수리 / 재요청을 다시 시도
+    if check.ok:
+        checkpoint.save("dot_clean", key, dot_code.encode("utf-8"))
+
+    diagram_png = render_diagram(dot_code, scene_id=scene_id, in_memory=True)
+    return diagram_png, scene.get("narration", "")
+
+
+def _classify_and_render(scenes: list[dict], used_layouts: list[str]) -> list[tuple[BytesIO, str]]:
+    # checkpoint에 분류 결과가 있는 장면은 LLM에 다시 보내지 않음
+    # used_layouts: 스토리북 하나의 모든 배치가 공유 (논문 전체 레이아웃 다양성)
+    keys = [checkpoint.input_key(s) for s in scenes]
+    classified = [checkpoint.load_json("classify", k) for k in keys]
+    todo = [s for s, c in zip(scenes, classified) if c is None]
+    if todo:
+        fresh = iter(classify_scenes_batched(todo, used_layouts=used_layouts))
+        for idx, c in enumerate(classified):
+            if c is None:
+                classified[idx] = next(fresh)
+                # 파싱 실패 / fallback뿐인 결과는 저장하지 않음 → 재시도 때 다시 분류
+                if escalation_reason(classified[idx]) is None:
+                    checkpoint.save_json("classify", keys[idx], classified[idx])
+    return [_render_viz_scene(v) for v in classified]
+
+
+def _split_scenes(full_text: str):
+    """scene split 결과 checkpoint가 있으면 그대로, 없으면 스트리밍하면서 모아 끝나면 저장"""
+    key = checkpoint.input_key(full_text)
+    cached = checkpoint.load_json("scene_split", key)
+    if cached is not None:
+        yield from cached
+        return
+    scenes = []
+    for scene in stream_scenes_with_narration(full_text):
+        scenes.append(scene)
+        yield scene
+    checkpoint.save_json("scene_split", key, scenes)
+
+
+def _compose_pages(rendered: list[tuple[BytesIO, str]], layout) -> list[BytesIO]:
+    """페이지 단위 checkpoint (입력 = 레이아웃 + 페이지에 들어가는 다이어그램/나레이션)"""
+    per_page = layout.scenes_per_page
+    pages = []
+    for i in range(0, len(rendered), per_page):
+        items = rendered[i : i + per_page]
+        key = checkpoint.input_key(layout.name, *[(hashlib.sha256(png.getvalue()).hexdigest(), text) for png, text in items])
+        page = checkpoint.load("compose", key)
+        if page is None:
+            page_buf = compose_page(items, layout, in_memory=True)
+            checkpoint.save("compose", key, page_buf.getvalue())
+            page_buf.seek(0)
+        else:
+            page_buf = BytesIO(page)
+        pages.append(page_buf)
+    return pages
+
+
+def _profile_mode(mode: str | None, admin_token: str | None) -> str | None:
+    """X-Debug-Profile 헤더 검사: 관리자 토큰이 맞을 때만 프로파일링"""
+    if not mode:
+        return None
+    if not profiling.admin_allowed(admin_token):
+        raise HTTPException(status_code=403, detail="프로파일링은 관리자 토큰이 필요합니다")
+    if mode not in profiling.PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 프로파일 모드: {mode}")
+    return mode
+
+
 @router.post("/v1/storybook")
-async def create_storybook(pdf: UploadFile = File(...)):
-    try:
-        pdf_bytes = await pdf.read()
-        if not pdf_bytes:
-            raise HTTPException(status_code=400, detail="빈 PDF")
+async def create_storybook(
+    pdf: UploadFile = File(...),
+    x_debug_profile: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+    x_job_id: str | None = Header(default=None),
+):
+    profile_mode = _profile_mode(x_debug_profile, x_admin_token)
+    # 실패한 요청을 같은 X-Job-Id로 다시 보내면 끝난 단계 / 장면은 checkpoint에서 재사용
+    if x_job_id and not checkpoint.is_valid_job_id(x_job_id):
+        raise HTTPException(status_code=400, detail="잘못된 X-Job-Id")
+    # trace id는 응답 헤더로 돌려줌 → GET /v1/traces/{trace_id}로 단계별 timeline 조회
+    with tracing.trace("storybook", filename=pdf.filename or "") as root:
+        job_id = x_job_id or root.trace_id or uuid.uuid4().hex
+        root.set_attribute("job_id", job_id)
+        trace_headers = {"X-Job-Id": job_id}
+        if root.trace_id:
+            trace_headers["X-Trace-Id"] = root.trace_id
+        profile_ctx = nullcontext()
+        if profile_mode:
+            # 결과는 PROFILE_DIR/<id>/ → GET /v1/profiles/{id}
+            profile_id = root.trace_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            trace_headers["X-Profile-Id"] = profile_id
+            profile_ctx = profiling.profile_session(profile_mode, profiling.profile_path(profile_id), label="storybook")
+        try:
+            with (
+                profile_ctx,
+                checkpoint.job_scope(job_id),
+                deadline.deadline_scope(settings.STORYBOOK_DEADLINE_S),
+                metrics.stage("storybook"),
+            ):
+                response = await _build_storybook(pdf)
+            response.headers.update(trace_headers)
+            # 단계별 합산 시간 (부하 테스트 / 브라우저 devtools에서 바로 확인)
+            if root.trace_id:
+                response.headers["Server-Timing"] = tracing.server_timing(root.trace_id)
+            return response
+        except HTTPException as e:
+            e.headers = {**(e.headers or {}), **trace_headers}
+            raise
+        except deadline.DeadlineExceeded as e:
+            traceback.print_exc()
+            raise HTTPException(status_code=504, detail=f"처리 시간 초과: {e}", headers=trace_headers)
+        except Exception as e:
+            # 예외 로그를 서버 콘솔에 출력
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"처리 실패: {e}", headers=trace_headers)
+
 
-        # 1) PDF → arXiv ID → 소스 텍스트 in-memory
+async def _build_storybook(pdf: UploadFile) -> StreamingResponse:
+    """요청 deadline(STORYBOOK_DEADLINE_S) 안에서 실행. 모든 LLM 호출의 timeout이 남은 시간으로 제한됨."""
+    pdf_bytes = await pdf.read()
+    if not pdf_bytes:
+        raise HTTPException(status_code=400, detail="빈 PDF")
+
+    # 1) PDF → arXiv ID → 소스 텍스트 in-memory
+    with metrics.stage("arxiv_fetch") as m:
         arxiv_id = extract_arxiv_id_from_pdf_bytes(pdf_bytes)
         if not arxiv_id:
+            m.outcome = "no_arxiv_id"
             raise HTTPException(status_code=400, detail="arXiv ID 추출 실패")
 
         tex_files = fetch_arxiv_sources(arxiv_id)  # dict[str,str]
 
-        # 2) TeX 파이프라인 in-memory
-        full_text = run_pipeline_inmemory(tex_files)
-
-        # 3) Scene split & viz classify
-        scenes = split_into_scenes_with_narration(full_text)
-        viz_results = classify_scenes_iteratively(scenes)
-
-        # 4) 렌더링 in-memory → PDF 합성
-        scene_pngs = []
-        for scene in viz_results:
-            cleaned = clean_viz_entry(scene)
-            dot_code = cleaned.get("diagram", "digraph G { dummy; }")
-            scene_id = scene.get("scene_id", 0)
-
-            diagram_png = render_diagram(dot_code, scene_id=scene_id, in_memory=True)
-            composed_png = compose_scene(diagram_png, scene.get("narration", ""), in_memory=True)
-            if hasattr(composed_png, "seek"):
-                composed_png.seek(0)
-            scene_pngs.append(composed_png)
-
-        pdf_buf = export_pdf(scene_pngs, in_memory=True)
-        return StreamingResponse(
-            pdf_buf,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{arxiv_id}_storybook.pdf"'},
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        # 예외 로그를 서버 콘솔에 출력
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"처리 실패: {e}")
+    # 2) TeX 파이프라인 in-memory
+    texprep_key = checkpoint.input_key(tex_files)
+    cached_text = checkpoint.load("texprep", texprep_key)
+    if cached_text is not None:
+        full_text = cached_text.decode("utf-8")
+    else:
+        with metrics.stage("texprep", engine="inmemory"):
+            full_text = run_pipeline_inmemory(tex_files)
+        checkpoint.save("texprep", texprep_key, full_text.encode("utf-8"))
+
+    # 3) Scene split (스트리밍) → 장면이 모이는 대로 viz 분류 + 렌더를 병렬로 겹쳐 진행
+    #    scene_split은 스트림이 끝날 때까지 (하위 단계와 겹치는 구간 포함)
+    layout = get_layout(settings.STORYBOOK_LAYOUT)
+    used_layouts: list[str] = []
+    with ThreadPoolExecutor(max_workers=settings.STORYBOOK_RENDER_WORKERS) as pool:
+        futures, batch = [], []
+        with metrics.stage("scene_split", engine="stream"):
+            for scene in _split_scenes(full_text):
+                batch.append(scene)
+                if len(batch) >= settings.STORYBOOK_STREAM_BATCH_SCENES:
+                    futures.append(deadline.submit(pool, _classify_and_render, batch, used_layouts))
+                    batch = []
+        if batch:
+            futures.append(deadline.submit(pool, _classify_and_render, batch, used_layouts))
+        # 4) 입력 순서대로 모아서 PDF 합성 (레이아웃 geometry는 스토리북당 1회 계산)
+        rendered = [item for f in futures for item in f.result()]
+
+    with metrics.stage("compose", engine=layout.name):
+        page_pngs = _compose_pages(rendered, layout)
+    export_key = checkpoint.input_key(*[hashlib.sha256(p.getvalue()).hexdigest() for p in page_pngs])
+    cached_pdf = checkpoint.load("export", export_key)
+    if cached_pdf is not None:
+        pdf_buf = BytesIO(cached_pdf)
+    else:
+        with metrics.stage("export"):
+            pdf_buf = export_pdf(page_pngs, in_memory=True)
+        checkpoint.save("export", export_key, pdf_buf.getvalue())
+        pdf_buf.seek(0)
+    return StreamingResponse(
+        pdf_buf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{arxiv_id}_storybook.pdf"'},
+    )
@@ -16,4 +16,133 @@ class Settings:
     # 최대 토큰 수 (없으면 기본 2048)
     CLAUDE_MAX_TOKENS: int = int(os.getenv("CLAUDE_MAX_TOKENS", "2048"))
 
+    # LLM 백엔드 (anthropic / fake). fake는 네트워크 없이 재생·합성 응답 (부하 테스트용)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "anthropic")
+    LLM_FAKE_REPLAY_DIR: str = os.getenv("LLM_FAKE_REPLAY_DIR", "")
+    LLM_FAKE_LATENCY_MS: float = float(os.getenv("LLM_FAKE_LATENCY_MS", "800"))
+    LLM_FAKE_LATENCY_SIGMA: float = float(os.getenv("LLM_FAKE_LATENCY_SIGMA", "0.5"))
+    LLM_FAKE_ERROR_RATES: str = os.getenv("LLM_FAKE_ERROR_RATES", "")   # 예: "429:0.02,529:0.01,malformed:0.02"
+    LLM_FAKE_SEED: int = int(os.getenv("LLM_FAKE_SEED", "0"))
+
+    # LLM 호출 하나의 timeout(초)과 스토리북 요청 전체 deadline(초). 호출 timeout은 남은 deadline으로 더 줄어든다
+    LLM_CALL_TIMEOUT_S: float = float(os.getenv("LLM_CALL_TIMEOUT_S", "60"))
+    STORYBOOK_DEADLINE_S: float = float(os.getenv("STORYBOOK_DEADLINE_S", "300"))
+
+    # hedged 호출: 응답이 모델별 p95 지연을 넘기면 같은 요청을 하나 더 보내 먼저 온 쪽 사용
+    # (표본이 LLM_HEDGE_MIN_SAMPLES개 모이기 전에는 LLM_HEDGE_DELAY_MS 사용)
+    LLM_HEDGE: bool = os.getenv("LLM_HEDGE", "false").lower() == "true"
+    LLM_HEDGE_DELAY_MS: float = float(os.getenv("LLM_HEDGE_DELAY_MS", "8000"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+    # LLM 구조화 출력(tool use + Pydantic 검증) 사용 여부. false면 텍스트 응답 + 정규식 복구
+    LLM_STRUCTURED_OUTPUT: bool = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # 지정하면 LLM 텍스트 응답 원문을 이 디렉토리에 저장 (JSON 복구 벤치마크 corpus)
+    LLM_RAW_RESPONSE_DIR: str = os.getenv("LLM_RAW_RESPONSE_DIR", "")
+
+    # viz 분류 모델 라우팅: 싼 모델로 먼저 분류 → JSON 파싱 실패 / DOT 검증 실패 / fallback 다이어그램뿐이면
+    # 그 scene만 VIZ_ESCALATION_MODEL로 재분류. VIZ_ROUTING_LOG를 지정하면 scene별 기록을 JSONL로 추가 저장
+    VIZ_ROUTING: bool = os.getenv("VIZ_ROUTING", "true").lower() == "true"
+    VIZ_CHEAP_MODEL: str = os.getenv("VIZ_CHEAP_MODEL", "claude-3-5-haiku-20241022")
+    VIZ_CHEAP_MAX_TOKENS: int = int(os.getenv("VIZ_CHEAP_MAX_TOKENS", "1536"))
+    VIZ_ESCALATION_MODEL: str = os.getenv("VIZ_ESCALATION_MODEL", "claude-sonnet-4-20250514")
+    VIZ_ROUTING_LOG: str = os.getenv("VIZ_ROUTING_LOG", "")
+
+    # 배치 viz 분류 한 번의 최대 출력 토큰 (배치 크기는 이 예산에 맞춰 결정)
+    VIZ_BATCH_MAX_TOKENS: int = int(os.getenv("VIZ_BATCH_MAX_TOKENS", "8192"))
+
+    # 요청/작업 단위 tracing. 최근 TRACE_MEMORY_SIZE개 trace를 메모리에 보관, TRACE_FILE을 지정하면 OTLP JSON 줄로 추가 저장
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_MEMORY_SIZE: int = int(os.getenv("TRACE_MEMORY_SIZE", "200"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "")
+
+    # on-demand 프로파일링: 요청 헤더 X-Debug-Profile(sample / cprofile / html) + X-Admin-Token이 ADMIN_TOKEN과 같을 때,
+    # 또는 작업 플래그(profile=...)로 켠다. ADMIN_TOKEN이 비어 있으면 헤더로는 켤 수 없음
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "data/profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_MEMORY_STAGES: str = os.getenv("PROFILE_MEMORY_STAGES", "texprep,compose")   # tracemalloc 스냅샷 단계
+    PROFILE_MEMORY_TOP_N: int = int(os.getenv("PROFILE_MEMORY_TOP_N", "25"))
+    PROFILE_TRACEMALLOC_FRAMES: int = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+
+    # arXiv e-print URL 템플릿 ({arxiv_id}). 지정하면 arxiv 라이브러리 대신 이 주소에서 직접 받음
+    # (사내 미러 / 부하 테스트용 로컬 stand-in)
+    ARXIV_EPRINT_URL: str = os.getenv("ARXIV_EPRINT_URL", "")
+
+    # 아티팩트 저장소 (fs / memory / s3). 내용 해시로 저장, STORAGE_CACHE면 arXiv 소스·다이어그램 등 단계 결과 재사용
+    # GC: 마지막 접근 후 STORAGE_TTL_S초 지난 것 삭제, 총 크기가 STORAGE_MAX_BYTES를 넘으면 LRU 삭제 (0 = 제한 없음)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "fs")
+    STORAGE_DIR: str = os.getenv("STORAGE_DIR", "data/artifacts")
+    STORAGE_CACHE: bool = os.getenv("STORAGE_CACHE", "true").lower() == "true"
+    STORAGE_MAX_BYTES: int = int(os.getenv("STORAGE_MAX_BYTES", str(5 << 30)))
+    STORAGE_TTL_S: float = float(os.getenv("STORAGE_TTL_S", str(7 * 24 * 3600)))
+    STORAGE_GC_INTERVAL_S: float = float(os.getenv("STORAGE_GC_INTERVAL_S", "600"))
+    STORAGE_S3_BUCKET: str = os.getenv("STORAGE_S3_BUCKET", "")
+    STORAGE_S3_ENDPOINT: str = os.getenv("STORAGE_S3_ENDPOINT", "")    # 예: http://localhost:9000 (MinIO)
+    STORAGE_S3_PREFIX: str = os.getenv("STORAGE_S3_PREFIX", "storybook")
+    STORAGE_S3_TOUCH_INTERVAL_S: float = float(os.getenv("STORAGE_S3_TOUCH_INTERVAL_S", "3600"))
+
+    # 단계별 checkpoint (저장소 사용). 같은 X-Job-Id로 재시도하면 끝난 단계 / 장면은 건너뜀
+    CHECKPOINT_ENABLED: bool = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+
+    # API가 ready된 뒤 백그라운드 스레드에서 fitz / PIL / reportlab 등을 미리 import (첫 요청 지연 제거)
+    API_WARM_IMPORTS: bool = os.getenv("API_WARM_IMPORTS", "true").lower() == "true"
+
+    # 스토리북 페이지 레이아웃 템플릿 (slide / a4_portrait / two_up)
+    STORYBOOK_LAYOUT: str = os.getenv("STORYBOOK_LAYOUT", "slide")
+
+    # Graphviz 렌더 백엔드 (subprocess / pygraphviz / auto)
+    GRAPHVIZ_BACKEND: str = os.getenv("GRAPHVIZ_BACKEND", "subprocess")
+
+    # RQ 작업 큐 (Redis)
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
+    QUEUE_NAME: str = os.getenv("QUEUE_NAME", "storybook")
+
+    # warm worker pool (python -m src.worker): 자식 프로세스 수 / 자식당 처리 작업 수 (0 = 제한 없음)
+    # 작업 후 RSS가 넘으면 자식 교체(MB, 0 = 검사 안 함) / 부모에서 모듈·client·폰트·렌더 백엔드 미리 준비
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "2"))
+    WORKER_MAX_JOBS_PER_CHILD: int = int(os.getenv("WORKER_MAX_JOBS_PER_CHILD", "200"))
+    WORKER_MAX_RSS_MB: float = float(os.getenv("WORKER_MAX_RSS_MB", "1024"))
+    WORKER_PRELOAD: bool = os.getenv("WORKER_PRELOAD", "true").lower() == "true"
+
+    # ===== 단계별 성능 튜닝 (배포마다 코드 수정 없이 조정) =====
+    # 동시성: 스토리북 요청당 viz 분류+렌더 스레드 수 / 스트리밍으로 모인 장면을 묶어 보내는 단위
+    #         긴 본문 map-reduce 분할의 동시 map 호출 수 / hedged LLM 호출용 프로세스 공용 스레드 수
+    STORYBOOK_RENDER_WORKERS: int = int(os.getenv("STORYBOOK_RENDER_WORKERS", "4"))
+    STORYBOOK_STREAM_BATCH_SCENES: int = int(os.getenv("STORYBOOK_STREAM_BATCH_SCENES", "3"))
+    SCENE_MAP_CONCURRENCY: int = int(os.getenv("SCENE_MAP_CONCURRENCY", "6"))
+    LLM_HEDGE_POOL_SIZE: int = int(os.getenv("LLM_HEDGE_POOL_SIZE", "16"))
+
+    # 배치 크기 / 토큰 예산: scene split 입력 토큰(넘으면 map-reduce), map chunk 길이(문자)와 요약 응답 토큰,
+    # viz 분류의 scene당 입력 토큰, 배치 분류 최대 scene 수, DOT 재요청 응답 토큰
+    SCENE_SPLIT_INPUT_TOKENS: int = int(os.getenv("SCENE_SPLIT_INPUT_TOKENS", "3000"))
+    SCENE_CHUNK_MAX_CHARS: int = int(os.getenv("SCENE_CHUNK_MAX_CHARS", "6000"))
+    SCENE_MAP_MAX_TOKENS: int = int(os.getenv("SCENE_MAP_MAX_TOKENS", "700"))
+    VIZ_SCENE_INPUT_TOKENS: int = int(os.getenv("VIZ_SCENE_INPUT_TOKENS", "1200"))
+    VIZ_MAX_BATCH_SCENES: int = int(os.getenv("VIZ_MAX_BATCH_SCENES", "6"))
+    VIZ_REASK_MAX_TOKENS: int = int(os.getenv("VIZ_REASK_MAX_TOKENS", "1024"))
+
+    # 프로세스 안 캐시 크기 (import 시 한 번 읽음): 나레이션 레이아웃 memo / 폰트·glyph advance / viz 라우팅 기록
+    TEXT_LAYOUT_CACHE_SIZE: int = int(os.getenv("TEXT_LAYOUT_CACHE_SIZE", "512"))
+    FONT_CACHE_SIZE: int = int(os.getenv("FONT_CACHE_SIZE", "64"))
+    VIZ_ROUTE_LOG_SIZE: int = int(os.getenv("VIZ_ROUTE_LOG_SIZE", "1000"))
+
+    # timeout: arXiv PDF / e-print 다운로드 (초)
+    ARXIV_FETCH_TIMEOUT_S: float = float(os.getenv("ARXIV_FETCH_TIMEOUT_S", "60"))
+
+    # TeX 전처리: \input 중첩 최대 깊이 / root 후보를 같은 논문으로 묶는 문단 유사도 기준
+    TEX_MAX_INPUT_DEPTH: int = int(os.getenv("TEX_MAX_INPUT_DEPTH", "20"))
+    TEX_DEDUP_THRESHOLD: float = float(os.getenv("TEX_DEDUP_THRESHOLD", "0.8"))
+
+    def as_dict(self, mask_secrets: bool = True) -> dict:
+        """현재 값 전체 (벤치마크 / 부하 테스트 결과에 함께 기록). 키·토큰은 가림"""
+        values = {k: getattr(self, k) for k in dir(type(self)) if k.isupper()}
+        if mask_secrets:
+            for k in ("ANTHROPIC_API_KEY", "ADMIN_TOKEN"):
+                values[k] = "***" if values.get(k) else ""
+        return values
+
+# 프로세스당 한 번만 로드 (환경변수 / .env는 import 시점 값)
 settings = Settings()
@@ -0,0 +1,52 @@
+# src/core/deadline.py
+"""
+요청 단위 deadline 전파
+- deadline_scope(seconds): API 요청(또는 작업) 시작 시 전체 마감 시각을 contextvar에 설정
+- remaining(): 남은 시간(초). deadline이 없으면 None
+- check(): 이미 지났으면 DeadlineExceeded
+- submit(pool, fn, ...): 스레드 풀 작업에도 현재 context(=deadline)를 복사해 전달
+  (ThreadPoolExecutor는 contextvar를 자동으로 넘기지 않는다)
+"""
+
+import contextvars
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """seconds 뒤를 마감으로 설정. 바깥 scope가 더 빠르면 바깥 마감을 유지."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(new, current) if current is not None else new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    d = _deadline.get()
+    return None if d is None else d - time.monotonic()
+
+
+def check(what: str = "") -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"deadline 초과{': ' + what if what else ''}")
+
+
+def submit(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """pool.submit과 같되, 현재 context(deadline 포함)를 복사해서 실행"""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,108 @@
+# src/core/metrics.py
+"""
+Prometheus 지표 (prometheus-client, 선택 패키지)
+- storybook_stage_seconds{stage, outcome, engine} : 단계별 소요시간 histogram
+    stage  = arxiv_fetch | texprep | scene_split | classify | dot_clean | render | compose | export | llm_call | storybook
+    engine = 단계별 구현 구분 (LLM 모델명, Graphviz 엔진, 렌더 백엔드 등. 없으면 "")
+- llm_tokens_total{model, kind}        : kind = input | output | cache_read | cache_write | wasted
+- llm_cache_hits_total{model}          : prompt cache를 읽은 호출 수
+- storybook_fallback_renders_total{reason} : 대체 다이어그램/PNG로 렌더한 횟수
+- storybook_artifacts_total{kind, result}  : 아티팩트 저장소 result = hit | miss | stored | dedup
+패키지가 없으면 모든 기록 함수는 아무것도 하지 않는다.
+RQ worker처럼 여러 프로세스에서 모을 때는 PROMETHEUS_MULTIPROC_DIR를 지정 (render_latest가 합산).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from src.core import profiling, tracing
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+except ImportError:  # 선택 패키지
+    Counter = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+ENABLED = Histogram is not None
+
+# 단계 길이가 수 ms(DOT 정리) ~ 수 분(LLM 분할)까지 걸쳐 있어 구간을 넓게 잡음
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+if ENABLED:
+    STAGE_SECONDS = Histogram(
+        "storybook_stage_seconds", "파이프라인 단계별 소요시간", ["stage", "outcome", "engine"], buckets=_STAGE_BUCKETS
+    )
+    LLM_TOKENS = Counter("llm_tokens_total", "LLM 토큰 사용량", ["model", "kind"])
+    LLM_CACHE_HITS = Counter("llm_cache_hits_total", "prompt cache 적중 호출 수", ["model"])
+    FALLBACK_RENDERS = Counter("storybook_fallback_renders_total", "대체 다이어그램/PNG 렌더 횟수", ["reason"])
+    ARTIFACTS = Counter("storybook_artifacts_total", "아티팩트 저장소 조회/저장 결과", ["kind", "result"])
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = "ok", engine: str = "") -> None:
+    if ENABLED:
+        STAGE_SECONDS.labels(stage, outcome, engine).observe(seconds)
+
+
+class _StageLabels:
+    """stage() 블록 안에서 engine / outcome을 나중에 정할 수 있게 넘겨주는 객체"""
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.outcome = "ok"
+
+
+@contextmanager
+def stage(name: str, engine: str = ""):
+    """
+    with stage("render", engine="dot") as s: ...
+    예외가 나면 outcome="error"로 기록하고 그대로 다시 던진다. s.outcome / s.engine으로 덮어쓸 수 있음.
+    활성 trace가 있으면 같은 이름의 span도 함께 남기고, 프로파일링 세션이 켜져 있으면 이 단계를 포함시킨다.
+    """
+    labels = _StageLabels(engine)
+    start = time.perf_counter()
+    with tracing.span(name, **({"engine": engine} if engine else {})) as sp, profiling.stage_scope(name):
+        try:
+            yield labels
+        except BaseException:
+            if labels.outcome == "ok":
+                labels.outcome = "error"
+            raise
+        finally:
+            observe_stage(name, time.perf_counter() - start, labels.outcome, labels.engine)
+            if labels.outcome != "ok":
+                sp.set_attribute("outcome", labels.outcome)
+
+
+def record_tokens(model: str, counts: dict[str, int]) -> None:
+    """counts: {kind: 토큰 수} (kind = input | output | cache_read | cache_write | wasted)"""
+    if not ENABLED:
+        return
+    for kind, n in counts.items():
+        if n:
+            LLM_TOKENS.labels(model, kind).inc(n)
+    if counts.get("cache_read"):
+        LLM_CACHE_HITS.labels(model).inc()
+
+
+def record_fallback_render(reason: str) -> None:
+    if ENABLED:
+        FALLBACK_RENDERS.labels(reason).inc()
+
+
+def record_artifact(kind: str, result: str) -> None:
+    if ENABLED:
+        ARTIFACTS.labels(kind, result).inc()
+
+
+def render_latest() -> tuple[bytes, str]:
+    """/metrics 응답 본문과 content-type"""
+    if not ENABLED:
+        return b"# prometheus-client not installed\n", CONTENT_TYPE_LATEST
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
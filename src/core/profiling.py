@@ -0,0 +1,241 @@
+# src/core/profiling.py
+"""
+요청/작업 단위 on-demand 프로파일링 (평소에는 꺼져 있고 비용 0)
+- profile_session(mode, out_dir): 블록 전체를 프로파일링하고 결과 파일을 out_dir에 저장
+    * sample  : 샘플링 프로파일러. 요청에 참여한 스레드(단계 진입 시 등록)의 스택을
+                PROFILE_SAMPLE_INTERVAL_MS마다 수집 → stacks.collapsed (flamegraph.pl / speedscope 입력)
+    * cprofile: cProfile (호출 스레드만) → profile.prof + profile.txt (누적 시간 상위)
+    * html    : pyinstrument(선택 패키지)가 있으면 profile.html, 없으면 sample로 대체
+- stage_scope(name): metrics.stage가 단계마다 호출. 세션이 켜져 있으면
+    * 현재 스레드를 샘플링 대상에 추가 (deadline.submit으로 넘어간 풀 스레드 포함)
+    * PROFILE_MEMORY_STAGES(기본 texprep, compose) 단계는 tracemalloc 스냅샷 전후 비교 → memory_<stage>.txt
+"""
+
+import contextvars
+import cProfile
+import hmac
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.core.config import settings
+
+PROFILE_MODES = ("sample", "cprofile", "html")
+# 경로 / ref 이름의 한 구간으로 쓰임 → "." / ".."(상위 폴더)가 되지 않게 첫 글자는 점 불가
+_PROFILE_ID_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,79}$")
+
+
+@dataclass
+class ProfileSession:
+    mode: str
+    out_dir: Path
+    label: str = ""
+    threads: set[int] = field(default_factory=set)
+    memory: dict[str, list[str]] = field(default_factory=dict)
+    samples: int = 0
+    files: list[str] = field(default_factory=list)
+
+
+_session: contextvars.ContextVar[ProfileSession | None] = contextvars.ContextVar("profile_session", default=None)
+
+# tracemalloc은 프로세스 전역 → 동시에 여러 단계가 켜도 한 번만 start/stop
+_tm_lock = threading.Lock()
+_tm_users = 0
+_tm_owned = False        # 우리가 켠 경우에만 끈다 (PYTHONTRACEMALLOC 등으로 이미 켜져 있었으면 유지)
+
+
+def is_valid_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID_RE.match(profile_id or ""))
+
+
+def admin_allowed(token: str | None) -> bool:
+    """ADMIN_TOKEN이 설정돼 있고 일치할 때만 (비어 있으면 항상 거부)"""
+    return bool(settings.ADMIN_TOKEN) and hmac.compare_digest(token or "", settings.ADMIN_TOKEN)
+
+
+def profile_path(profile_id: str) -> Path:
+    return Path(settings.PROFILE_DIR) / profile_id
+
+
+# -------------------------------
+# 샘플링 프로파일러
+# -------------------------------
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _thread_label(name: str) -> str:
+    # ThreadPoolExecutor-3_1 → ThreadPoolExecutor (풀 스레드를 한 줄기로 모음)
+    return re.sub(r"[-_]\d+", "", name) or "thread"
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, session: ProfileSession, interval_s: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.session = session
+        self.interval_s = interval_s
+        self.counts: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid in list(self.session.threads):
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(_thread_label(names.get(tid, "thread")))
+                self.counts[";".join(reversed(stack))] += 1
+                self.session.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(timeout=2)
+
+    def write(self, path: Path) -> None:
+        lines = (f"{stack} {n}" for stack, n in self.counts.most_common())
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+# -------------------------------
+# 세션
+# -------------------------------
+def _start_profiler(session: ProfileSession):
+    if session.mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+    if session.mode == "html":
+        try:
+            from pyinstrument import Profiler  # 선택 패키지
+
+            prof = Profiler(interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000, async_mode="disabled")
+            prof.start()
+            return prof
+        except ImportError:
+            print("[Profiling] pyinstrument 미설치 → sample 모드로 대체")
+            session.mode = "sample"
+    sampler = _StackSampler(session, settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    sampler.start()
+    return sampler
+
+
+def _stop_profiler(session: ProfileSession, prof) -> None:
+    out = session.out_dir
+    if isinstance(prof, cProfile.Profile):
+        prof.disable()
+        prof.dump_stats(str(out / "profile.prof"))
+        text = io.StringIO()
+        pstats.Stats(prof, stream=text).sort_stats("cumulative").print_stats(60)
+        (out / "profile.txt").write_text(text.getvalue(), encoding="utf-8")
+        session.files += ["profile.prof", "profile.txt"]
+    elif isinstance(prof, _StackSampler):
+        prof.stop()
+        prof.write(out / "stacks.collapsed")
+        session.files.append("stacks.collapsed")
+    else:
+        prof.stop()
+        (out / "profile.html").write_text(prof.output_html(), encoding="utf-8")
+        session.files.append("profile.html")
+
+
+@contextmanager
+def profile_session(mode: str, out_dir: Path, label: str = ""):
+    """with profile_session("sample", Path(...)) as s: ... → 끝나면 s.files에 저장된 파일 이름"""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"알 수 없는 프로파일 모드: {mode} (지원: {', '.join(PROFILE_MODES)})")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = ProfileSession(mode, out_dir, label)
+    session.threads.add(threading.get_ident())
+    token = _session.set(session)
+    started = time.perf_counter()
+    prof = _start_profiler(session)
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+        try:
+            _stop_profiler(session, prof)
+            for stage, lines in session.memory.items():
+                name = f"memory_{stage}.txt"
+                (out_dir / name).write_text("\n".join(lines) + "\n", encoding="utf-8")
+                session.files.append(name)
+            summary = {
+                "label": label,
+                "mode": session.mode,
+                "duration_s": round(time.perf_counter() - started, 3),
+                "samples": session.samples,
+                "threads": len(session.threads),
+                "files": session.files,
+            }
+            (out_dir / "summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+            print(f"[Profiling] {label or mode} 결과 저장: {out_dir} ({', '.join(session.files)})")
+        except OSError as e:
+            print(f"[Profiling] 결과 저장 실패: {e}")
+
+
+# -------------------------------
+# 단계 hook (metrics.stage에서 호출)
+# -------------------------------
+def _tracemalloc_acquire() -> None:
+    global _tm_users, _tm_owned
+    with _tm_lock:
+        if _tm_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+            _tm_owned = True
+        _tm_users += 1
+
+
+def _tracemalloc_release() -> None:
+    global _tm_users, _tm_owned
+    with _tm_lock:
+        _tm_users -= 1
+        if _tm_users == 0 and _tm_owned:
+            tracemalloc.stop()
+            _tm_owned = False
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, peak: int) -> list[str]:
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    lines = [f"peak traced memory: {peak / 1024:.1f} KiB", f"top {settings.PROFILE_MEMORY_TOP_N} (size diff / count diff):"]
+    lines += [str(stat) for stat in diff[: settings.PROFILE_MEMORY_TOP_N]]
+    return lines
+
+
+@contextmanager
+def stage_scope(name: str):
+    session = _session.get()
+    if session is None:
+        yield
+        return
+    session.threads.add(threading.get_ident())
+    if name not in settings.PROFILE_MEMORY_STAGES.split(","):
+        yield
+        return
+
+    _tracemalloc_acquire()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        yield
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        lines = _top_allocations(before, after, peak)
+        session.memory.setdefault(name, []).extend(lines + [""])
+    finally:
+        _tracemalloc_release()
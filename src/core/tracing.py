@@ -0,0 +1,207 @@
+# src/core/tracing.py
+"""
+요청 단위 경량 tracing (OpenTelemetry span 모델과 같은 구조)
+- trace(name): 요청/작업의 root span을 열고 새 trace_id 발급. 끝나면 span 전부를 exporter로 보냄
+- span(name, **attrs): 현재 span의 자식 span (contextvar 기반, deadline.submit으로 넘긴 스레드에도 이어짐)
+- start_span(name): 현재 context를 바꾸지 않는 span (generator 안의 스트리밍 호출처럼 context가 오가는 곳용)
+- 활성 trace가 없으면 span은 아무것도 기록하지 않는다 (스크립트/단위 호출에서 비용 0)
+exporter
+- memory: 최근 TRACE_MEMORY_SIZE개 trace를 프로세스 안에 보관 (get_trace / timeline)
+- file  : TRACE_FILE을 지정하면 OTLP JSON 형태의 span을 한 줄씩 추가 (collector로 그대로 올릴 수 있음)
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.core.config import settings
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"             # OK | ERROR
+    status_message: str = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: BaseException | None = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status, self.status_message = "ERROR", f"{type(error).__name__}: {error}"[:300]
+        _finish(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict[str, Any]:
+        """OTLP/JSON span 표현"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or 0),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()],
+            "status": {"code": 2 if self.status == "ERROR" else 1, "message": self.status_message},
+        }
+
+
+class _NoopSpan:
+    """활성 trace가 없을 때 돌려주는 span (기록 안 함)"""
+    trace_id = span_id = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: BaseException | None = None) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+_lock = threading.Lock()
+_open_traces: dict[str, list[Span]] = {}             # trace_id → 끝난 span들 (root가 끝나면 export)
+_finished: OrderedDict[str, list[Span]] = OrderedDict()
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def _finish(span: Span) -> None:
+    with _lock:
+        spans = _open_traces.get(span.trace_id)
+        if spans is None:
+            return                                   # root가 이미 끝난 뒤 늦게 끝난 span (버림)
+        spans.append(span)
+        if span.parent_id is not None:
+            return
+        del _open_traces[span.trace_id]
+        _finished[span.trace_id] = spans
+        while len(_finished) > settings.TRACE_MEMORY_SIZE:
+            _finished.popitem(last=False)
+    _export_file(spans)
+
+
+def _export_file(spans: list[Span]) -> None:
+    if not settings.TRACE_FILE:
+        return
+    try:
+        with open(settings.TRACE_FILE, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_otlp(), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[Tracing] trace 파일 저장 실패: {e}")
+
+
+def current_trace_id() -> str | None:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+def start_span(name: str, **attributes) -> Span | _NoopSpan:
+    """현재 span의 자식 span을 만들기만 한다 (context는 그대로). 끝낼 때 span.end()."""
+    parent = _current.get()
+    if parent is None or not settings.TRACING_ENABLED:
+        return _NOOP
+    return Span(name, parent.trace_id, _new_id(8), parent.span_id, attributes=dict(attributes))
+
+
+@contextmanager
+def _activate(span: Span | _NoopSpan):
+    token = _current.set(span) if isinstance(span, Span) else None
+    try:
+        yield span
+    except BaseException as e:
+        span.end(error=e)
+        raise
+    finally:
+        span.end()
+        if token is not None:
+            _current.reset(token)
+
+
+def span(name: str, **attributes):
+    """with span("texprep.merge", files=3) as s: ... (활성 trace가 없으면 no-op)"""
+    return _activate(start_span(name, **attributes))
+
+
+def trace(name: str, **attributes):
+    """요청/작업 하나의 root span. with trace("storybook") as root: root.trace_id"""
+    if not settings.TRACING_ENABLED:
+        return _activate(_NOOP)
+    root = Span(name, _new_id(16), _new_id(8), None, attributes=dict(attributes))
+    with _lock:
+        _open_traces[root.trace_id] = []
+    return _activate(root)
+
+
+def get_trace(trace_id: str) -> list[Span] | None:
+    with _lock:
+        spans = _finished.get(trace_id)
+        return list(spans) if spans is not None else None
+
+
+def timeline(trace_id: str) -> list[dict[str, Any]] | None:
+    """
+    trace 하나를 시작 시각 순 단계 목록으로 (job 상태 응답에 붙이는 형태)
+    start_ms는 root 시작 기준, depth는 root=0
+    """
+    spans = get_trace(trace_id)
+    if not spans:
+        return None
+    root = next((s for s in spans if s.parent_id is None), spans[0])
+    by_id = {s.span_id: s for s in spans}
+
+    def depth(s: Span) -> int:
+        d = 0
+        while s.parent_id and s.parent_id in by_id:
+            s, d = by_id[s.parent_id], d + 1
+        return d
+
+    return [
+        {
+            "name": s.name,
+            "span_id": s.span_id,
+            "parent_id": s.parent_id,
+            "depth": depth(s),
+            "start_ms": round((s.start_ns - root.start_ns) / 1e6, 2),
+            "duration_ms": round(s.duration_ms, 2),
+            "status": s.status,
+            **({"error": s.status_message} if s.status_message else {}),
+            **({"attributes": s.attributes} if s.attributes else {}),
+        }
+        for s in sorted(spans, key=lambda s: s.start_ns)
+    ]
+
+
+def server_timing(trace_id: str) -> str:
+    """
+    지금까지 끝난 span을 이름별로 합산한 Server-Timing 헤더 값 (예: "texprep;dur=12.3, render;dur=40.1")
+    root가 아직 열려 있어도 동작 → 응답을 돌려주기 직전에 붙인다
+    """
+    with _lock:
+        spans = list(_open_traces.get(trace_id) or _finished.get(trace_id) or [])
+    totals: dict[str, float] = {}
+    for s in spans:
+        totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in totals.items())
@@ -0,0 +1,55 @@
+# src/core/warmup.py
+"""
+무거운 라이브러리 미리 로드 (lazy import의 짝)
+- 서비스 모듈은 fitz / PIL / reportlab / arxiv / anthropic 등을 처음 쓰는 함수 안에서 import한다
+  → API 프로세스는 이것들 없이 바로 ready
+- preload_modules(): 한 번에 import (이미 로드된 모듈은 비용 0). 모듈별 소요시간(ms)을 돌려줌
+- start_background_preload(): ready 이후 백그라운드 스레드에서 로드 → 첫 요청도 import 비용을 안 냄
+  (API_WARM_IMPORTS=false면 하지 않음)
+"""
+
+import importlib
+import threading
+import time
+
+from src.core.config import settings
+
+# 요청 경로에서 쓰는 순서대로 (arXiv → 렌더 → 합성 → PDF → LLM)
+HEAVY_MODULES = (
+    "fitz",
+    "requests",
+    "arxiv",
+    "graphviz",
+    "PIL.Image",
+    "PIL.ImageDraw",
+    "PIL.ImageFont",
+    "reportlab.pdfgen.canvas",
+    "reportlab.lib.utils",
+    "anthropic",
+)
+
+
+def preload_modules(names: tuple[str, ...] = HEAVY_MODULES) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"[Warmup] {name} 로드 실패 (첫 사용 때 다시 시도): {e}")
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def start_background_preload() -> threading.Thread | None:
+    if not settings.API_WARM_IMPORTS:
+        return None
+
+    def run():
+        timings = preload_modules()
+        print(f"[Warmup] 백그라운드 import 완료: {sum(timings.values()):.0f}ms ({len(timings)}개 모듈)")
+
+    thread = threading.Thread(target=run, name="warm-imports", daemon=True)
+    thread.start()
+    return thread
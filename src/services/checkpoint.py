@@ -0,0 +1,106 @@
+# src/services/checkpoint.py
+"""
+스토리북 작업 단계별 checkpoint (아티팩트 저장소 위의 ref: ckpt/<job_id>/<stage>/<입력 해시>)
+- job_scope(job_id): 요청/작업 하나의 checkpoint 범위를 contextvar에 설정
+  (deadline.submit으로 넘긴 풀 스레드에도 이어짐)
+- load / save: 단계 출력 bytes. load_json / save_json: JSON으로 직렬화되는 출력
+- 같은 job_id로 다시 실행하면 입력이 같은 단계 / 장면은 저장된 출력을 그대로 쓰고 건너뜀
+  → 11번째 장면에서 Graphviz / reportlab이 실패해도 재시도는 LLM 호출 없이 실패한 단계부터
+- 범위가 없거나 CHECKPOINT_ENABLED=false면 load는 항상 None, save는 아무것도 안 함
+- checkpoint는 일반 아티팩트처럼 STORAGE_TTL_S / STORAGE_MAX_BYTES GC 대상
+"""
+
+import contextvars
+import json
+import re
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.core.config import settings
+from src.services import storage
+
+# 경로 / ref 이름의 한 구간으로 쓰임 → "." / ".."(상위 폴더)가 되지 않게 첫 글자는 점 불가
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,79}$")
+
+
+@dataclass
+class JobCheckpoints:
+    job_id: str
+    reused: Counter[str] = field(default_factory=Counter)     # 단계별 재사용 횟수 (로그 / 응답 헤더용)
+    saved: Counter[str] = field(default_factory=Counter)
+
+
+_job: contextvars.ContextVar[JobCheckpoints | None] = contextvars.ContextVar("checkpoint_job", default=None)
+
+
+def is_valid_job_id(job_id: str) -> bool:
+    return bool(_JOB_ID_RE.match(job_id or ""))
+
+
+def input_key(*parts: Any) -> str:
+    """단계 입력 → checkpoint key (dict / list는 키 정렬 JSON으로)"""
+    return storage.digest_of(*(
+        p if isinstance(p, (str, bytes)) else json.dumps(p, ensure_ascii=False, sort_keys=True, default=str)
+        for p in parts
+    ))
+
+
+@contextmanager
+def job_scope(job_id: str):
+    """with job_scope("abc123") as ckpt: ... (ckpt.reused / ckpt.saved로 결과 확인)"""
+    if not is_valid_job_id(job_id):
+        raise ValueError(f"잘못된 job id: {job_id!r}")
+    ckpt = JobCheckpoints(job_id)
+    token = _job.set(ckpt)
+    try:
+        yield ckpt
+    finally:
+        _job.reset(token)
+        if ckpt.reused:
+            done = ", ".join(f"{stage}×{n}" for stage, n in ckpt.reused.items())
+            print(f"[Checkpoint] job {job_id}: 저장된 결과 재사용 ({done})")
+
+
+def _active() -> JobCheckpoints | None:
+    return _job.get() if settings.CHECKPOINT_ENABLED else None
+
+
+def _name(ckpt: JobCheckpoints, stage: str, key: str) -> str:
+    return f"ckpt/{ckpt.job_id}/{stage}/{key}"
+
+
+def load(stage: str, key: str) -> bytes | None:
+    ckpt = _active()
+    if ckpt is None:
+        return None
+    try:
+        data = storage.get_store().get_named(_name(ckpt, stage, key), kind=f"ckpt:{stage}")
+    except Exception as e:
+        print(f"[Checkpoint] {stage} 조회 실패 (다시 계산): {e}")
+        return None
+    if data is not None:
+        ckpt.reused[stage] += 1
+    return data
+
+
+def save(stage: str, key: str, data: bytes) -> None:
+    ckpt = _active()
+    if ckpt is None:
+        return
+    try:
+        storage.get_store().put_named(_name(ckpt, stage, key), data, kind=f"ckpt:{stage}")
+        ckpt.saved[stage] += 1
+    except Exception as e:
+        # checkpoint 저장 실패는 요청을 실패시키지 않는다 (재시도 때 다시 계산될 뿐)
+        print(f"[Checkpoint] {stage} 저장 실패: {e}")
+
+
+def load_json(stage: str, key: str) -> Any | None:
+    data = load(stage, key)
+    return None if data is None else json.loads(data)
+
+
+def save_json(stage: str, key: str, value: Any) -> None:
+    save(stage, key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
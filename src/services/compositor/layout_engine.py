@@ -0,0 +1,175 @@
+# src/services/compositor/layout_engine.py
+"""
+페이지 레이아웃 엔진
+- 템플릿(slide / a4_portrait / two_up / title)별 박스 geometry를 미리 계산
+- 같은 파라미터의 레이아웃은 한 번만 계산되고, 모든 페이지가 같은 Box 객체를 재사용
+- 캔버스 픽셀 크기 + dpi → PDF 페이지 크기(pt)가 그대로 결정되므로 exporter는 재스케일하지 않음
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Box:
+    x: int
+    y: int
+    w: int
+    h: int
+
+    @property
+    def right(self) -> int:
+        return self.x + self.w
+
+    @property
+    def bottom(self) -> int:
+        return self.y + self.h
+
+    def fit(self, iw: int, ih: int) -> "Box":
+        """(iw, ih) 이미지를 비율 유지하며 박스 중앙에 맞춘 결과 박스"""
+        if iw <= 0 or ih <= 0:
+            return Box(self.x, self.y, 0, 0)
+        scale = min(self.w / iw, self.h / ih)
+        nw, nh = max(1, int(iw * scale)), max(1, int(ih * scale))
+        return Box(self.x + (self.w - nw) // 2, self.y + (self.h - nh) // 2, nw, nh)
+
+
+@dataclass(frozen=True)
+class Slot:
+    """한 장면이 차지하는 영역 (다이어그램 + 나레이션)"""
+    image: Box
+    text: Box
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    name: str
+    size: tuple[int, int]          # 캔버스 픽셀 크기 (W, H)
+    dpi: int                       # PNG 메타데이터 + PDF 페이지 크기 환산용
+    slots: tuple[Slot, ...]        # 페이지당 장면 칸
+    font_max: int                  # 나레이션 최대 폰트 크기 (자동 축소 시작점)
+    font_min: int = 12
+
+    @property
+    def page_size_pt(self) -> tuple[float, float]:
+        W, H = self.size
+        return W * 72 / self.dpi, H * 72 / self.dpi
+
+    @property
+    def scenes_per_page(self) -> int:
+        return len(self.slots)
+
+
+@dataclass(frozen=True)
+class TitleLayout:
+    name: str
+    size: tuple[int, int]
+    dpi: int
+    title: Box
+    subtitle: Box
+    font_max: int
+    font_min: int = 16
+
+    @property
+    def page_size_pt(self) -> tuple[float, float]:
+        W, H = self.size
+        return W * 72 / self.dpi, H * 72 / self.dpi
+
+
+# -------------------------------
+# 템플릿 정의
+# -------------------------------
+# name: (캔버스 크기, dpi, 기본 여백)
+_TEMPLATE_SPECS: dict[str, tuple[tuple[int, int], int, int]] = {
+    "slide": ((1280, 720), 96, 40),          # 16:9 슬라이드 (960x540pt)
+    "a4_portrait": ((1240, 1754), 150, 80),  # A4 세로, 다이어그램 위 + 텍스트 아래
+    "two_up": ((1754, 1240), 150, 60),       # A4 가로, 장면 2개 나란히
+}
+
+TEMPLATES = tuple(_TEMPLATE_SPECS)
+
+
+def _slide_slots(W: int, H: int, margin: int) -> tuple[tuple[Slot, ...], int]:
+    # 이미지:텍스트 높이 비율 = 5:1
+    img_area_h = int(H * 5 / 6)
+    text_area_h = H - img_area_h
+    slot = Slot(
+        image=Box(margin, margin, W - 2 * margin, img_area_h - 2 * margin),
+        text=Box(margin, img_area_h, W - 2 * margin, text_area_h),
+    )
+    return (slot,), max(18, int(text_area_h * 0.2))
+
+
+def _a4_portrait_slots(W: int, H: int, margin: int) -> tuple[tuple[Slot, ...], int]:
+    # 세로 페이지: 다이어그램 60%, 텍스트 블록 40% (긴 나레이션도 큰 글씨로)
+    img_h = int((H - 2 * margin) * 0.6)
+    gap = margin // 2
+    slot = Slot(
+        image=Box(margin, margin, W - 2 * margin, img_h),
+        text=Box(margin, margin + img_h + gap, W - 2 * margin, H - 2 * margin - img_h - gap),
+    )
+    return (slot,), 36
+
+
+def _two_up_slots(W: int, H: int, margin: int) -> tuple[tuple[Slot, ...], int]:
+    col_w = (W - 3 * margin) // 2
+    inner_h = H - 2 * margin
+    img_h = int(inner_h * 0.7)
+    gap = margin // 2
+    slots = tuple(
+        Slot(
+            image=Box(x, margin, col_w, img_h),
+            text=Box(x, margin + img_h + gap, col_w, inner_h - img_h - gap),
+        )
+        for x in (margin, 2 * margin + col_w)
+    )
+    return slots, 30
+
+
+_SLOT_BUILDERS = {
+    "slide": _slide_slots,
+    "a4_portrait": _a4_portrait_slots,
+    "two_up": _two_up_slots,
+}
+
+
+@lru_cache(maxsize=32)
+def get_layout(
+    name: str = "slide",
+    canvas_size: tuple[int, int] | None = None,
+    margin: int | None = None,
+) -> PageLayout:
+    """
+    템플릿 이름 → PageLayout (파라미터별 1회 계산 후 캐시)
+    - canvas_size / margin을 주면 템플릿 기본값을 덮어쓴다
+    """
+    if name not in _TEMPLATE_SPECS:
+        raise ValueError(f"알 수 없는 레이아웃 템플릿: {name} (지원: {', '.join(TEMPLATES)})")
+    default_size, dpi, default_margin = _TEMPLATE_SPECS[name]
+    W, H = canvas_size or default_size
+    m = default_margin if margin is None else margin
+
+    slots, font_max = _SLOT_BUILDERS[name](W, H, m)
+    return PageLayout(name=name, size=(W, H), dpi=dpi, slots=slots, font_max=font_max)
+
+
+@lru_cache(maxsize=32)
+def get_title_layout(
+    name: str = "slide",
+    canvas_size: tuple[int, int] | None = None,
+    margin: int | None = None,
+) -> TitleLayout:
+    """본문 템플릿과 같은 페이지 크기를 쓰는 표지(title page) 레이아웃"""
+    page = get_layout(name, canvas_size, margin)
+    W, H = page.size
+    m = _TEMPLATE_SPECS[name][2] if margin is None else margin
+    title_h = int(H * 0.3)
+    title_y = int(H * 0.3)
+    return TitleLayout(
+        name=f"{name}_title",
+        size=page.size,
+        dpi=page.dpi,
+        title=Box(m, title_y, W - 2 * m, title_h),
+        subtitle=Box(m, title_y + title_h, W - 2 * m, int(H * 0.15)),
+        font_max=max(32, H // 12),
+    )
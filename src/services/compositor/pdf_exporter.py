@@ -1,30 +1,50 @@
 from pathlib import Path
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
 
-def export_pdf(scene_inputs, out_path: Path | None = None, *, in_memory: bool = False):
-    W, H = A4
+
+def _page_size_for(img) -> tuple[float, float]:
+    """PNG dpi 메타데이터 기준으로 캔버스와 같은 크기의 페이지(pt)"""
+    iw, ih = img.size
+    # PNG는 dpi를 pixels/meter로 저장하므로 96.012 같은 오차를 반올림
+    dpi = round(img.info.get("dpi", (72, 72))[0]) or 72
+    return iw * 72 / dpi, ih * 72 / dpi
+
+
+def export_pdf(scene_inputs, out_path: Path | None = None, *, in_memory: bool = False, page_size=None):
+    """
+    PNG 페이지들을 하나의 PDF로 합친다.
+    - page_size=None: 페이지 크기를 각 캔버스(layout_engine 템플릿)에 맞춤 → 재스케일 없음
+    - page_size 지정(예: reportlab A4): 비율 유지하며 페이지 안에 맞춤
+    """
+    # reportlab / PIL은 첫 export 때 로드 (API cold start에서 제외)
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
 
     if in_memory:
         buf = BytesIO()
-        c = canvas.Canvas(buf, pagesize=A4)
+        c = canvas.Canvas(buf)
     else:
         if out_path is None:
             raise ValueError("out_path must be provided when in_memory=False")
-        c = canvas.Canvas(str(out_path), pagesize=A4)
+        c = canvas.Canvas(str(out_path))
 
     for scene in scene_inputs:
-        if isinstance(scene, BytesIO):
-            img = ImageReader(scene)
+        pil = Image.open(scene if isinstance(scene, BytesIO) else str(scene))
+        img = ImageReader(pil)
+
+        if page_size is None:
+            W, H = _page_size_for(pil)
+            c.setPageSize((W, H))
+            c.drawImage(img, 0, 0, width=W, height=H)
         else:
-            img = ImageReader(str(scene))
-        iw, ih = img.getSize()
-        scale = min(W / iw, H / ih)
-        nw, nh = iw * scale, ih * scale
-        x, y = (W - nw) / 2, (H - nh) / 2
-        c.drawImage(img, x, y, width=nw, height=nh)
+            W, H = page_size
+            c.setPageSize((W, H))
+            iw, ih = img.getSize()
+            scale = min(W / iw, H / ih)
+            nw, nh = iw * scale, ih * scale
+            x, y = (W - nw) / 2, (H - nh) / 2
+            c.drawImage(img, x, y, width=nw, height=nh)
         c.showPage()
 
     c.save()
@@ -1,33 +1,85 @@
 from pathlib import Path
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
-
-
-def _wrap_text_to_width(draw, text, font, max_width):
-    lines, line = [], ""
-    for word in text.split():
-        test_line = f"{line} {word}".strip()
-        if draw.textlength(test_line, font=font) <= max_width:
-            line = test_line
-        else:
-            if line:
-                lines.append(line)
-            line = word
-    if line:
-        lines.append(line)
-    return "\n".join(lines)
-
-
-def _make_fallback_scene(message: str, size=(1280, 720)) -> BytesIO:
-    """Diagram PNG 로딩 실패 시 fallback 캔버스"""
-    W, H = size
-    img = Image.new("RGB", (W, H), "white")
+
+from src.services.compositor.layout_engine import Box, PageLayout, Slot, get_layout, get_title_layout
+from src.services.compositor.text_layout import fit_text, get_font
+
+_DEFAULT_FONT = Path("assets/NanumGothic.ttf")
+
+
+def _make_fallback_diagram(message: str, size=(1280, 720)):
+    """Diagram PNG 로딩 실패 시 해당 slot에 대신 넣을 이미지 (페이지의 다른 장면은 그대로)"""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGBA", size, "white")
     d = ImageDraw.Draw(img)
     d.text((20, 20), f"[Fallback Scene]\n{message}", fill="red")
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return buf
+    return img
+
+
+def _draw_text_in_box(draw, text: str, box: Box, font_key: str | None, font_max: int, font_min: int) -> None:
+    """박스 안에 텍스트를 자동 축소 + 가운데 정렬로 그린다"""
+    layout = fit_text(text or "", font_key, box.w, box.h, max_size=font_max, min_size=min(font_min, font_max))
+    font = get_font(font_key, layout.font_size)
+    text_x = box.x + (box.w - layout.width) // 2
+    text_y = box.y + (box.h - layout.height) // 2
+    draw.multiline_text((text_x, text_y), layout.text, font=font, fill=(0, 0, 0), spacing=layout.spacing, align="center")
+
+
+def _draw_slot(canvas, draw, slot: Slot, diagram, narration: str, font_key: str | None, layout: PageLayout) -> None:
+    from PIL import Image
+
+    # 비율 맞춰 리사이즈 후 이미지 박스 중앙 배치
+    target = slot.image.fit(*diagram.size)
+    diagram = diagram.resize((target.w, target.h), Image.LANCZOS)
+    canvas.paste(diagram, (target.x, target.y), diagram)
+
+    # 텍스트 렌더링 (폰트/레이아웃 캐시 + 영역에 맞춰 자동 축소)
+    _draw_text_in_box(draw, narration, slot.text, font_key, layout.font_max, layout.font_min)
+
+
+def _finish(canvas, dpi: int, out_path: Path | None, in_memory: bool):
+    # dpi 메타데이터 → exporter가 페이지 크기를 캔버스에 맞춘다
+    if in_memory:
+        buf = BytesIO()
+        canvas.save(buf, format="PNG", dpi=(dpi, dpi))
+        buf.seek(0)
+        return buf
+    else:
+        if out_path is None:
+            raise ValueError("out_path must be provided when in_memory=False")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        canvas.save(out_path, dpi=(dpi, dpi))
+        return out_path
+
+
+def compose_page(
+    items,  # [(diagram Path 또는 BytesIO, narration), ...] 최대 layout.scenes_per_page개
+    layout: PageLayout,
+    out_path: Path | None = None,
+    *,
+    font_path: Path = _DEFAULT_FONT,
+    in_memory: bool = False,
+):
+    """레이아웃의 slot 순서대로 장면들을 한 페이지에 합성한다."""
+    from PIL import Image, ImageDraw, UnidentifiedImageError
+
+    W, H = layout.size
+    canvas = Image.new("RGB", (W, H), (255, 255, 255))
+    draw = ImageDraw.Draw(canvas)
+    font_key = str(font_path) if font_path else None
+
+    for slot, (diagram_input, narration) in zip(layout.slots, items):
+        # 🔥 diagram PNG 로딩
+        try:
+            diagram = Image.open(diagram_input).convert("RGBA")
+        except (UnidentifiedImageError, OSError) as e:
+            # 이 slot만 fallback 이미지로 (페이지 크기 / dpi / out_path 처리는 그대로)
+            print(f"[Composer] diagram 로딩 실패 → fallback: {e}")
+            diagram = _make_fallback_diagram(f"Diagram load failed: {e}", size=(slot.image.w, slot.image.h))
+        _draw_slot(canvas, draw, slot, diagram, narration, font_key, layout)
+
+    return _finish(canvas, layout.dpi, out_path, in_memory)
 
 
 def compose_scene(
@@ -36,63 +88,49 @@ def compose_scene(
     out_path: Path | None = None,
     *,
     canvas_size=(1280, 720),
-    font_path: Path = Path("assets/NanumGothic.ttf"),
+    font_path: Path = _DEFAULT_FONT,
     margin: int = 40,
+    layout: PageLayout | None = None,
     in_memory: bool = False,
 ):
-    W, H = canvas_size
-    canvas = Image.new("RGB", (W, H), (255, 255, 255))
+    if layout is None:
+        layout = get_layout("slide", tuple(canvas_size), margin)
+    return compose_page([(diagram_input, narration)], layout, out_path, font_path=font_path, in_memory=in_memory)
 
-    img_area_h = int(H * 5 / 6)
-    text_area_h = H - img_area_h
 
-    # 🔥 diagram PNG 로딩
-    try:
-        if isinstance(diagram_input, BytesIO):
-            diagram = Image.open(diagram_input).convert("RGBA")
-        else:
-            diagram = Image.open(diagram_input).convert("RGBA")
-    except (UnidentifiedImageError, OSError) as e:
-        # fallback 이미지 생성
-        return _make_fallback_scene(f"Diagram load failed: {e}", size=canvas_size)
+def compose_pages(items, layout: PageLayout, *, font_path: Path = _DEFAULT_FONT):
+    """
+    in-memory 장면 목록을 레이아웃의 페이지당 slot 수만큼 묶어 합성한다.
+    - items: [(diagram BytesIO, narration), ...]
+    - 반환: 페이지 PNG BytesIO 리스트
+    """
+    per_page = layout.scenes_per_page
+    return [
+        compose_page(items[i : i + per_page], layout, font_path=font_path, in_memory=True)
+        for i in range(0, len(items), per_page)
+    ]
 
-    # 비율 맞춰 리사이즈
-    dw, dh = diagram.size
-    scale = min((W - 2 * margin) / dw, (img_area_h - 2 * margin) / dh)
-    new_w, new_h = int(dw * scale), int(dh * scale)
-    diagram = diagram.resize((new_w, new_h), Image.LANCZOS)
 
-    dx = (W - new_w) // 2
-    dy = (img_area_h - new_h) // 2
-    canvas.paste(diagram, (dx, dy), diagram)
+def compose_title_page(
+    title: str,
+    subtitle: str = "",
+    out_path: Path | None = None,
+    *,
+    template: str = "slide",
+    font_path: Path = _DEFAULT_FONT,
+    in_memory: bool = False,
+):
+    """본문 템플릿과 같은 크기의 표지 페이지"""
+    from PIL import Image, ImageDraw
 
-    # 텍스트 렌더링
+    layout = get_title_layout(template)
+    W, H = layout.size
+    canvas = Image.new("RGB", (W, H), (255, 255, 255))
     draw = ImageDraw.Draw(canvas)
-    try:
-        if font_path and Path(font_path).exists():
-            font_size = max(18, int(text_area_h * 0.2))
-            font = ImageFont.truetype(str(font_path), font_size)
-        else:
-            font = ImageFont.load_default()
-    except OSError:
-        font = ImageFont.load_default()
-
-    wrapped_text = _wrap_text_to_width(draw, narration, font, W - 2 * margin)
-    bbox = draw.multiline_textbbox((0, 0), wrapped_text, font=font, spacing=6, align="center")
-    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    text_x = (W - tw) // 2
-    text_y = img_area_h + (text_area_h - th) // 2
-
-    draw.multiline_text((text_x, text_y), wrapped_text, font=font, fill=(0, 0, 0), spacing=6, align="center")
+    font_key = str(font_path) if font_path else None
 
-    if in_memory:
-        buf = BytesIO()
-        canvas.save(buf, format="PNG")
-        buf.seek(0)
-        return buf
-    else:
-        if out_path is None:
-            raise ValueError("out_path must be provided when in_memory=False")
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        canvas.save(out_path)
-        return out_path
+    _draw_text_in_box(draw, title, layout.title, font_key, layout.font_max, layout.font_min)
+    if subtitle:
+        _draw_text_in_box(draw, subtitle, layout.subtitle, font_key, layout.font_max // 2, 12)
+
+    return _finish(canvas, layout.dpi, out_path, in_memory)
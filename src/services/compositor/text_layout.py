@@ -0,0 +1,213 @@
+# src/services/compositor/text_layout.py
+"""
+나레이션 텍스트 레이아웃 엔진
+- (폰트 경로, 크기) 단위 프로세스 전역 폰트 캐시
+- 문자별 glyph advance를 캐싱해 줄 폭을 누적 계산 (줄 길이에 선형)
+- 한글/CJK는 글자 경계에서 줄바꿈, 라틴 단어는 공백 경계 우선
+- 같은 나레이션의 레이아웃 결과는 memoize
+- 텍스트 영역에 맞게 폰트 자동 축소 (기준 크기 advance를 비례 스케일링, 재측정 없음)
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from src.core.config import settings
+
+# 한글 자모/음절, CJK 문자, 전각 기호 → 글자 단위로 줄바꿈 허용
+_CJK = r"\u1100-\u11ff\u2e80-\u9fff\ua960-\ua97f\uac00-\ud7af\uf900-\ufaff\uff00-\uffef"
+# 줄 맨 앞에 오면 어색한 닫는 문장부호는 앞 글자에 붙인다
+_CLOSE_PUNCT = r".,!?:;…)\]}」』”’%"
+_TOKEN_RE = re.compile(rf"\s+|[{_CJK}][{_CLOSE_PUNCT}]*|[^\s{_CJK}]+")
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    lines: tuple[str, ...]
+    font_size: int
+    line_height: int
+    spacing: int
+    width: int
+    height: int
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+# -------------------------------
+# 폰트 / advance 캐시
+# -------------------------------
+@lru_cache(maxsize=settings.FONT_CACHE_SIZE)
+def get_font(font_path: str | None, size: int):
+    """(경로, 크기) 단위로 폰트를 한 번만 로드한다. 실패 시 기본 폰트."""
+    from PIL import ImageFont
+
+    try:
+        if font_path and Path(font_path).exists():
+            return ImageFont.truetype(font_path, size)
+    except OSError:
+        pass
+    return ImageFont.load_default()
+
+
+def _is_scalable(font_path: str | None, size: int) -> bool:
+    """실제 TrueType 파일에서 로드된 폰트만 크기 비례 스케일링이 성립한다."""
+    return bool(font_path) and getattr(get_font(font_path, size), "path", None) == font_path
+
+
+class _AdvanceTable:
+    """문자별 advance 폭 캐시. 같은 폰트로 여러 번 측정하지 않는다."""
+
+    def __init__(self, font):
+        self.font = font
+        self._adv: dict[str, float] = {}
+        bbox = font.getbbox("Ag가")
+        self.line_height = max(1, bbox[3] - min(0, bbox[1]))
+
+    def advance(self, ch: str) -> float:
+        w = self._adv.get(ch)
+        if w is None:
+            w = self.font.getlength(ch)
+            self._adv[ch] = w
+        return w
+
+    def width(self, s: str) -> float:
+        adv = self.advance
+        return sum(adv(ch) for ch in s)
+
+
+@lru_cache(maxsize=settings.FONT_CACHE_SIZE)
+def _advance_table(font_path: str | None, size: int) -> _AdvanceTable:
+    return _AdvanceTable(get_font(font_path, size))
+
+
+# -------------------------------
+# 토큰화 + 그리디 줄바꿈
+# -------------------------------
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text)
+
+
+def _break_lines(tokens: list[str], table: _AdvanceTable, scale: float, max_width: float) -> tuple[list[str], float]:
+    """
+    토큰 폭을 누적하며 그리디 줄바꿈.
+    scale: 기준 크기 대비 목표 크기 비율 (advance 비례 스케일링)
+    반환: (줄 목록, 가장 넓은 줄 폭)
+    """
+    space_w = table.advance(" ") * scale
+    lines: list[str] = []
+    cur: list[str] = []
+    cur_w = 0.0
+    widest = 0.0
+    pending_space = False
+
+    def flush():
+        nonlocal cur, cur_w, widest
+        if cur:
+            lines.append("".join(cur))
+            widest = max(widest, cur_w)
+        cur, cur_w = [], 0.0
+
+    for tok in tokens:
+        if tok.isspace():
+            pending_space = bool(cur)
+            continue
+
+        w = table.width(tok) * scale
+        sep_w = space_w if pending_space else 0.0
+        pending_space = False
+
+        if cur_w + sep_w + w <= max_width:
+            if sep_w:
+                cur.append(" ")
+            cur.append(tok)
+            cur_w += sep_w + w
+            continue
+
+        flush()
+        if w <= max_width:
+            cur, cur_w = [tok], w
+            continue
+
+        # 폭보다 긴 단어(URL, 긴 영문 등) → 글자 경계에서 자른다
+        for ch in tok:
+            aw = table.advance(ch) * scale
+            if cur and cur_w + aw > max_width:
+                flush()
+            cur.append(ch)
+            cur_w += aw
+
+    flush()
+    return lines, widest
+
+
+def _make_layout(lines: list[str], widest: float, size: int, line_height: int, spacing: int) -> TextLayout:
+    n = len(lines)
+    height = n * line_height + max(0, n - 1) * spacing
+    return TextLayout(
+        lines=tuple(lines),
+        font_size=size,
+        line_height=line_height,
+        spacing=spacing,
+        width=int(round(widest)),
+        height=height,
+    )
+
+
+# -------------------------------
+# 공개 API
+# -------------------------------
+@lru_cache(maxsize=settings.TEXT_LAYOUT_CACHE_SIZE)
+def layout_text(text: str, font_path: str | None, font_size: int, max_width: int, spacing: int = 6) -> TextLayout:
+    """고정 폰트 크기로 텍스트를 max_width에 맞춰 줄바꿈한다."""
+    table = _advance_table(font_path, font_size)
+    lines, widest = _break_lines(_tokenize(text or ""), table, 1.0, max_width)
+    return _make_layout(lines, widest, font_size, table.line_height, spacing)
+
+
+@lru_cache(maxsize=settings.TEXT_LAYOUT_CACHE_SIZE)
+def fit_text(
+    text: str,
+    font_path: str | None,
+    max_width: int,
+    max_height: int,
+    *,
+    max_size: int,
+    min_size: int = 12,
+    spacing: int = 6,
+) -> TextLayout:
+    """
+    텍스트 영역(max_width x max_height)에 들어가는 가장 큰 폰트 크기를 찾는다.
+    - advance는 max_size에서 한 번만 측정하고, 작은 크기는 비례 스케일링으로 계산
+    - 크기 탐색은 이분 탐색 (레이아웃 1회 = 토큰 수에 선형)
+    - min_size에서도 넘치면 min_size 레이아웃을 그대로 반환
+    """
+    tokens = _tokenize(text or "")
+    if not _is_scalable(font_path, max_size):
+        return layout_text(text, font_path, max_size, max_width, spacing)
+
+    base = _advance_table(font_path, max_size)
+
+    def attempt(size: int) -> TextLayout:
+        scale = size / max_size
+        lines, widest = _break_lines(tokens, base, scale, max_width)
+        line_h = max(1, int(round(base.line_height * scale)))
+        return _make_layout(lines, widest, size, line_h, spacing)
+
+    best = attempt(max_size)
+    if best.height <= max_height:
+        return best
+
+    lo, hi = min_size, max_size - 1
+    best = attempt(min_size)
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        cand = attempt(mid)
+        if cand.height <= max_height:
+            best = cand
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return best
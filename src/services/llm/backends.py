@@ -0,0 +1,349 @@
+# src/services/llm/backends.py
+"""
+LLM 백엔드 (call_claude 아래 계층)
+- anthropic : 실제 Anthropic Messages API (기본값)
+- fake      : 네트워크 없이 동작하는 로컬 가짜 백엔드 (부하 테스트 / LLM 외 구간 측정용)
+    * LLM_FAKE_REPLAY_DIR에 같은 요청 해시(모델 + system + tool + 프롬프트)의 저장 응답이 있으면 그대로 재생
+      (LLM_RAW_RESPONSE_DIR로 수집한 파일: <hash>.txt = 텍스트 응답, <hash>.json = tool input)
+    * 없으면 스키마에 맞는 scene / viz JSON을 합성
+    * 지연시간: 로그정규분포 (중앙값 LLM_FAKE_LATENCY_MS, 퍼짐 LLM_FAKE_LATENCY_SIGMA)
+    * 오류 주입: LLM_FAKE_ERROR_RATES="429:0.02,529:0.01,malformed:0.02"
+두 백엔드 모두 create(**kwargs) / stream(**kwargs) 로 Messages API와 같은 모양의 객체를 돌려준다.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from src.core.config import settings
+
+BACKENDS = ("anthropic", "fake")
+
+
+def _tool_name(kwargs: dict) -> str | None:
+    tools = kwargs.get("tools") or []
+    return tools[0]["name"] if tools else None
+
+
+def request_key(kwargs: dict) -> str:
+    """
+    응답 저장/재생용 키: 모델 + system(고정 지시문) + tool 이름 + 사용자 메시지의 sha1 앞 16자리
+    (싼 모델 응답과 큰 모델로 승급한 응답이 서로 다른 키로 저장 / 재생되도록 모델까지 포함)
+    """
+    system = "".join(b.get("text", "") for b in kwargs.get("system") or [])
+    raw = "\n".join((kwargs["model"], system, _tool_name(kwargs) or "", kwargs["messages"][-1]["content"]))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class AnthropicBackend:
+    name = "anthropic"
+
+    def __init__(self):
+        from anthropic import Anthropic
+
+        self._client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+    def create(self, **kwargs):
+        return self._client.messages.create(**kwargs)
+
+    def stream(self, **kwargs):
+        return self._client.messages.stream(**kwargs)
+
+
+# -------------------------------
+# fake 응답 객체 (Messages API 응답과 같은 속성만)
+# -------------------------------
+@dataclass
+class _Usage:
+    input_tokens: int
+    output_tokens: int
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+
+
+@dataclass
+class _Block:
+    type: str
+    text: str = ""
+    name: str = ""
+    input: Any = None
+
+
+@dataclass
+class _Message:
+    content: list[_Block]
+    usage: _Usage
+    stop_reason: str = "end_turn"
+
+
+@dataclass
+class _Event:
+    type: str
+    text: str = ""
+    partial_json: str = ""
+
+
+@dataclass
+class _FakeStream:
+    """messages.stream() 컨텍스트 매니저 흉내: text_stream / 이벤트 반복 / get_final_message"""
+    message: _Message
+    chunks: list[str]
+    is_tool: bool
+    delay_per_chunk: float = 0.0
+    timeout: float | None = None
+    _closed: bool = field(default=False, init=False)
+    _sent: int = field(default=0, init=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._closed = True
+        return False
+
+    def close(self) -> None:
+        self._closed = True
+
+    def _pieces(self):
+        start = time.monotonic()
+        for piece in self.chunks:
+            if self._closed:
+                return
+            if self.delay_per_chunk:
+                time.sleep(self.delay_per_chunk)
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise _timeout_error()
+            self._sent += 1
+            yield piece
+
+    @property
+    def text_stream(self):
+        if not self.is_tool:
+            yield from self._pieces()
+
+    def __iter__(self):
+        for piece in self._pieces():
+            yield _Event("input_json", partial_json=piece) if self.is_tool else _Event("text", text=piece)
+
+    def get_final_message(self) -> _Message:
+        return self.message
+
+    @property
+    def current_message_snapshot(self) -> _Message:
+        """지금까지 보낸 조각만큼의 사용량 (중간 취소 시 비용 계산용)"""
+        total = self.message.usage
+        done = self._sent / max(len(self.chunks), 1)
+        return _Message(self.message.content, _Usage(total.input_tokens, int(total.output_tokens * done)))
+
+
+def _api_error(status: int):
+    """anthropic SDK와 같은 예외 타입으로 429 / 529 오류 생성 (재시도 로직이 실제와 똑같이 반응하도록)"""
+    import anthropic
+
+    # SDK 예외가 읽는 속성만 갖춘 가짜 HTTP 응답 (httpx 객체를 직접 만들지 않음)
+    request = SimpleNamespace(method="POST", url="https://fake.local/v1/messages")
+    response = SimpleNamespace(status_code=status, request=request, headers={})
+    if status == 429:
+        return anthropic.RateLimitError("fake: rate limited", response=response, body=None)
+    return anthropic.OverloadedError("fake: overloaded", response=response, body=None)
+
+
+def _timeout_error():
+    import anthropic
+
+    return anthropic.APITimeoutError(request=SimpleNamespace(method="POST", url="https://fake.local/v1/messages"))
+
+
+def _parse_error_rates(spec: str) -> dict[str, float]:
+    rates: dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if ":" in part:
+            kind, rate = part.split(":", 1)
+            rates[kind.strip()] = float(rate)
+    return rates
+
+
+# -------------------------------
+# 합성 응답
+# -------------------------------
+_FAKE_DOT = 'digraph G {{ rankdir=LR; n1 [label="{title}"]; n2 [label="Output"]; n1 -> n2; }}'
+_LAYOUTS = ("dot", "neato", "circo", "twopi")
+
+
+def _last_json_line(prompt: str) -> Any:
+    """프롬프트 마지막 줄의 scene payload(JSON) — viz 분류 프롬프트는 항상 이 형태로 끝난다"""
+    try:
+        return json.loads(prompt.rstrip().rsplit("\n", 1)[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _fake_scenes(n: int = 10) -> list[dict]:
+    return [
+        {
+            "scene_id": i,
+            "title": f"장면 {i}",
+            "narration": f"가짜 내레이션 {i}: 이 장면은 논문의 핵심 아이디어를 설명합니다.",
+            "raw_text": f"Fake source sentence {i}.",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _fake_viz(scene: dict, k: int) -> dict:
+    title = str(scene.get("title", "Scene")).replace('"', "")[:20] or "Scene"
+    return {
+        "scene_id": scene.get("scene_id", k),
+        "title": scene.get("title", ""),
+        "narration": scene.get("narration", ""),
+        "visualizations": [
+            {
+                "viz_type": "diagram",
+                "tool": "graphviz",
+                "layout": _LAYOUTS[k % len(_LAYOUTS)],
+                "diagram": _FAKE_DOT.format(title=title),
+            }
+        ],
+    }
+
+
+def synthesize(system: str, prompt: str, tool_name: str | None) -> Any:
+    """요청 종류(tool 이름 / system prefix)에 맞는 가짜 응답 (tool이면 dict, 아니면 str)"""
+    if tool_name == "submit_scenes":
+        return {"scenes": _fake_scenes()}
+    if tool_name == "submit_visualization":
+        scene = _last_json_line(prompt) or {}
+        return _fake_viz(scene, int(scene.get("scene_id") or 0))
+    if tool_name == "submit_visualizations":
+        scenes = _last_json_line(prompt) or []
+        return {"results": [_fake_viz(s, k) for k, s in enumerate(scenes)]}
+
+    if "Visualization Designer" in system:
+        payload = _last_json_line(prompt)
+        if isinstance(payload, list):
+            return json.dumps([_fake_viz(s, k) for k, s in enumerate(payload)], ensure_ascii=False)
+        payload = payload or {}
+        return json.dumps(_fake_viz(payload, int(payload.get("scene_id") or 0)), ensure_ascii=False)
+    if "요약 노트" in system:
+        return json.dumps({"summary": "가짜 요약", "key_points": ["핵심"], "quotes": []}, ensure_ascii=False)
+    if "failed validation" in prompt:
+        return _FAKE_DOT.format(title="Fixed")
+    return json.dumps(_fake_scenes(), ensure_ascii=False)
+
+
+def _malformed(text: str) -> str:
+    """잘린 / 깨진 JSON 흉내: 뒤쪽을 자르고 따옴표 하나를 날림"""
+    cut = text[: max(1, int(len(text) * 0.7))]
+    return cut.replace('"', "", 1)
+
+
+def _split_chunks(text: str, size: int = 24) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(
+        self,
+        replay_dir: str | None = None,
+        latency_ms: float | None = None,
+        latency_sigma: float | None = None,
+        error_rates: str | None = None,
+        seed: int | None = None,
+    ):
+        replay = settings.LLM_FAKE_REPLAY_DIR if replay_dir is None else replay_dir
+        self.replay_dir = Path(replay) if replay else None
+        self.latency_ms = settings.LLM_FAKE_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_sigma = settings.LLM_FAKE_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.error_rates = _parse_error_rates(settings.LLM_FAKE_ERROR_RATES if error_rates is None else error_rates)
+        self._rng = random.Random(settings.LLM_FAKE_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+    # --- 무작위 요소 (스레드 안전) ---
+    def _draw(self) -> tuple[float, str | None]:
+        with self._lock:
+            latency = self._rng.lognormvariate(0.0, self.latency_sigma) * self.latency_ms / 1000 if self.latency_ms else 0.0
+            roll = self._rng.random()
+        acc = 0.0
+        for kind, rate in self.error_rates.items():
+            acc += rate
+            if roll < acc:
+                return latency, kind
+        return latency, None
+
+    def _replay(self, kwargs: dict, tool_name: str | None) -> Any:
+        if not self.replay_dir:
+            return None
+        key = request_key(kwargs)
+        path = self.replay_dir / (f"{key}.json" if tool_name else f"{key}.txt")
+        if not path.exists():
+            return None
+        text = path.read_text(encoding="utf-8")
+        return json.loads(text) if tool_name else text
+
+    def _respond(self, kwargs: dict) -> tuple[_Message, float, bool]:
+        prompt = kwargs["messages"][-1]["content"]
+        system = "".join(b.get("text", "") for b in kwargs.get("system") or [])
+        tool_name = _tool_name(kwargs)
+
+        latency, error = self._draw()
+        if error in ("429", "529"):
+            time.sleep(min(latency, 0.05))
+            raise _api_error(int(error))
+
+        result = self._replay(kwargs, tool_name)
+        if result is None:
+            result = synthesize(system, prompt, tool_name)
+
+        if tool_name:
+            if error == "malformed":
+                result = {"unexpected": True}
+            block = _Block("tool_use", name=tool_name, input=result)
+            out_text = json.dumps(result, ensure_ascii=False)
+        else:
+            if error == "malformed":
+                result = _malformed(result)
+            block = _Block("text", text=result)
+            out_text = result
+
+        usage = _Usage(input_tokens=(len(system) + len(prompt)) // 3, output_tokens=len(out_text) // 3)
+        return _Message([block], usage), latency, tool_name is not None
+
+    def create(self, **kwargs) -> _Message:
+        timeout = kwargs.pop("timeout", None)
+        message, latency, _ = self._respond(kwargs)
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise _timeout_error()
+        time.sleep(latency)
+        return message
+
+    def stream(self, **kwargs) -> _FakeStream:
+        timeout = kwargs.pop("timeout", None)
+        message, latency, is_tool = self._respond(kwargs)
+        block = message.content[0]
+        text = json.dumps(block.input, ensure_ascii=False) if is_tool else block.text
+        chunks = _split_chunks(text)
+        return _FakeStream(message, chunks, is_tool, delay_per_chunk=latency / len(chunks), timeout=timeout)
+
+
+def _make_backend(name: str):
+    if name == "anthropic":
+        return AnthropicBackend()
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"알 수 없는 LLM 백엔드: {name} (지원: {', '.join(BACKENDS)})")
+
+
+@lru_cache(maxsize=None)
+def get_llm_backend(name: str | None = None):
+    """백엔드 인스턴스는 프로세스당 하나만 만든다."""
+    return _make_backend((name or settings.LLM_BACKEND).lower())
@@ -1,25 +1,353 @@
 # src/services/llm/client.py
 
-from anthropic import Anthropic
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from src.core import deadline, metrics, tracing
 from src.core.config import settings
+from src.services.llm.backends import get_llm_backend, request_key
+
+
+@dataclass
+class UsageTotals:
+    """
+    프로세스 누적 토큰 사용량 (cache_read / cache_write는 prompt caching 분)
+    wasted_*: hedging에서 진 쪽 / 중간에 끊긴 스트림이 쓴 토큰 (input/output 합계에도 포함, 과금되는 양)
+    """
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    hedged_calls: int = 0
+    hedge_wins: int = 0
+    wasted_input_tokens: int = 0
+    wasted_output_tokens: int = 0
+
+
+_usage = UsageTotals()
+_usage_lock = threading.Lock()
+
+
+def _record_usage(usage, model: str = "", wasted: bool = False) -> None:
+    if usage is None:
+        return
+    read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    metrics.record_tokens(model, {
+        "input": usage.input_tokens or 0,
+        "output": usage.output_tokens or 0,
+        "cache_read": read,
+        "cache_write": write,
+        "wasted": (usage.input_tokens or 0) + (usage.output_tokens or 0) if wasted else 0,
+    })
+    with _usage_lock:
+        _usage.calls += 1
+        _usage.input_tokens += usage.input_tokens or 0
+        _usage.output_tokens += usage.output_tokens or 0
+        _usage.cache_read_tokens += read
+        _usage.cache_write_tokens += write
+        if wasted:
+            _usage.wasted_input_tokens += usage.input_tokens or 0
+            _usage.wasted_output_tokens += usage.output_tokens or 0
+    print(
+        f"[ClaudeClient] tokens in={usage.input_tokens} out={usage.output_tokens} "
+        f"cache_read={read} cache_write={write}{' (wasted)' if wasted else ''}"
+    )
+
+
+# -------------------------------
+# 호출 timeout / deadline / hedging
+# -------------------------------
+_LATENCY_WINDOW = 200
+_latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=_LATENCY_WINDOW))
+_latency_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=settings.LLM_HEDGE_POOL_SIZE, thread_name_prefix="llm-hedge")
+_QUEUE_POLL_S = 0.05      # 첫 시도가 풀에서 시작되기를 기다리는 동안 확인 간격
+
+
+class _Cancelled(Exception):
+    """hedging에서 진 시도가 스트림을 끊고 빠져나올 때 (그때까지의 usage를 들고 나감)"""
+
+    def __init__(self, usage):
+        super().__init__("cancelled")
+        self.usage = usage
+
+
+def _record_latency(model: str, seconds: float) -> None:
+    with _latency_lock:
+        _latencies[model].append(seconds)
+
+
+def _hedge_delay(model: str) -> float:
+    """hedge 발사 시점: 모델별 최근 지연시간 p95 (표본이 부족하면 설정값)"""
+    with _latency_lock:
+        samples = sorted(_latencies[model])
+    if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return settings.LLM_HEDGE_DELAY_MS / 1000
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def _call_timeout() -> float:
+    """호출 하나의 timeout = min(LLM_CALL_TIMEOUT_S, 요청 deadline까지 남은 시간)"""
+    deadline.check("LLM 호출 전")
+    left = deadline.remaining()
+    return settings.LLM_CALL_TIMEOUT_S if left is None else min(settings.LLM_CALL_TIMEOUT_S, left)
+
+
+def _timed_out(e: Exception | None = None) -> Exception:
+    left = deadline.remaining()
+    if left is not None and left <= 0.05:
+        return deadline.DeadlineExceeded(f"LLM 호출 중 deadline 초과 ({e or 'timeout'})")
+    return TimeoutError(f"LLM 호출 timeout ({settings.LLM_CALL_TIMEOUT_S}s)")
+
+
+def _attempt(kwargs: dict, timeout: float, cancel: threading.Event, started: list[float]):
+    """hedging용 시도 하나: 스트림으로 받아서 이벤트 사이사이 취소 여부 확인 (취소되면 즉시 연결 종료)"""
+    started.append(time.monotonic())     # 풀에서 실제로 실행되기 시작한 시각
+    with get_llm_backend().stream(**kwargs, timeout=timeout) as stream:
+        for _ in stream:
+            if cancel.is_set():
+                usage = getattr(getattr(stream, "current_message_snapshot", None), "usage", None)
+                stream.close()
+                raise _Cancelled(usage)
+        return stream.get_final_message()
+
+
+def _settle_loser(model: str, future: Future) -> None:
+    """진 시도가 끝나면(취소 완료 or 그 사이 완주) 쓴 토큰을 wasted로 기록"""
+    exc = future.exception()
+    if isinstance(exc, _Cancelled):
+        _record_usage(exc.usage, model, wasted=True)
+    elif exc is None:
+        _record_usage(getattr(future.result(), "usage", None), model, wasted=True)
+
+
+def _hedged_create(kwargs: dict, timeout: float):
+    """
+    첫 시도가 hedge 지연(p95)을 넘기면 같은 요청을 하나 더 보내고 먼저 끝난 쪽을 쓴다.
+    진 쪽은 cancel 이벤트로 스트림을 끊고, 쓴 토큰은 wasted로 집계.
+    """
+    model = kwargs["model"]
+    delay = _hedge_delay(model)
+    start = time.monotonic()
+    attempts: dict[Future, threading.Event] = {}
+
+    def launch(started: list[float]) -> Future:
+        cancel = threading.Event()
+        future = _hedge_pool.submit(_attempt, kwargs, timeout, cancel, started)
+        attempts[future] = cancel
+        return future
+
+    # hedge 지연은 첫 시도가 실제로 시작된 뒤부터 잰다.
+    # 풀이 꽉 차서 줄 서 있는 시간까지 세면, 포화 상태에서 hedge가 더 쏟아져 풀을 더 막는다.
+    first_started: list[float] = []
+    pending = {launch(first_started)}
+    error: BaseException | None = None
+    while pending:
+        now = time.monotonic()
+        if now - start >= timeout:
+            break
+        if len(attempts) == 1 and first_started and now - first_started[0] >= delay:
+            print(f"[ClaudeClient] {now - first_started[0]:.1f}s 무응답 → hedge 요청 발사 (p95≈{delay:.1f}s)")
+            with _usage_lock:
+                _usage.hedged_calls += 1
+            pending.add(launch([]))
+            continue
+        until = start + timeout
+        if len(attempts) == 1:
+            # 시작 전(풀 대기 중)이면 짧게 다시 확인, 시작했으면 hedge 시점까지 대기
+            until = min(until, first_started[0] + delay if first_started else now + _QUEUE_POLL_S)
+        done, pending = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other, cancel in attempts.items():
+                    if other is not future:
+                        cancel.set()
+                        other.add_done_callback(partial(_settle_loser, model))
+                if len(attempts) > 1:
+                    won = future is not next(iter(attempts))
+                    with _usage_lock:
+                        _usage.hedge_wins += won
+                    print(f"[ClaudeClient] hedge 결과: {'hedge' if won else '원 요청'} 승 ({time.monotonic() - start:.1f}s)")
+                return future.result()
+            error = future.exception()
+
+    for future, cancel in attempts.items():
+        if not future.done():
+            cancel.set()
+            future.add_done_callback(partial(_settle_loser, model))
+    if error is not None and not pending:
+        raise error
+    raise _timed_out()
+
+
+def _create(kwargs: dict):
+    """timeout(=deadline 반영)을 걸고 호출. LLM_HEDGE=true면 hedged 호출."""
+    timeout = _call_timeout()
+    start = time.monotonic()
+    with metrics.stage("llm_call", engine=kwargs["model"]) as m:
+        try:
+            if settings.LLM_HEDGE:
+                response = _hedged_create(kwargs, timeout)
+            else:
+                response = get_llm_backend().create(**kwargs, timeout=timeout)
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as e:
+            if type(e).__name__ == "APITimeoutError":
+                raise _timed_out(e) from e
+            raise
+        _record_latency(kwargs["model"], time.monotonic() - start)
+        _record_usage(getattr(response, "usage", None), kwargs["model"])
+        m.outcome = getattr(response, "stop_reason", None) or "ok"
+    return response
+
+
+def _stream_events(kwargs: dict, pick) -> Iterator[str]:
+    """
+    스트리밍 공통: timeout을 걸고, 조각마다 deadline 확인.
+    소비자가 중간에 멈추거나 오류로 끊기면 그때까지의 사용량(snapshot)을 wasted로 기록.
+    """
+    timeout = _call_timeout()
+    # generator는 소비자 context에서 돌기 때문에 current span을 바꾸지 않는 span으로 기록
+    sp = tracing.start_span("llm_stream", model=kwargs["model"])
+    with get_llm_backend().stream(**kwargs, timeout=timeout) as stream:
+        completed = False
+        try:
+            for piece in pick(stream):
+                deadline.check("LLM 스트리밍")
+                yield piece
+            completed = True
+        finally:
+            if not completed:
+                sp.set_attribute("outcome", "abandoned")
+            sp.end()
+            model = kwargs["model"]
+            if completed:
+                _record_usage(getattr(stream.get_final_message(), "usage", None), model)
+            else:
+                snapshot = getattr(stream, "current_message_snapshot", None)
+                _record_usage(getattr(snapshot, "usage", None), model, wasted=True)
+
+
+def _text_pieces(stream):
+    yield from stream.text_stream
+
+
+def _tool_pieces(stream):
+    for event in stream:
+        if event.type == "input_json" and event.partial_json:
+            yield event.partial_json
+
+
+def _save_raw_response(kwargs: dict, text: str) -> None:
+    """
+    LLM_RAW_RESPONSE_DIR가 설정돼 있으면 응답 원문을 요청 해시 이름으로 저장
+    (<hash>.txt = 텍스트 응답, <hash>.json = tool input). fake 백엔드가 같은 키로 재생한다.
+    """
+    if not settings.LLM_RAW_RESPONSE_DIR:
+        return
+    try:
+        out_dir = Path(settings.LLM_RAW_RESPONSE_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        suffix = ".json" if kwargs.get("tools") else ".txt"
+        (out_dir / f"{request_key(kwargs)}{suffix}").write_text(text, encoding="utf-8")
+    except OSError as e:
+        print(f"[ClaudeClient] 응답 저장 실패: {e}")
+
+
+def get_usage_totals() -> UsageTotals:
+    with _usage_lock:
+        return UsageTotals(**vars(_usage))
 
-# Claude API 클라이언트 초기화
-anthropic = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
-def call_claude(prompt: str, model: str = None, max_tokens: int = None) -> str:
+def _request_kwargs(
+    prompt: str, model: str | None, max_tokens: int | None, cached_prefix: str | None, tool: dict | None = None
+) -> dict:
+    kwargs = {
+        "model": model or settings.CLAUDE_DEFAULT_MODEL,
+        "max_tokens": max_tokens or settings.CLAUDE_MAX_TOKENS,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    if cached_prefix:
+        kwargs["system"] = [{"type": "text", "text": cached_prefix, "cache_control": {"type": "ephemeral"}}]
+    if tool:
+        # tool 하나를 강제 호출 → input_schema를 따르는 JSON만 받음
+        kwargs["tools"] = [tool]
+        kwargs["tool_choice"] = {"type": "tool", "name": tool["name"]}
+    return kwargs
+
+
+def call_claude(prompt: str, model: str = None, max_tokens: int = None, cached_prefix: str | None = None) -> str:
     """
     Claude API 호출 함수
-    - prompt: LLM에 전달할 프롬프트 문자열
+    - prompt: LLM에 전달할 프롬프트 문자열 (호출마다 달라지는 부분)
     - model: 사용할 Claude 모델 (None이면 기본값)
     - max_tokens: 최대 출력 토큰 수 (None이면 기본값)
+    - cached_prefix: 호출마다 동일한 고정 지시문. system 블록에 cache_control을 붙여 보내므로
+      바이트 단위로 같아야 캐시가 적중한다. 모델별 최소 길이보다 짧으면 캐시되지 않음 (cache_write=0).
+    """
+    kwargs = _request_kwargs(prompt, model, max_tokens, cached_prefix)
+    try:
+        response = _create(kwargs)
+        text = response.content[0].text
+        _save_raw_response(kwargs, text)
+        return text
+    except Exception as e:
+        print(f"[ClaudeClient] API 호출 실패: {e}")
+        raise
+
+
+def stream_claude(
+    prompt: str, model: str = None, max_tokens: int = None, cached_prefix: str | None = None
+) -> Iterator[str]:
+    """
+    call_claude의 스트리밍 버전: 생성되는 텍스트 조각을 도착 즉시 yield.
+    사용량은 스트림이 끝난 뒤 최종 메시지 기준으로 기록 (중간에 끊기면 그때까지의 snapshot).
+    """
+    try:
+        yield from _stream_events(_request_kwargs(prompt, model, max_tokens, cached_prefix), _text_pieces)
+    except Exception as e:
+        print(f"[ClaudeClient] 스트리밍 호출 실패: {e}")
+        raise
+
+
+def call_claude_tool(
+    prompt: str, tool: dict, model: str = None, max_tokens: int = None, cached_prefix: str | None = None
+) -> dict | None:
     """
+    구조화 출력 호출: tool을 강제로 호출시키고 그 input(dict)을 반환.
+    tool_use 블록이 없으면(출력 잘림 등) None.
+    """
+    kwargs = _request_kwargs(prompt, model, max_tokens, cached_prefix, tool)
     try:
-        response = anthropic.messages.create(
-            model=model or settings.CLAUDE_DEFAULT_MODEL,
-            max_tokens=max_tokens or settings.CLAUDE_MAX_TOKENS,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return response.content[0].text
+        response = _create(kwargs)
     except Exception as e:
         print(f"[ClaudeClient] API 호출 실패: {e}")
         raise
+    for block in response.content:
+        if getattr(block, "type", "") == "tool_use" and block.name == tool["name"]:
+            if not isinstance(block.input, dict):
+                return None
+            _save_raw_response(kwargs, json.dumps(block.input, ensure_ascii=False))
+            return block.input
+    return None
+
+
+def stream_claude_tool(
+    prompt: str, tool: dict, model: str = None, max_tokens: int = None, cached_prefix: str | None = None
+) -> Iterator[str]:
+    """call_claude_tool의 스트리밍 버전: tool input JSON 조각(partial_json)을 도착 즉시 yield"""
+    try:
+        yield from _stream_events(_request_kwargs(prompt, model, max_tokens, cached_prefix, tool), _tool_pieces)
+    except Exception as e:
+        print(f"[ClaudeClient] 스트리밍 호출 실패: {e}")
+        raise
@@ -0,0 +1,183 @@
+# src/services/llm/json_repair.py
+"""
+LLM 출력용 선형 시간 JSON 복구기
+- 입력을 왼쪽에서 오른쪽으로 한 번만 훑으면서 바로 출력 (부분 문자열 재조립 없음)
+- 문자열 안: 잘못된 escape(\\X) 처리, 날것의 제어문자(줄바꿈 등) escape
+- alias 키("diagram", "graphviz", "dot", ...) 값 위치에 따옴표 없이/깨진 따옴표로 박힌 DOT 블록을
+  중괄호 균형으로 잘라 JSON 문자열로 인코딩 (이미 올바른 JSON 문자열이면 그대로 둠)
+- "tool" 값에 DOT가 들어 있으면 "tool": "graphviz", "diagram": <DOT> 로 분리
+- "excalidraw" → "graphviz", "stable-diffusion" → "stability" 값 치환
+기존 viz_classifier._repair_raw_json(정규식 + alias별 반복 find, 적중마다 문자열 재조립)을 대체한다.
+"""
+
+import json
+import re
+
+DOT_KEYS = frozenset({"diagram", "graphviz", "graph", "graphviz_code", "dot", "scene_graph"})
+_VALUE_ALIASES = {"excalidraw": "graphviz", "stable-diffusion": "stability"}
+
+_FENCE_HEAD_RE = re.compile(r"^\s*```(?:json)?\s*", re.IGNORECASE)
+_FENCE_TAIL_RE = re.compile(r"\s*```\s*$")
+_DOT_START_RE = re.compile(r"\s*(?:strict\s+)?(?:di)?graph\b[^{]*\{", re.IGNORECASE)
+# "diagram": ", "diagram": "digraph ..." 처럼 키가 중복으로 열린 경우
+_DUP_DIAGRAM_RE = re.compile(r'",\s*"diagram"\s*:\s*')
+_WS_RE = re.compile(r"\s*")
+# 메인 루프가 멈출 곳: 따옴표, 콜론, 그 밖의 공백 아닌 문자열
+_MAIN_TOKEN_RE = re.compile(r'"|:|[^\s":]+')
+# 문자열 안에서 멈출 곳: 닫는 따옴표, 백슬래시, 제어문자
+_STRING_STOP_RE = re.compile(r'["\\\x00-\x1f]')
+_JSON_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+# DOT 블록 안: 따옴표 문자열은 통째로 건너뛰고 중괄호만 센다
+_DOT_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]', re.DOTALL)
+
+_VALID_ESCAPES = frozenset('"\\/bfnrt')
+_HEX = frozenset("0123456789abcdefABCDEF")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+class _Repairer:
+    def __init__(self, text: str, keep_invalid_escapes: bool):
+        self.s = text
+        self.n = len(text)
+        self.out: list[str] = []
+        self.keep_invalid_escapes = keep_invalid_escapes
+
+    # --- 문자열 ---
+    def scan_string(self, i: int) -> tuple[str, int]:
+        """i = 여는 따옴표 위치. (정상화된 내용, 닫는 따옴표 다음 위치). 닫히지 않으면 끝까지."""
+        s, n = self.s, self.n
+        buf: list[str] = []
+        j = i + 1
+        seg = j
+        find = _STRING_STOP_RE.search
+        while j < n:
+            m = find(s, j)
+            if not m:
+                break
+            j = m.start()
+            ch = s[j]
+            if ch == '"':
+                buf.append(s[seg:j])
+                return "".join(buf), j + 1
+            if ch == "\\":
+                buf.append(s[seg:j])
+                nxt = s[j + 1] if j + 1 < n else ""
+                if nxt and nxt in _VALID_ESCAPES:
+                    buf.append(s[j : j + 2])
+                    j += 2
+                elif nxt == "u" and j + 6 <= n and all(c in _HEX for c in s[j + 2 : j + 6]):
+                    buf.append(s[j : j + 6])
+                    j += 6
+                else:
+                    # 잘못된 escape: 백슬래시를 버리거나(기본) 글자 그대로 보존(\\\\)
+                    buf.append("\\\\" if self.keep_invalid_escapes else "")
+                    j += 1
+                seg = j
+                continue
+            # 제어문자
+            buf.append(s[seg:j])
+            buf.append(_CONTROL_ESCAPES.get(ch) or f"\\u{ord(ch):04x}")
+            j += 1
+            seg = j
+        buf.append(s[seg:n])
+        return "".join(buf), n
+
+    def is_wellformed_string(self, i: int) -> bool:
+        """i의 JSON 문자열이 escape 규칙대로 닫히고 뒤에 , } ] 가 오는지 (DOT 안의 날것 따옴표 검출용)"""
+        m = _JSON_STRING_RE.match(self.s, i)
+        if not m:
+            return False
+        k = _WS_RE.match(self.s, m.end()).end()
+        return k >= self.n or self.s[k] in ",}]"
+
+    # --- DOT 블록 ---
+    def scan_dot_block(self, start: int) -> int:
+        """start = DOT 시작. 균형 맞는 닫는 '}' 다음 위치 (DOT 안의 따옴표 문자열은 건너뜀). 못 찾으면 -1."""
+        depth = 0
+        for m in _DOT_TOKEN_RE.finditer(self.s, start):
+            ch = m.group()
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return m.end()
+        return -1
+
+    def try_dot_value(self, i: int) -> tuple[str, int] | None:
+        """값 위치 i에 DOT가 있으면 (DOT 원문, 값 끝 위치)"""
+        s = self.s
+        quoted = i < self.n and s[i] == '"'
+        if quoted and self.is_wellformed_string(i):
+            return None
+        start = i + 1 if quoted else i
+        m = _DOT_START_RE.match(s, start)
+        if not m:
+            return None
+        dot_start = _WS_RE.match(s, start).end()
+        end = self.scan_dot_block(dot_start)
+        if end < 0:
+            return None
+        block = s[dot_start:end]
+        if quoted:
+            k = _WS_RE.match(s, end).end()
+            if k < self.n and s[k] == '"':
+                end = k + 1
+        return block, end
+
+    # --- 메인 루프 ---
+    def run(self) -> str:
+        s, n, out = self.s, self.n, self.out
+        i = 0
+        seg = 0
+        last_key = None      # 직전에 닫힌 문자열 (':' 가 오면 키)
+        find = _MAIN_TOKEN_RE.search
+        while i < n:
+            m = find(s, i)
+            if not m:
+                break
+            i = m.start()
+            ch = s[i]
+            if ch == '"':
+                out.append(s[seg:i])
+                content, i = self.scan_string(i)
+                out.append('"' + _VALUE_ALIASES.get(content, content) + '"')
+                last_key = content
+                seg = i
+                continue
+            if ch == ":" and last_key is not None:
+                key, last_key = last_key, None
+                i += 1
+                if key in DOT_KEYS or key == "tool":
+                    v = _WS_RE.match(s, i).end()
+                    dup = _DUP_DIAGRAM_RE.match(s, v) if key == "diagram" else None
+                    if dup:
+                        out.append(s[seg:i] + " ")
+                        i = seg = v = dup.end()
+                    hit = self.try_dot_value(v)
+                    if hit is not None:
+                        block, end = hit
+                        out.append(s[seg:i])
+                        encoded = json.dumps(block, ensure_ascii=False)
+                        out.append(f' "graphviz", "diagram": {encoded}' if key == "tool" else f" {encoded}")
+                        i = seg = end
+                continue
+            # 그 밖의 토큰(구조 문자, 숫자 등) → 직전 문자열은 키가 아님
+            last_key = None
+            i = m.end()
+        out.append(s[seg:n])
+        return "".join(out)
+
+
+def strip_fences(s: str) -> str:
+    return _FENCE_TAIL_RE.sub("", _FENCE_HEAD_RE.sub("", s.strip(), count=1), count=1).strip()
+
+
+def repair_json(s: str, *, keep_invalid_escapes: bool = False) -> str:
+    """
+    LLM 응답 → json.loads 가능한 문자열 (최선). 코드펜스 제거 후 한 번 훑기.
+    keep_invalid_escapes=True면 \\alpha 같은 잘못된 escape의 백슬래시를 보존 (LaTeX가 섞인 본문용).
+    """
+    if not s:
+        return ""
+    return _Repairer(strip_fences(s), keep_invalid_escapes).run()
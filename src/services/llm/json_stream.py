@@ -0,0 +1,95 @@
+# src/services/llm/json_stream.py
+"""
+스트리밍 응답용 점진적 JSON 배열 파서
+- LLM 토큰 스트림을 조각 단위로 feed → 최상위 배열의 원소 객체가 닫히는 즉시 반환
+- 문자열/이스케이프 상태를 조각 경계를 넘어 유지하므로 각 문자는 한 번만 본다 (선형 시간)
+- 배열 앞의 잡담·코드펜스는 무시, 원소 파싱 실패 시 on_error 콜백으로 원문 전달 후 계속 진행
+"""
+
+import json
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+
+class JsonArrayStream:
+    def __init__(self, loads: Callable[[str], Any] = json.loads, on_error: Callable[[str, Exception], None] | None = None):
+        self._loads = loads
+        self._on_error = on_error
+        self._started = False     # 최상위 '[' 를 만났는지
+        self._done = False        # 최상위 ']' 로 닫혔는지
+        self._depth = 0           # 원소 객체 안의 중괄호/대괄호 깊이
+        self._in_str = False
+        self._esc = False
+        self._buf: list[str] = [] # 현재 원소 객체의 문자 조각
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> list[Any]:
+        """조각 하나를 소비하고, 이번 조각에서 완성된 원소들을 반환"""
+        out: list[Any] = []
+        if self._done or not chunk:
+            return out
+
+        i, n = 0, len(chunk)
+        if not self._started:
+            i = chunk.find("[")
+            if i < 0:
+                return out
+            self._started = True
+            i += 1
+
+        seg_start = i if self._depth else -1
+        while i < n:
+            ch = chunk[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    seg_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    if ch == "]":
+                        self._done = True
+                        break
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._buf.append(chunk[seg_start : i + 1])
+                        self._emit("".join(self._buf), out)
+                        self._buf.clear()
+                        seg_start = -1
+            i += 1
+
+        if self._depth and seg_start >= 0:
+            self._buf.append(chunk[seg_start:i])
+        return out
+
+    def _emit(self, text: str, out: list[Any]) -> None:
+        try:
+            out.append(self._loads(text))
+        except Exception as e:
+            if self._on_error:
+                self._on_error(text, e)
+
+
+def iter_json_array(chunks: Iterable[str], **kwargs) -> Iterator[Any]:
+    """텍스트 조각 iterator → 배열 원소 iterator"""
+    parser = JsonArrayStream(**kwargs)
+    it = iter(chunks)
+    for chunk in it:
+        yield from parser.feed(chunk)
+        if parser.done:
+            # 배열 뒤 꼬리(닫는 괄호 등)까지 읽어 스트림을 정상 종료 → 최종 usage가 기록됨
+            for _ in it:
+                pass
+            break
@@ -0,0 +1,162 @@
+# src/services/llm/prompt_budget.py
+"""
+토큰 예산 기반 프롬프트 조립
+- count_tokens : 로컬 근사 토크나이저 (영문 단어 ≈ 4자/토큰, 숫자 ≈ 3자리/토큰, 한글·기호 1자/토큰)
+  한국어는 글자 수로 자르면 토큰이 넘치고 영어는 남는 문제를 토큰 단위 예산으로 해결
+- truncate_to_tokens : 토큰 예산 안에서 앞부분만 남김 (한 번 훑기)
+- pack_relevant : 문장별 TF-IDF 점수(질의 = scene title)로 관련 문장을 골라 예산 안에 채움 (원문 순서 유지)
+- allocate_budget / build_sections : 전체 입력 예산을 섹션별로 나누고, 덜 쓰는 섹션의 남는 몫은 다른 섹션에 재분배
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+# 토큰 근사용 조각: 영문 단어 | 숫자열 | 공백 | 그 밖의 한 글자
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|\s+|.", re.DOTALL)
+_SENTENCE_RE = re.compile(r"[^\n.!?。]+[.!?。]*")
+_LATIN_TERM_RE = re.compile(r"[A-Za-z][A-Za-z0-9]+")
+_HANGUL_RUN_RE = re.compile(r"[가-힣]+")
+
+
+def _piece_cost(piece: str) -> int:
+    c = piece[0]
+    if c.isspace():
+        return 0
+    if c.isascii() and c.isalpha():
+        return (len(piece) + 3) // 4
+    if c.isdigit():
+        return (len(piece) + 2) // 3
+    return 1
+
+
+def count_tokens(text: str) -> int:
+    """입력 토큰 수 근사 (API 호출 없이). 실제보다 약간 많게 세는 쪽으로 맞춤."""
+    if not text:
+        return 0
+    return sum(_piece_cost(p) for p in _PIECE_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """앞에서부터 max_tokens까지 자름 (조각 경계 기준)"""
+    if not text or max_tokens <= 0:
+        return ""
+    used = 0
+    for m in _PIECE_RE.finditer(text):
+        used += _piece_cost(m.group())
+        if used > max_tokens:
+            return text[: m.start()].rstrip()
+    return text
+
+
+# -------------------------------
+# 관련 문장 선택 (TF-IDF)
+# -------------------------------
+def _terms(text: str) -> list[str]:
+    """영문은 소문자 단어, 한글은 음절 bigram (조사가 붙어도 매칭되도록)"""
+    terms = [w.lower() for w in _LATIN_TERM_RE.findall(text)]
+    for run in _HANGUL_RUN_RE.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.findall(text) if s.strip()]
+
+
+def pack_relevant(text: str, query: str, max_tokens: int) -> str:
+    """
+    text 중 query와 관련 높은 문장을 골라 max_tokens 안에 채운다.
+    - 전체가 예산 안이면 그대로 반환
+    - 질의어가 본문에 전혀 없으면 앞부분 자르기로 대체
+    - 선택된 문장은 원문 순서대로 이어 붙임
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+
+    sentences = _split_sentences(text)
+    query_terms = set(_terms(query))
+    if not sentences or not query_terms:
+        return truncate_to_tokens(text, max_tokens)
+
+    sent_terms = [Counter(_terms(s)) for s in sentences]
+    n = len(sentences)
+    df = Counter(t for tf in sent_terms for t in query_terms if t in tf)
+    if not df:
+        return truncate_to_tokens(text, max_tokens)
+    idf = {t: math.log((n + 1) / (df[t] + 1)) + 1.0 for t in df}
+
+    scored = []
+    for i, tf in enumerate(sent_terms):
+        length = sum(tf.values()) or 1
+        score = sum(tf[t] * w for t, w in idf.items()) / math.sqrt(length)
+        scored.append((-score, i))
+    scored.sort()
+
+    chosen: list[int] = []
+    used = 0
+    for _, i in scored:
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return truncate_to_tokens(text, max_tokens)
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+# -------------------------------
+# 섹션별 예산 배분
+# -------------------------------
+@dataclass(frozen=True)
+class Section:
+    name: str
+    text: str
+    weight: float = 1.0
+    query: str = ""     # 지정하면 관련 문장 선택, 없으면 앞부분 자르기
+
+
+def allocate_budget(total: int, demands: dict[str, int], weights: dict[str, float]) -> dict[str, int]:
+    """
+    가중치 비율로 total을 나누되, 필요량(demand)보다 적게 쓰는 섹션의 남는 몫은
+    아직 모자란 섹션들에 다시 가중치 비율로 나눠준다 (water-filling).
+    """
+    alloc = {name: 0 for name in demands}
+    open_names = [n for n in demands if demands[n] > 0]
+    remaining = total
+    while open_names and remaining > 0:
+        weight_sum = sum(weights.get(n, 1.0) for n in open_names) or 1.0
+        share = {n: int(remaining * weights.get(n, 1.0) / weight_sum) for n in open_names}
+        satisfied = [n for n in open_names if demands[n] - alloc[n] <= share[n]]
+        if not satisfied:
+            for n in open_names:
+                alloc[n] += share[n]
+            break
+        for n in satisfied:
+            remaining -= demands[n] - alloc[n]
+            alloc[n] = demands[n]
+        open_names = [n for n in open_names if n not in satisfied]
+    return alloc
+
+
+def build_sections(total_tokens: int, sections: list[Section]) -> dict[str, str]:
+    """섹션들을 total_tokens 안에 맞춰 잘라/골라 {name: text}로 반환"""
+    demands = {s.name: count_tokens(s.text) for s in sections}
+    weights = {s.name: s.weight for s in sections}
+    alloc = allocate_budget(total_tokens, demands, weights)
+
+    fitted: dict[str, str] = {}
+    for s in sections:
+        budget = alloc[s.name]
+        if demands[s.name] <= budget:
+            fitted[s.name] = s.text
+        elif s.query:
+            fitted[s.name] = pack_relevant(s.text, s.query, budget)
+        else:
+            fitted[s.name] = truncate_to_tokens(s.text, budget)
+    return fitted
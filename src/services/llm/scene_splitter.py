@@ -2,17 +2,23 @@
 
 import re
 import json
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from src.services.llm.client import call_claude
+from pydantic import ValidationError
+
+from src.core import deadline
+from src.services.llm.client import call_claude, call_claude_tool, stream_claude, stream_claude_tool
+from src.services.llm.json_repair import repair_json
+from src.services.llm.json_stream import iter_json_array
+from src.services.llm.prompt_budget import count_tokens, truncate_to_tokens
+from src.services.llm.schemas import SCENE_TOOL, Scene, SceneList
 from src.core.config import settings
 
-# --- 추가: 입력 길이 제한 ---
-_MAX_TEXT_CHARS = 3000
-def _truncate(s: str, max_len: int = _MAX_TEXT_CHARS) -> str:
-    if not s:
-        return ""
-    return s if len(s) <= max_len else s[:max_len]
+# 입력 토큰 예산(settings.SCENE_SPLIT_INPUT_TOKENS)보다 긴 본문은 map-reduce로 분할
+# chunk 길이 / map 응답 토큰 / 동시 map 호출 수는 settings.SCENE_* 로 조정
+_RAW_TEXT_FALLBACK_CHARS = 500
 
 
 SCENE_SPLIT_PROMPT = """
@@ -50,14 +56,44 @@ SCENE_SPLIT_PROMPT = """
 6. 반드시 JSON 배열만 출력하고, 다른 문장/코멘트/코드펜스는 절대 포함하지 말 것.
 """
 
+CHUNK_SUMMARY_PROMPT = """
+당신은 AI 연구 논문을 읽고 스토리북 장면 구성을 위한 요약 노트를 만드는 조수입니다.
+아래는 논문 본문의 일부(chunk)입니다. 이 부분의 핵심 내용을 정리하세요.
+
+⚠️ 출력 규칙:
+- 반드시 JSON 객체 하나만 출력. 설명, 코드펜스(```) 금지.
+- 형식:
+  {
+    "summary": "이 부분의 핵심 내용 (한국어 3~5문장)",
+    "key_points": ["핵심 포인트", "..."],
+    "quotes": ["원문에서 그대로 복사한 핵심 문장", "..."]
+  }
+- quotes는 반드시 원문 문장을 한 글자도 바꾸지 말고 그대로 복사 (2~4개).
+- 참고문헌, 저자 정보, 저작권 문구는 무시.
+"""
+
+SCENE_REDUCE_PROMPT = """
+아래는 논문 전체를 chunk 단위로 요약한 노트입니다. 각 chunk에는 id(c1, c2, ...)가 있습니다.
+논문 전체 흐름이 드러나도록 장면을 구성하고, 각 장면 객체에 아래 두 필드를 추가하세요.
+- "source_chunks": 해당 장면의 근거가 된 chunk id 배열 (예: ["c2", "c3"])
+- "raw_text": 해당 chunk의 quotes 중 하나를 그대로 복사
+"""
+
+
 def _sanitize_scene(scene: dict) -> dict[str, str | int]:
-    return {
+    out = {
         "scene_id": int(scene.get("scene_id", 0)) if str(scene.get("scene_id", "")).isdigit() else 0,
         "title": str(scene.get("title", "") or "").strip(),
         "narration": str(scene.get("narration", "") or "").strip(),
-        # 역슬래시 안전 처리
-        "raw_text": str(scene.get("raw_text", "") or "").replace("\\", "\\\\").strip(),
+        # 원문 그대로 (raw_span이 가리키는 본문과 일치해야 함. JSON escape는 직렬화할 때 json.dumps가 처리)
+        "raw_text": str(scene.get("raw_text", "") or "").strip(),
     }
+    # map-reduce 결과: 원문 위치 포인터 유지
+    if isinstance(scene.get("source_chunks"), list):
+        out["source_chunks"] = [str(c) for c in scene["source_chunks"]]
+    if isinstance(scene.get("raw_span"), list) and len(scene["raw_span"]) == 2:
+        out["raw_span"] = [int(scene["raw_span"][0]), int(scene["raw_span"][1])]
+    return out
 
 def _extract_json_array(text: str) -> str | None:
     match = re.search(r"\[[\s\S]*\]", text)
@@ -68,44 +104,256 @@ def _extract_json_array(text: str) -> str | None:
 def _safe_json_loads(s: str):
     try:
         return json.loads(s)
-    except json.JSONDecodeError as e:
-        # 1차 실패 → 백슬래시 이스케이프 처리
-        fixed = re.sub(r'\\(?!["\\/bfnrtu])', r'\\\\', s)
-        return json.loads(fixed)
+    except json.JSONDecodeError:
+        # 1차 실패 → 한 번 훑기 복구 (LaTeX 백슬래시는 보존)
+        return json.loads(repair_json(s, keep_invalid_escapes=True))
 
 
-def split_into_scenes_with_narration(full_text: str) -> list[dict[str, str | int]]:
-    safe_text = _truncate(full_text)
+def _parse_response(resp: str):
+    try:
+        return _safe_json_loads(resp)
+    except Exception:
+        json_str = _extract_json_array(resp)
+        if json_str:
+            return _safe_json_loads(json_str)
+        return None
+
+
+_RETRY_WARNING = "⚠️ 장면이 10개 미만이면 규칙 위반입니다. 반드시 10~12개 장면을 생성하세요."
 
-    def _call_splitter(text: str, extra_prompt: str = "") -> str:
-        prompt = f"{SCENE_SPLIT_PROMPT}{extra_prompt}\n\n논문 본문:\n{text}"
-        return call_claude(
-            prompt,
-            model=settings.CLAUDE_DEFAULT_MODEL,
-            max_tokens=settings.CLAUDE_MAX_TOKENS,
-        )
 
-    response = _call_splitter(safe_text)
+def _splitter_prompt(body: str, extra_prompt: str = "") -> str:
+    # SCENE_SPLIT_PROMPT는 고정 → 캐시 prefix, 재시도 경고와 본문만 매번 전송
+    return f"{extra_prompt}\n\n{body}" if extra_prompt else body
 
-    def _parse_response(resp: str):
-        try:
-            return _safe_json_loads(resp)
-        except Exception:
-            json_str = _extract_json_array(resp)
-            if json_str:
-                return _safe_json_loads(json_str)
-            return None
 
+def _call_splitter(body: str, extra_prompt: str = "") -> str:
+    return call_claude(
+        _splitter_prompt(body, extra_prompt),
+        model=settings.CLAUDE_DEFAULT_MODEL,
+        max_tokens=settings.CLAUDE_MAX_TOKENS,
+        cached_prefix=SCENE_SPLIT_PROMPT,
+    )
+
+
+def _scene_from_json(text: str) -> dict:
+    """스트리밍 원소 하나 → 검증된 scene dict (모델이 채운 필드만)"""
+    return Scene.model_validate_json(text).model_dump(exclude_unset=True)
+
+
+def _request_scenes_structured(body: str, extra_prompt: str = "") -> list[dict] | None:
+    """submit_scenes tool 강제 호출 + SceneList 검증. 검증 실패·tool 미호출이면 None."""
+    data = call_claude_tool(
+        _splitter_prompt(body, extra_prompt),
+        SCENE_TOOL,
+        model=settings.CLAUDE_DEFAULT_MODEL,
+        max_tokens=settings.CLAUDE_MAX_TOKENS,
+        cached_prefix=SCENE_SPLIT_PROMPT,
+    )
+    if data is None:
+        return None
+    try:
+        return [s.model_dump(exclude_unset=True) for s in SceneList.model_validate(data).scenes]
+    except ValidationError as e:
+        print(f"[SceneSplitter] 장면 스키마 검증 실패: {e.error_count()}건")
+        return None
+
+
+def _request_scenes(body: str) -> tuple[list | None, str]:
+    """
+    SCENE_SPLIT_PROMPT + body로 장면 배열 요청.
+    - 구조화 출력(tool use) 우선, 실패하면 텍스트 응답 + 정규식 복구 경로
+    - 장면이 2개 이하이면 규칙 위반 경고를 붙여 한 번 재시도
+    반환: (장면 리스트 또는 None, 첫 응답 원문)
+    """
+    if settings.LLM_STRUCTURED_OUTPUT:
+        scenes = _request_scenes_structured(body)
+        if scenes is not None and len(scenes) <= 2:
+            scenes = _request_scenes_structured(body, extra_prompt=_RETRY_WARNING) or scenes
+        if scenes:
+            return scenes, json.dumps(scenes, ensure_ascii=False)
+        print("[SceneSplitter] 구조화 출력 실패 → 텍스트 응답 경로로 대체")
+
+    response = _call_splitter(body)
     scenes = _parse_response(response)
 
     # --- Retry 로직: scene이 2개 이하일 경우 ---
     if not isinstance(scenes, list) or len(scenes) <= 2:
-        retry_resp = _call_splitter(
-            safe_text,
-            extra_prompt="\n⚠️ 장면이 10개 미만이면 규칙 위반입니다. 반드시 10~12개 장면을 생성하세요."
-        )
+        retry_resp = _call_splitter(body, extra_prompt=_RETRY_WARNING)
         scenes = _parse_response(retry_resp) or scenes
 
+    return (scenes if isinstance(scenes, list) else None), response
+
+
+# =====================
+# map-reduce: 섹션 단위 chunking
+# =====================
+_SECTION_RE = re.compile(r"\\section\*?\{([^}]*)\}")
+_PARA_BREAK_RE = re.compile(r"\n\s*\n")
+
+
+def _split_sections(text: str) -> list[tuple[str, int, int]]:
+    """\\section 경계로 (제목, 시작, 끝) 목록. 섹션 앞부분(abstract/intro)은 "front"."""
+    marks = [(m.group(1).strip(), m.start()) for m in _SECTION_RE.finditer(text)]
+    if not marks or marks[0][1] > 0:
+        marks.insert(0, ("front", 0))
+    bounds = [pos for _, pos in marks[1:]] + [len(text)]
+    return [(title, start, end) for (title, start), end in zip(marks, bounds) if text[start:end].strip()]
+
+
+def _split_long_span(text: str, start: int, end: int, max_chars: int) -> list[tuple[int, int]]:
+    """max_chars보다 긴 구간은 문단 경계에서 자른다 (문단 하나가 너무 길면 강제로 자름)"""
+    if end - start <= max_chars:
+        return [(start, end)]
+    cuts = [m.end() for m in _PARA_BREAK_RE.finditer(text, start, end)] + [end]
+    spans: list[tuple[int, int]] = []
+    cur = last_ok = start
+    for cut in cuts:
+        while cut - cur > max_chars:
+            if last_ok > cur:
+                spans.append((cur, last_ok))
+                cur = last_ok
+            else:
+                spans.append((cur, cur + max_chars))
+                cur += max_chars
+        last_ok = cut
+    if end > cur:
+        spans.append((cur, end))
+    return spans
+
+
+def chunk_by_sections(text: str, max_chars: int | None = None) -> list[dict]:
+    """
+    texprep 출력 → 섹션 경계를 존중하는 chunk 목록
+    - 인접한 짧은 섹션은 max_chars까지 묶음
+    - 반환: [{"chunk_id": "c1", "sections": [...], "start": int, "end": int}, ...]
+    """
+    max_chars = max_chars or settings.SCENE_CHUNK_MAX_CHARS
+    chunks: list[dict] = []
+    cur: dict | None = None
+    for title, start, end in _split_sections(text):
+        for s_start, s_end in _split_long_span(text, start, end, max_chars):
+            if cur is not None and s_end - cur["start"] <= max_chars:
+                cur["end"] = s_end
+                if title not in cur["sections"]:
+                    cur["sections"].append(title)
+                continue
+            cur = {"chunk_id": f"c{len(chunks) + 1}", "sections": [title], "start": s_start, "end": s_end}
+            chunks.append(cur)
+    return chunks
+
+
+def _summarize_chunk(text: str, chunk: dict) -> dict | None:
+    body = text[chunk["start"] : chunk["end"]]
+    prompt = (
+        f"chunk id: {chunk['chunk_id']} (sections: {', '.join(chunk['sections'])})\n\n"
+        f"본문:\n{body}"
+    )
+    try:
+        resp = call_claude(
+            prompt,
+            model=settings.CLAUDE_DEFAULT_MODEL,
+            max_tokens=settings.SCENE_MAP_MAX_TOKENS,
+            cached_prefix=CHUNK_SUMMARY_PROMPT,
+        )
+        obj = _safe_json_loads(resp)
+    except deadline.DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"[SceneSplitter] chunk {chunk['chunk_id']} 요약 실패: {e}")
+        return None
+    if not isinstance(obj, dict):
+        return None
+    return {
+        "chunk_id": chunk["chunk_id"],
+        "sections": chunk["sections"],
+        "summary": str(obj.get("summary", "")).strip(),
+        "key_points": [str(p) for p in obj.get("key_points", []) if p][:6],
+        "quotes": [str(q) for q in obj.get("quotes", []) if q][:4],
+    }
+
+
+def _resolve_raw_text(scene: dict, text: str, chunk_map: dict[str, dict]) -> dict:
+    """
+    reduce 결과의 raw_text / source_chunks → 원문 위치(raw_span)로 연결.
+    quote를 원문에서 못 찾으면 첫 근거 chunk의 앞부분을 사용.
+    """
+    chunk_ids = [c for c in scene.get("source_chunks", []) if c in chunk_map] if isinstance(scene.get("source_chunks"), list) else []
+    quote = str(scene.get("raw_text", "") or "").strip()
+
+    pos = -1
+    if quote:
+        # 근거 chunk 안에서 먼저 찾고, 없으면 전체에서
+        for cid in chunk_ids:
+            c = chunk_map[cid]
+            pos = text.find(quote, c["start"], c["end"])
+            if pos != -1:
+                break
+        if pos == -1:
+            pos = text.find(quote)
+
+    if pos != -1:
+        scene["raw_span"] = [pos, pos + len(quote)]
+        scene["raw_text"] = quote
+    elif chunk_ids:
+        c = chunk_map[chunk_ids[0]]
+        start, end = c["start"], min(c["end"], c["start"] + _RAW_TEXT_FALLBACK_CHARS)
+        # 앞뒤 공백을 span에서도 빼서 raw_text == text[start:end]가 되게
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        scene["raw_span"] = [start, end]
+        scene["raw_text"] = text[start:end]
+    scene["source_chunks"] = chunk_ids
+    return scene
+
+
+def _map_chunks(full_text: str, max_chunk_chars: int) -> tuple[list[dict], list[dict]]:
+    """map 단계: chunk별 요약을 동시에 요청. 반환: (chunks, 성공한 요약 노트들)"""
+    chunks = chunk_by_sections(full_text, max_chunk_chars)
+    with ThreadPoolExecutor(max_workers=min(settings.SCENE_MAP_CONCURRENCY, len(chunks)) or 1) as pool:
+        # 스레드에도 요청 deadline이 전달되도록 context를 복사해서 실행
+        futures = [deadline.submit(pool, _summarize_chunk, full_text, c) for c in chunks]
+        notes = [n for n in (f.result() for f in futures) if n]
+    return chunks, notes
+
+
+def _reduce_body(notes: list[dict]) -> str:
+    notes_json = json.dumps(notes, ensure_ascii=False, indent=1)
+    return f"{SCENE_REDUCE_PROMPT}\n\n논문 요약 노트:\n{notes_json}"
+
+
+def split_into_scenes_mapreduce(full_text: str, max_chunk_chars: int | None = None) -> list[dict] | None:
+    """
+    전체 논문 → (map) chunk별 요약을 동시에 요청 → (reduce) 요약 노트로 10~12개 장면 생성.
+    map이 전부 실패하면 None.
+    """
+    chunks, notes = _map_chunks(full_text, max_chunk_chars)
+    if not notes:
+        return None
+
+    scenes, _ = _request_scenes(_reduce_body(notes))
+    if scenes is None:
+        return None
+
+    chunk_map = {c["chunk_id"]: c for c in chunks}
+    return [_resolve_raw_text(s, full_text, chunk_map) for s in scenes if isinstance(s, dict)]
+
+
+def split_into_scenes_with_narration(full_text: str) -> list[dict[str, str | int]]:
+    """
+    - 짧은 본문: 한 번의 호출로 장면 분할
+    - 긴 본문(settings.SCENE_SPLIT_INPUT_TOKENS 초과): 섹션 단위 map-reduce
+    """
+    if count_tokens(full_text or "") > settings.SCENE_SPLIT_INPUT_TOKENS:
+        scenes = split_into_scenes_mapreduce(full_text)
+        if scenes:
+            return [_sanitize_scene(s) for s in scenes]
+
+    safe_text = truncate_to_tokens(full_text or "", settings.SCENE_SPLIT_INPUT_TOKENS)
+    scenes, response = _request_scenes(f"논문 본문:\n{safe_text}")
+
     if not isinstance(scenes, list):
         return [{
             "scene_id": 0,
@@ -115,3 +363,69 @@ def split_into_scenes_with_narration(full_text: str) -> list[dict[str, str | int
         }]
 
     return [_sanitize_scene(s) for s in scenes]
+
+
+# =====================
+# 스트리밍: 장면이 완성되는 즉시 yield
+# =====================
+
+def stream_scenes_with_narration(full_text: str) -> Iterator[dict[str, str | int]]:
+    """
+    split_into_scenes_with_narration의 스트리밍 버전.
+    응답 토큰 스트림에서 JSON 배열 원소(장면)가 닫히는 즉시 yield → 후속 단계(viz 분류, 렌더)가
+    마지막 장면 생성을 기다리지 않고 겹쳐서 진행된다.
+    - 긴 본문은 map 단계까지 끝낸 뒤 reduce 호출만 스트리밍
+    - 구조화 출력이 켜져 있으면 tool input JSON 스트림을 파싱 (원소마다 Scene 검증)
+    - 장면이 2개 이하면 경고를 붙인 일반 호출로 한 번 더 요청해 아직 안 나온 scene_id만 이어서 yield
+    """
+    chunk_map: dict[str, dict] | None = None
+    body = None
+    if count_tokens(full_text or "") > settings.SCENE_SPLIT_INPUT_TOKENS:
+        chunks, notes = _map_chunks(full_text, settings.SCENE_CHUNK_MAX_CHARS)
+        if notes:
+            body = _reduce_body(notes)
+            chunk_map = {c["chunk_id"]: c for c in chunks}
+    if body is None:
+        body = f"논문 본문:\n{truncate_to_tokens(full_text or '', settings.SCENE_SPLIT_INPUT_TOKENS)}"
+
+    def _finish(scene: dict) -> dict:
+        if chunk_map is not None:
+            scene = _resolve_raw_text(scene, full_text, chunk_map)
+        return _sanitize_scene(scene)
+
+    seen: set = set()
+    call_kwargs = dict(
+        model=settings.CLAUDE_DEFAULT_MODEL,
+        max_tokens=settings.CLAUDE_MAX_TOKENS,
+        cached_prefix=SCENE_SPLIT_PROMPT,
+    )
+    if settings.LLM_STRUCTURED_OUTPUT:
+        # tool input {"scenes": [...]}의 partial JSON 조각 → scenes 배열 원소를 Scene 모델로 검증
+        stream = stream_claude_tool(body, SCENE_TOOL, **call_kwargs)
+        loads = _scene_from_json
+    else:
+        stream = stream_claude(body, **call_kwargs)
+        loads = _safe_json_loads
+    for scene in iter_json_array(stream, loads=loads):
+        if not isinstance(scene, dict):
+            continue
+        seen.add(scene.get("scene_id"))
+        yield _finish(scene)
+
+    if len(seen) > 2:
+        return
+
+    scenes, retry_resp = None, ""
+    if settings.LLM_STRUCTURED_OUTPUT:
+        scenes = _request_scenes_structured(body, extra_prompt=_RETRY_WARNING)
+    if not scenes:
+        retry_resp = _call_splitter(body, extra_prompt=_RETRY_WARNING)
+        scenes = _parse_response(retry_resp)
+    if not isinstance(scenes, list):
+        if not seen:
+            yield {"scene_id": 0, "title": "RAW_OUTPUT", "narration": str(retry_resp)[:500], "raw_text": ""}
+        return
+    for scene in scenes:
+        if isinstance(scene, dict) and scene.get("scene_id") not in seen:
+            seen.add(scene.get("scene_id"))
+            yield _finish(scene)
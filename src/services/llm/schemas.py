@@ -0,0 +1,53 @@
+# src/services/llm/schemas.py
+"""
+LLM 구조화 출력 스키마 (tool use)
+- 모델에게 tool 하나를 강제 호출시켜(tool_choice) input_schema에 맞는 JSON을 받는다
+- 받은 tool input은 Pydantic 모델로 검증 → 실패할 때만 기존 정규식 복구 경로로 대체
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class Scene(BaseModel):
+    scene_id: int
+    title: str
+    narration: str
+    raw_text: str = ""
+    source_chunks: list[str] = Field(default_factory=list)
+
+
+class SceneList(BaseModel):
+    scenes: list[Scene] = Field(description="10~12개 장면, scene_id 순서대로")
+
+
+class Visualization(BaseModel):
+    viz_type: Literal["diagram", "illustration"] = "diagram"
+    tool: Literal["graphviz", "stability"] = "graphviz"
+    layout: Literal["dot", "neato", "circo", "twopi"] = "dot"
+    viz_label: str = ""
+    diagram: str = Field(default="", description="Graphviz DOT 코드 (viz_type=diagram)")
+    prompt: str = Field(default="", description="일러스트 프롬프트 (viz_type=illustration)")
+
+
+class VizScene(BaseModel):
+    scene_id: int
+    title: str
+    narration: str
+    # 1~2개 요청. 더 와도 검증 실패로 버리지 않고 후처리(_postprocess_viz)에서 앞의 2개만 사용
+    visualizations: list[Visualization]
+
+
+class VizBatch(BaseModel):
+    results: list[VizScene] = Field(description="입력 scene마다 하나, scene_id 그대로")
+
+
+def tool_spec(model: type[BaseModel], name: str, description: str) -> dict:
+    """Pydantic 모델 → Messages API tool 정의"""
+    return {"name": name, "description": description, "input_schema": model.model_json_schema()}
+
+
+SCENE_TOOL = tool_spec(SceneList, "submit_scenes", "논문을 나눈 스토리북 장면 목록을 제출한다.")
+VIZ_TOOL = tool_spec(VizScene, "submit_visualization", "scene 하나의 시각화 설계를 제출한다.")
+VIZ_BATCH_TOOL = tool_spec(VizBatch, "submit_visualizations", "여러 scene의 시각화 설계를 한 번에 제출한다.")
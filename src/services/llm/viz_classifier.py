@@ -2,20 +2,48 @@
 
 import json
 import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
 from typing import Any
-from src.services.llm.client import call_claude
+from pydantic import ValidationError
+
+from src.core import metrics, tracing
+from src.services.llm.client import call_claude, call_claude_tool
+from src.services.llm.json_repair import repair_json
+from src.services.llm.prompt_budget import Section, build_sections, count_tokens
+from src.services.llm.schemas import VIZ_BATCH_TOOL, VIZ_TOOL, VizScene
 from src.core.config import settings
+from src.services.visualization.dot_cleaner import clean_viz_entry
+from src.services.visualization.dot_validator import DEFAULT_LIMITS, DotIssue, fallback_dot, validate_dot
 
-_MAX_TEXT_CHARS = 3000
+# scene당 입력 토큰 / DOT 재요청 응답 토큰 / 배치 최대 scene 수는 settings.VIZ_* 로 조정
+_EST_OUTPUT_TOKENS_PER_SCENE = 700   # 배치 크기 초기 추정용 (scene 하나 분류 응답 길이)
 
 # =====================
 # 🚩 추가 유틸
 # =====================
 
-def _truncate(s: str, max_len: int = _MAX_TEXT_CHARS) -> str:
-    if not s:
-        return ""
-    return s if len(s) <= max_len else s[:max_len]
+def _scene_payload(scene: dict[str, Any]) -> dict[str, Any]:
+    """
+    프롬프트에 넣을 scene 요약.
+    narration / raw_text를 토큰 예산 안에 맞추고, raw_text는 title과 관련 높은 문장 위주로 채운다.
+    """
+    title = str(scene.get("title", "")).strip()
+    fitted = build_sections(
+        settings.VIZ_SCENE_INPUT_TOKENS,
+        [
+            Section("narration", str(scene.get("narration", "")).strip(), weight=1.0),
+            Section("raw_text", str(scene.get("raw_text", "")).strip(), weight=2.0, query=title),
+        ],
+    )
+    return {
+        "scene_id": scene.get("scene_id"),
+        "title": title,
+        "narration": fitted["narration"],
+        "raw_text": fitted["raw_text"],
+    }
 
 
 def _strip_fences(s: str) -> str:
@@ -55,15 +83,6 @@ def _extract_first_balanced_json(s: str) -> str | None:
     return None
 
 
-def _repair_common_broken_pairs(s: str) -> str:
-    keys = r"(diagram|graphviz|graphviz_code|graph|dot|scene_graph|content|layout)"
-    s = re.sub(rf",\s*\"{keys}\"\s*:\s*,\s*\"{keys}\"\s*:", r", \"\2\":", s, flags=re.DOTALL)
-    s = re.sub(rf"\"{keys}\"\s*:\s*,\s*\"{keys}\"\s*:", r"\"\2\":", s, flags=re.DOTALL)
-    s = re.sub(rf",\s*\"{keys}\"\s*:\s*,\s*", r", ", s, flags=re.DOTALL)
-    s = re.sub(rf"\"{keys}\"\s*:\s*,\s*", r"", s, flags=re.DOTALL)
-    return s
-
-
 def _sanitize_label(text: str) -> str:
     """
     노드/에지 label 텍스트 정리:
@@ -95,6 +114,25 @@ def _enforce_label_rules(diagram: str) -> str:
     return diagram
 
 
+# used_layouts는 스토리북 하나의 여러 배치(스레드)가 공유할 수 있음 → 확인 + 추가를 한 번에
+_layouts_lock = threading.Lock()
+
+
+def _layouts_snapshot(used_layouts: list[str]) -> list[str]:
+    """시도용 사본: 채택되지 않을 수도 있는 결과가 공유 목록을 건드리지 않게"""
+    with _layouts_lock:
+        return list(used_layouts)
+
+
+def _commit_layouts(result: dict[str, Any], used_layouts: list[str]) -> None:
+    """최종 채택한 결과의 diagram 레이아웃만 공유 목록에 반영"""
+    with _layouts_lock:
+        for viz in result.get("visualizations") or []:
+            layout = viz.get("layout")
+            if viz.get("viz_type") == "diagram" and layout and layout not in used_layouts:
+                used_layouts.append(layout)
+
+
 def _assign_unique_layout(viz: dict[str, Any], used_layouts: list[str]) -> None:
     """
     레이아웃 중복 방지: 아직 안 쓴 레이아웃이 있으면 강제로 할당.
@@ -107,121 +145,9 @@ def _assign_unique_layout(viz: dict[str, Any], used_layouts: list[str]) -> None:
             viz["layout"] = unused[0]
 
 
-# 추가: 이스케이프된 따옴표를 건너뛰며 "tool": "..." 전체를 잡아 DOT면 diagram으로 이동
-def _fix_tool_field_digraphs(s: str) -> str:
-    # "tool": " ... " 에서 내부는 (\\.|[^"\\])* 로 캡처 → 이스케이프된 따옴표도 통과
-    pat = re.compile(r'"tool"\s*:\s*"((?:\\.|[^"\\])*)"')
-
-    def repl(m: re.Match[str]) -> str:
-        inner_escaped = m.group(1)
-        try:
-            # JSON 문자열 디코딩으로 실제 값 복원
-            value = json.loads(f'"{inner_escaped}"')
-        except Exception:
-            value = inner_escaped
-
-        if isinstance(value, str) and value.lstrip().startswith(("digraph", "graph")):
-            # tool → graphviz, diagram에 DOT 삽입
-            return f'"tool": "graphviz", "diagram": {json.dumps(value, ensure_ascii=False)}'
-        return m.group(0)
-
-    return pat.sub(repl, s)
-
-
 def _repair_raw_json(s: str) -> str:
-    if not s:
-        return ""
-    s = s.strip()
-    s = re.sub(r"^```(?:json)?\s*", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*```$", "", s)
-
-    s = s.replace('"excalidraw"', '"graphviz"')
-    s = s.replace('"stable-diffusion"', '"stability"')
-
-    # 중복 diagram 키 보정 그대로 두고...
-    s = re.sub(r'("diagram"\s*:\s*)",\s*"diagram"\s*:\s*', r'\1', s)
-
-    # ✅ 이 줄 추가: tool에 박힌 DOT를 이스케이프-안전하게 끌어내기
-    s = _fix_tool_field_digraphs(s)
-
-    # 이하 기존 alias 블록 추출 루프 그대로...
-    aliases = ['"diagram"', '"graphviz"', '"graph"', '"graphviz_code"', '"dot"', '"scene_graph"']
-
-    def _encode_graph_block(text: str, key_pos: int) -> tuple[str, int] | None:
-        colon = text.find(":", key_pos)
-        if colon == -1:
-            return None
-        i = colon + 1
-        while i < len(text) and text[i].isspace():
-            i += 1
-        had_quote = False
-        if i < len(text) and text[i] == '"':
-            had_quote = True
-            i += 1
-
-        m = re.search(r'(digraph\s+[^{]+\{|\bgraph\s*\{)', text[i:], re.IGNORECASE)
-        if not m:
-            return None
-        start = i + m.start()
-
-        depth = 0
-        j = start
-        in_str = False
-        while j < len(text):
-            ch = text[j]
-            prev = text[j-1] if j > 0 else ""
-            if ch == '"' and prev != '\\':
-                in_str = not in_str
-            if not in_str:
-                if ch == '{':
-                    depth += 1
-                elif ch == '}':
-                    depth -= 1
-                    if depth == 0:
-                        end = j + 1
-                        break
-            j += 1
-        else:
-            return None
-
-        block = text[start:end]
-        encoded = json.dumps(block, ensure_ascii=False)
-
-        k = end
-        if had_quote and k < len(text) and text[k] == '"':
-            k += 1
-
-        new_text = text[:colon+1] + " " + encoded + text[k:]
-        return new_text, colon + 1 + 1 + len(encoded)
-
-    idx = 0
-    while True:
-        next_pos = None
-        which = None
-        for a in aliases:
-            p = s.find(a, idx)
-            if p != -1 and (next_pos is None or p < next_pos):
-                next_pos = p
-                which = a
-        if next_pos is None:
-            break
-
-        res = _encode_graph_block(s, next_pos + len(which))
-        if res is None:
-            idx = next_pos + len(which)
-            continue
-        s, idx = res
-
-    return s
-
-def _fix_invalid_escapes(s: str) -> str:
-    """
-    JSON 문자열에서 잘못된 백슬래시 escape들을 고친다.
-    - 허용된 escape: \", \\, \/, \b, \f, \n, \r, \t, \uXXXX
-    - 나머지는 그냥 백슬래시를 지워서 안전화
-    """
-    # \u 로 시작하지 않는 모든 \X 를 잡아서 → 그냥 X로 치환
-    return re.sub(r'\\(?!["\\/bfnrtu])', '', s)
+    """LLM 응답 → json.loads 가능한 문자열 (json_repair 한 번 훑기)"""
+    return repair_json(s)
 
 
 def _safe_json_loads(s: str):
@@ -230,19 +156,6 @@ def _safe_json_loads(s: str):
     except Exception:
         pass
 
-    s_fixed = _repair_raw_json(s)
-    s_fixed = _fix_invalid_escapes(s_fixed)
-
-    try:
-        return json.loads(s_fixed)
-    except Exception:
-        only_json = _extract_first_balanced_json(s_fixed)
-        if only_json:
-            return json.loads(_fix_invalid_escapes(only_json))
-        raise
-
-    # fallback
-    from src.services.llm.viz_classifier import _repair_raw_json, _extract_first_balanced_json
     s_fixed = _repair_raw_json(s)
     try:
         return json.loads(s_fixed)
@@ -287,89 +200,185 @@ def _ensure_viz_labels(vizzes: list[dict[str, Any]], scene_id: Any) -> None:
             v["viz_label"] = f"scene_{scene_id}_v{idx+1}"
 
 
+_VIZ_ROLE = """
+You are the 'Visualization Designer' for an AI paper storybook.
+Your task: propose **1–2 clear schematic diagrams** (Graphviz DOT).
+Illustrations are strongly discouraged — only use them if a diagram cannot express the idea.
+""".strip()
+
+_SINGLE_OUTPUT_RULES = """
+⚠️ Output rules (STRICT):
+- Return exactly ONE result for the scene. If a tool is provided, submit it through that tool only;
+  otherwise reply with ONE valid JSON object and nothing else (no prose, no code after it).
+- Always include "scene_id", "title", "narration".
+- Allowed viz_type: "diagram" (preferred), "illustration" (rare).
+- For diagrams: use "tool": "graphviz" and include "layout" ("dot","neato","circo","twopi").
+- Put Graphviz code under "diagram" (JSON-safe in text replies: escape newlines as \\n).
+- Do NOT append raw DOT outside the result.
+""".strip()
+
+_BATCH_OUTPUT_RULES = """
+⚠️ Output rules (STRICT):
+- Return exactly one result per input scene. If a tool is provided, submit them through that tool only;
+  otherwise reply with ONE valid JSON array of those objects and nothing else (no prose before or after).
+- Each result MUST include the input "scene_id" unchanged, plus "title", "narration", "visualizations".
+- Allowed viz_type: "diagram" (preferred), "illustration" (rare).
+- For diagrams: use "tool": "graphviz" and include "layout" ("dot","neato","circo","twopi").
+- Put Graphviz code under "diagram" (JSON-safe in text replies: escape newlines as \\n).
+- Use different layouts across the scenes of this batch where it fits the content.
+""".strip()
+
+# 단일/배치 공통 설계 규칙 (scene과 무관한 고정 텍스트)
+_VIZ_DESIGN_RULES = """
+⚠️ Layout Diversity Rule:
+- Do NOT always use rankdir=LR with dot.
+- Each paper MUST include at least 3 distinct layouts across its scenes.
+- Prefer introducing a new layout if repetition is detected.
+
+💡 Language & Label Rules:
+- "title"과 "narration"은 한국어 문장으로 작성하되, 중요한 기술 용어는 반드시 영어 병기 (예: YOLO (You Only Look Once)).
+- Graphviz DOT 코드 내 시각적 텍스트는 반드시 label=<...> 안에서 HTML 블록으로 작성.
+- 모든 label은 <FONT FACE="NanumGothic">텍스트</FONT> 형식으로 작성.
+- 모든 노드와 에지에는 반드시 fontname="NanumGothic", fontsize=12 이상을 지정.
+
+⚠️ Node ID Rules (STRICT):
+- 모든 노드 ID는 단순한 영문/숫자/언더스코어만 사용 (예: node1, node2, yolo_model).
+- 노드 ID 안에 한글, 공백, HTML 태그를 절대 넣지 말 것.
+- 시각적으로 표시할 텍스트는 반드시 label 속성에 넣을 것.
+
+⛔ Forbidden Rules:
+- 노드/에지 label에는 긴 문장, 수식, 토큰 시퀀스([CLS], 중괄호({...}), `) 절대 금지.
+- 한 노드 label은 최대 20자 내외로 제한.
+- 긴 설명은 반드시 edge label 또는 narration에 넣을 것.
+- label 안에서는 [], 중괄호({...}), 백틱(`) 절대 사용 금지. 필요한 경우 () 등으로 대체.
+- 도형 안 여러 줄 금지. <BR/>는 최대 1회까지만 허용.
+
+⚠️ Label Rules (STRICT):
+- 모든 노드/에지 label은 HTML label 형식 (label=<...>)으로 작성.
+- 반드시 <FONT FACE="NanumGothic"> ... </FONT> 블록 안에 작성.
+- 긴 설명은 edge label 또는 narration에 배치. 노드 label은 짧게 (최대 20자).
+- <BR/>은 허용하되 최대 1회만 사용.
+
+---
+🎯 Layout & Style Hints:
+| Purpose                     | Recommended Layout |
+|-----------------------------|--------------------|
+| Pipeline / Sequential Flow  | dot + rankdir=LR   |
+| Hierarchy / Architecture    | dot + rankdir=TB + clusters |
+| Comparison / Contrast       | dot + clusters     |
+| Relational Network          | neato              |
+| Circular / Spread           | circo              |
+| Trade-off / Balance         | neato or twopi     |
+| Record / Table Structure    | dot + shape=record |
+""".strip()
+
+
+def _layouts_info(used_layouts: list[str] | None) -> str:
+    if used_layouts:
+        return f"Previously used layouts: {', '.join(used_layouts)}"
+    return "No layouts used yet"
+
+
+# 호출마다 바이트 단위로 동일한 고정 지시문 → call_claude(cached_prefix=...)로 prompt caching
+CLASSIFY_PREFIX = f"{_VIZ_ROLE}\n\n{_SINGLE_OUTPUT_RULES}\n\n{_VIZ_DESIGN_RULES}"
+BATCH_CLASSIFY_PREFIX = f"{_VIZ_ROLE}\n\n{_BATCH_OUTPUT_RULES}\n\n{_VIZ_DESIGN_RULES}"
+
+
+def build_classify_prompt(scene: dict[str, Any], used_layouts: list[str] | None = None) -> str:
+    """CLASSIFY_PREFIX 뒤에 붙는 가변 부분 (사용한 레이아웃 + scene)"""
+    return (
+        f"{_layouts_info(used_layouts)}\n\n"
+        "Now generate visualization for this scene (JSON only):\n"
+        f"{json.dumps(_scene_payload(scene), ensure_ascii=False)}"
+    )
+
+
+def build_batch_classify_prompt(scenes: list[dict[str, Any]], used_layouts: list[str] | None = None) -> str:
+    """BATCH_CLASSIFY_PREFIX 뒤에 붙는 가변 부분"""
+    payload = [_scene_payload(s) for s in scenes]
+    return (
+        f"{_layouts_info(used_layouts)}\n\n"
+        f"Now generate visualizations for these {len(payload)} scenes (JSON array only, one object per scene_id):\n"
+        f"{json.dumps(payload, ensure_ascii=False)}"
+    )
+
+
 def classify_single_scene(
     scene: dict[str, Any],
     used_layouts: list[str] | None = None,
     model: str | None = None,
     max_tokens: int | None = None,
 ) -> str:
-    scene_id = scene.get("scene_id")
-    title = str(scene.get("title", "")).strip()
-    narration = _truncate(str(scene.get("narration", "")).strip())
-    raw_text = _truncate(str(scene.get("raw_text", "")).strip())
-
-    layouts_info = (
-        f"Previously used layouts: {', '.join(used_layouts)}"
-        if used_layouts
-        else "No layouts used yet"
-    )
-
-    prompt = f"""
-    You are the 'Visualization Designer' for an AI paper storybook.
-    Your task: propose **1–2 clear schematic diagrams** (Graphviz DOT).
-    Illustrations are strongly discouraged — only use them if a diagram cannot express the idea.
-
-    ⚠️ Output rules (STRICT):
-    - Return ONE valid JSON object ONLY. No prose, no extra code after the JSON.
-    - Always include "scene_id", "title", "narration".
-    - Allowed viz_type: "diagram" (preferred), "illustration" (rare).
-    - For diagrams: use "tool": "graphviz" and include "layout" ("dot","neato","circo","twopi").
-    - Graphviz code must be JSON-safe (escape newlines as \\n). Put code under "diagram".
-    - Do NOT append raw DOT after the JSON.
-
-    ⚠️ Layout Diversity Rule:
-    - Do NOT always use rankdir=LR with dot.
-    - Each paper MUST include at least 3 distinct layouts across its scenes.
-    - {layouts_info}
-    - Prefer introducing a new layout if repetition is detected.
-
-    💡 Language & Label Rules:
-    - "title"과 "narration"은 한국어 문장으로 작성하되, 중요한 기술 용어는 반드시 영어 병기 (예: YOLO (You Only Look Once)).
-    - Graphviz DOT 코드 내 시각적 텍스트는 반드시 label=<...> 안에서 HTML 블록으로 작성.
-    - 모든 label은 <FONT FACE="NanumGothic">텍스트</FONT> 형식으로 작성.
-    - 모든 노드와 에지에는 반드시 fontname="NanumGothic", fontsize=12 이상을 지정.
-
-    ⚠️ Node ID Rules (STRICT):
-    - 모든 노드 ID는 단순한 영문/숫자/언더스코어만 사용 (예: node1, node2, yolo_model).
-    - 노드 ID 안에 한글, 공백, HTML 태그를 절대 넣지 말 것.
-    - 시각적으로 표시할 텍스트는 반드시 label 속성에 넣을 것.
-
-    ⛔ Forbidden Rules:
-    - 노드/에지 label에는 긴 문장, 수식, 토큰 시퀀스([CLS], 중괄호({{...}}), `) 절대 금지.
-    - 한 노드 label은 최대 20자 내외로 제한.
-    - 긴 설명은 반드시 edge label 또는 narration에 넣을 것.
-    - label 안에서는 [], 중괄호({{...}}), 백틱(`) 절대 사용 금지. 필요한 경우 () 등으로 대체.
-    - 도형 안 여러 줄 금지. <BR/>는 최대 1회까지만 허용.
-
-    ⚠️ Label Rules (STRICT):
-    - 모든 노드/에지 label은 HTML label 형식 (label=<...>)으로 작성.
-    - 반드시 <FONT FACE="NanumGothic"> ... </FONT> 블록 안에 작성.
-    - 긴 설명은 edge label 또는 narration에 배치. 노드 label은 짧게 (최대 20자).
-    - <BR/>은 허용하되 최대 1회만 사용.
-
-    ---
-    🎯 Layout & Style Hints:
-    | Purpose                     | Recommended Layout |
-    |-----------------------------|--------------------|
-    | Pipeline / Sequential Flow  | dot + rankdir=LR   |
-    | Hierarchy / Architecture    | dot + rankdir=TB + clusters |
-    | Comparison / Contrast       | dot + clusters     |
-    | Relational Network          | neato              |
-    | Circular / Spread           | circo              |
-    | Trade-off / Balance         | neato or twopi     |
-    | Record / Table Structure    | dot + shape=record |
-
-    Now generate visualization for this scene (JSON only):
-    {json.dumps(scene, ensure_ascii=False, indent=2)}
-    """.strip()
-
+    prompt = build_classify_prompt(scene, used_layouts)
     resp = call_claude(
         prompt,
         model=model or settings.CLAUDE_DEFAULT_MODEL,
         max_tokens=max_tokens or settings.CLAUDE_MAX_TOKENS,
+        cached_prefix=CLASSIFY_PREFIX,
     )
     return resp
 
+
+def classify_single_scene_structured(
+    scene: dict[str, Any],
+    used_layouts: list[str] | None = None,
+    model: str | None = None,
+    max_tokens: int | None = None,
+) -> dict[str, Any] | None:
+    """submit_visualization tool 강제 호출 + VizScene 검증. 실패하면 None (텍스트 경로로 대체)."""
+    data = call_claude_tool(
+        build_classify_prompt(scene, used_layouts),
+        VIZ_TOOL,
+        model=model or settings.CLAUDE_DEFAULT_MODEL,
+        max_tokens=max_tokens or settings.CLAUDE_MAX_TOKENS,
+        cached_prefix=CLASSIFY_PREFIX,
+    )
+    if data is None:
+        return None
+    try:
+        return VizScene.model_validate(data).model_dump()
+    except ValidationError as e:
+        print(f"[VizClassifier] scene {scene.get('scene_id')} 스키마 검증 실패: {e.error_count()}건")
+        return None
+
+def reask_diagram(
+    scene: dict[str, Any],
+    dot_code: str,
+    issues: list[DotIssue],
+    model: str | None = None,
+) -> str | None:
+    """
+    검증에서 못 고친 DOT만 해당 scene 하나에 대해 짧게 재요청.
+    반환: 새 DOT 코드 (응답에 DOT가 없으면 None)
+    """
+    problems = "\n".join(f"- [{i.code}] {i.message}" for i in issues)
+    prompt = f"""
+    The following Graphviz DOT diagram for one storybook scene failed validation.
+    Fix ONLY the listed problems and return the corrected DOT code ONLY.
+    No JSON, no prose, no code fences.
+
+    Rules:
+    - Node IDs: ASCII letters, digits and underscores only. Put visible text in label.
+    - Labels: label=<<FONT FACE="NanumGothic">text</FONT>>, well-formed HTML, at most {DEFAULT_LIMITS.max_label_len} characters.
+    - At most {DEFAULT_LIMITS.max_nodes} nodes and {DEFAULT_LIMITS.max_edges} edges.
+
+    Scene title: {str(scene.get("title", "")).strip()}
+
+    Problems:
+    {problems}
+
+    DOT:
+    {dot_code}
+    """.strip()
+
+    resp = call_claude(prompt, model=model or settings.CLAUDE_DEFAULT_MODEL, max_tokens=settings.VIZ_REASK_MAX_TOKENS)
+    m = re.search(r"(?:strict\s+)?(?:di)?graph\b[^{]*\{", resp or "")
+    if not m:
+        return None
+    end = resp.rfind("}")
+    return resp[m.start() : end + 1] if end > m.start() else None
+
+
 def _fix_tool_and_diagram(obj: dict) -> dict:
     """tool/diagram 값이 잘못된 경우 전역적으로 교정"""
     bad_vals = {"graphviz", "dot", "neato", "circo", "twopi"}
@@ -388,107 +397,381 @@ def _fix_tool_and_diagram(obj: dict) -> dict:
     return obj
 
 
+def _postprocess_viz(obj: Any, scene: dict[str, Any], used_layouts: list[str]) -> dict[str, Any]:
+    """LLM 응답 객체 하나 → 교정된 scene viz 결과 (used_layouts 갱신)"""
+    if isinstance(obj, list) and obj:
+        obj = obj[0]
+    if not isinstance(obj, dict):
+        raise ValueError("Unexpected JSON structure")
+
+    obj.setdefault("scene_id", scene.get("scene_id", 0))
+    obj.setdefault("title", scene.get("title", ""))
+    obj.setdefault("narration", scene.get("narration", ""))
+
+    # 전역 tool/diagram 교정
+    obj = _fix_tool_and_diagram(obj)
+
+    # visualizations 내부도 교정
+    vizzes = obj.get("visualizations", [])
+    if isinstance(vizzes, list):
+        for viz in vizzes:
+            _fix_tool_and_diagram(viz)
+
+    obj = _normalize_viz_keys(obj)
+    _hoist_top_level_diagram(obj)
+
+    vizzes = obj.get("visualizations", [])
+    if not isinstance(vizzes, list):
+        vizzes = []
+
+    for viz in vizzes:
+        if viz.get("viz_type") == "diagram":
+            viz["tool"] = "graphviz"
+            layout = viz.get("layout") or obj.get("layout") or "dot"
+            viz["layout"] = layout
+
+            with _layouts_lock:
+                _assign_unique_layout(viz, used_layouts)
+                if viz["layout"] not in used_layouts:
+                    used_layouts.append(viz["layout"])
+
+            if "diagram" in viz and isinstance(viz["diagram"], str):
+                viz["diagram"] = _enforce_label_rules(viz["diagram"])
+
+        elif viz.get("viz_type") == "illustration":
+            viz["tool"] = "stability"
+
+    # fallback 보장
+    if not any(v.get("viz_type") == "diagram" for v in vizzes):
+        title = obj.get("title", "제목 없음")
+        vizzes.append(
+            {
+                "viz_type": "diagram",
+                "tool": "graphviz",
+                "viz_label": "auto_fallback",
+                "diagram": fallback_dot(_sanitize_label(title)),
+                "layout": "dot",
+            }
+        )
+        with _layouts_lock:
+            if "dot" not in used_layouts:
+                used_layouts.append("dot")
+
+    _ensure_viz_labels(vizzes, obj.get("scene_id"))
+
+    # 중복 라벨 제거
+    unique_vizzes, seen = [], set()
+    for viz in vizzes:
+        label = viz.get("viz_label")
+        if label in seen:
+            continue
+        seen.add(label)
+        unique_vizzes.append(viz)
+
+    obj["visualizations"] = unique_vizzes[:2]
+    return obj
+
+
+def _parse_failed(scene: dict[str, Any], raw: Any) -> dict[str, Any]:
+    return {
+        "scene_id": scene.get("scene_id", 0),
+        "title": scene.get("title", ""),
+        "narration": scene.get("narration", ""),
+        "error": "JSON parse failed",
+        "raw": str(raw)[:800],
+    }
+
+
+def _classify_one(
+    scene: dict[str, Any], used_layouts: list[str], model: str | None, max_tokens: int | None
+) -> dict[str, Any]:
+    if settings.LLM_STRUCTURED_OUTPUT:
+        obj = classify_single_scene_structured(scene, used_layouts=used_layouts, model=model, max_tokens=max_tokens)
+        if obj is not None:
+            obj["scene_id"] = scene.get("scene_id", obj["scene_id"])   # 요청한 scene에 고정
+            return _postprocess_viz(obj, scene, used_layouts)
+
+    # 대체 경로: 텍스트 응답 + 정규식 복구
+    raw = classify_single_scene(scene, used_layouts=used_layouts, model=model, max_tokens=max_tokens)
+    try:
+        return _postprocess_viz(_safe_json_loads(raw), scene, used_layouts)
+    except Exception:
+        return _parse_failed(scene, raw)
+
+
+# =====================
+# 모델 라우팅: 싼 모델 먼저 → 검증 실패한 scene만 큰 모델로 승급
+# =====================
+
+@dataclass
+class RouteRecord:
+    """scene 하나의 라우팅 기록 (attempts: 시도별 model / latency_ms / batch 크기 / 결과)"""
+    scene_id: Any
+    attempts: list[dict[str, Any]] = field(default_factory=list)
+    escalated: bool = False
+    reason: str | None = None        # 승급 사유: parse_failed | invalid_dot | fallback_only
+
+    @property
+    def final_model(self) -> str:
+        return self.attempts[-1]["model"] if self.attempts else ""
+
+
+_REASON_RANK = {None: 0, "invalid_dot": 1, "fallback_only": 2, "parse_failed": 3}   # 낮을수록 좋은 결과
+_route_log: deque[RouteRecord] = deque(maxlen=settings.VIZ_ROUTE_LOG_SIZE)
+_route_lock = threading.Lock()
+
+
+def _cheap_model(model: str | None) -> str:
+    return model or (settings.VIZ_CHEAP_MODEL if settings.VIZ_ROUTING else settings.CLAUDE_DEFAULT_MODEL)
+
+
+def escalation_reason(result: dict[str, Any]) -> str | None:
+    """분류 결과가 큰 모델로 다시 물어볼 만큼 나쁜지. 괜찮으면 None."""
+    if result.get("error"):
+        return "parse_failed"
+    diagrams = [v for v in result.get("visualizations") or [] if v.get("viz_type") == "diagram"]
+    if not diagrams or all(v.get("viz_label") == "auto_fallback" for v in diagrams):
+        return "fallback_only"
+    # 렌더 단계와 같은 경로(clean → validate)로 첫 diagram 검사 (원본은 건드리지 않음)
+    cleaned = clean_viz_entry({"diagram": str(diagrams[0].get("diagram") or "")})
+    if cleaned.get("dot_error") or not validate_dot(cleaned["diagram"]).ok:
+        return "invalid_dot"
+    return None
+
+
+def _log_route(record: RouteRecord) -> None:
+    with _route_lock:
+        _route_log.append(record)
+    for a in record.attempts:
+        metrics.observe_stage("classify", a["latency_ms"] / 1000, a["outcome"], engine=a["model"])
+    steps = " → ".join(f"{a['model']} {a['latency_ms']:.0f}ms {a['outcome']}" for a in record.attempts)
+    print(f"[VizRouter] scene {record.scene_id}: {steps}")
+    if settings.VIZ_ROUTING_LOG:
+        try:
+            with open(settings.VIZ_ROUTING_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[VizRouter] 라우팅 로그 저장 실패: {e}")
+
+
+def get_routing_log() -> list[RouteRecord]:
+    with _route_lock:
+        return list(_route_log)
+
+
+def _timed_classify(
+    scene: dict[str, Any], used_layouts: list[str], model: str, max_tokens: int | None
+) -> tuple[dict[str, Any], float]:
+    start = time.perf_counter()
+    # metrics는 _log_route에서 시도별로 기록, trace(Server-Timing)에는 여기서 span으로
+    with tracing.span("classify", model=model, batch=1):
+        result = _classify_one(scene, used_layouts, model, max_tokens)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _route_result(
+    scene: dict[str, Any],
+    result: dict[str, Any],
+    record: RouteRecord,
+    used_layouts: list[str],
+) -> dict[str, Any]:
+    """
+    싼 모델 결과를 검사하고, 나쁘면 큰 모델로 한 번 더 (더 나을 때만 채택). 기록 남김.
+    result는 used_layouts 사본으로 만든 것이어야 하며, 채택한 결과의 레이아웃만 used_layouts에 반영한다.
+    """
+    reason = escalation_reason(result) if settings.VIZ_ROUTING else None
+    record.attempts[-1]["outcome"] = reason or "ok"
+    if reason and settings.VIZ_ESCALATION_MODEL != record.final_model:
+        record.escalated, record.reason = True, reason
+        strong, ms = _timed_classify(scene, _layouts_snapshot(used_layouts), settings.VIZ_ESCALATION_MODEL, None)
+        strong_reason = escalation_reason(strong)
+        record.attempts.append(
+            {"model": settings.VIZ_ESCALATION_MODEL, "latency_ms": ms, "batch": 1, "outcome": strong_reason or "ok"}
+        )
+        if _REASON_RANK[strong_reason] < _REASON_RANK[reason]:
+            result = strong
+    _commit_layouts(result, used_layouts)
+    _log_route(record)
+    return result
+
+
+def classify_scene_routed(
+    scene: dict[str, Any], used_layouts: list[str], model: str | None = None, max_tokens: int | None = None
+) -> dict[str, Any]:
+    """scene 하나: 싼 모델(VIZ_CHEAP_MODEL, 작은 max_tokens) → 필요하면 VIZ_ESCALATION_MODEL"""
+    cheap = _cheap_model(model)
+    budget = max_tokens or (settings.VIZ_CHEAP_MAX_TOKENS if settings.VIZ_ROUTING else None)
+    result, ms = _timed_classify(scene, _layouts_snapshot(used_layouts), cheap, budget)
+    record = RouteRecord(scene.get("scene_id"), [{"model": cheap, "latency_ms": ms, "batch": 1, "outcome": ""}])
+    return _route_result(scene, result, record, used_layouts)
+
+
 def classify_scenes_iteratively(
     scenes: list[dict[str, Any]], model: str | None = None, max_tokens: int | None = None
 ) -> list[dict[str, Any]]:
-    results: list[dict[str, Any]] = []
     used_layouts: list[str] = []
+    return [classify_scene_routed(scene, used_layouts, model, max_tokens) for scene in scenes]
 
-    for scene in scenes:
-        raw = classify_single_scene(
-            scene, used_layouts=used_layouts, model=model, max_tokens=max_tokens
-        )
-        raw = _repair_raw_json(raw)
 
-        try:
-            obj = _safe_json_loads(raw)
-            if isinstance(obj, list) and obj:
-                obj = obj[0]
-            if not isinstance(obj, dict):
-                raise ValueError("Unexpected JSON structure")
-
-            obj.setdefault("scene_id", scene.get("scene_id", 0))
-            obj.setdefault("title", scene.get("title", ""))
-            obj.setdefault("narration", scene.get("narration", ""))
-
-            # 전역 tool/diagram 교정
-            obj = _fix_tool_and_diagram(obj)
-
-            # visualizations 내부도 교정
-            vizzes = obj.get("visualizations", [])
-            if isinstance(vizzes, list):
-                for viz in vizzes:
-                    _fix_tool_and_diagram(viz)
-
-            obj = _normalize_viz_keys(obj)
-            _hoist_top_level_diagram(obj)
-
-            vizzes = obj.get("visualizations", [])
-            if not isinstance(vizzes, list):
-                vizzes = []
-
-            for viz in vizzes:
-                if viz.get("viz_type") == "diagram":
-                    viz["tool"] = "graphviz"
-                    layout = viz.get("layout") or obj.get("layout") or "dot"
-                    viz["layout"] = layout
-
-                    _assign_unique_layout(viz, used_layouts)
-                    if viz["layout"] not in used_layouts:
-                        used_layouts.append(viz["layout"])
-
-                    if "diagram" in viz and isinstance(viz["diagram"], str):
-                        viz["diagram"] = _enforce_label_rules(viz["diagram"])
-
-                elif viz.get("viz_type") == "illustration":
-                    viz["tool"] = "stability"
-
-            # fallback 보장
-            if not any(v.get("viz_type") == "diagram" for v in vizzes):
-                title = obj.get("title", "제목 없음")
-                safe_title = _sanitize_label(title)
-                fallback_dot = f'''
-                    digraph G {{
-                    node [shape=box, fontname="NanumGothic", fontsize=12];
-                    "{safe_title}" -> "다음 단계";
-                    }}
-                    '''.strip()
-
-                vizzes.append(
-                    {
-                        "viz_type": "diagram",
-                        "tool": "graphviz",
-                        "viz_label": "auto_fallback",
-                        "diagram": fallback_dot,
-                        "layout": "dot",
-                    }
-                )
-                if "dot" not in used_layouts:
-                    used_layouts.append("dot")
+# =====================
+# 배치 분류: 여러 scene을 한 번의 호출로
+# =====================
+
+def _split_top_level_objects(s: str) -> list[str]:
+    """배열이 잘리거나 깨졌을 때: 완결된 최상위 {...} 객체들만 순서대로 추출"""
+    objs: list[str] = []
+    pos = 0
+    while True:
+        chunk = _extract_first_balanced_json(s[pos:])
+        if not chunk:
+            return objs
+        objs.append(chunk)
+        pos = s.find(chunk, pos) + len(chunk)
 
-            _ensure_viz_labels(vizzes, obj.get("scene_id"))
 
-            # 중복 라벨 제거
-            unique_vizzes, seen = [], set()
-            for viz in vizzes:
-                label = viz.get("viz_label")
-                if label in seen:
+def _parse_batch_response(raw: str) -> dict[str, Any]:
+    """
+    배치 응답 → {str(scene_id): obj}.
+    배열 전체가 안 읽히면 완결된 객체만 건지고, 나머지 scene은 호출 측에서 개별 재요청.
+    """
+    s = _strip_fences(raw or "")
+    try:
+        parsed = json.loads(s)
+    except Exception:
+        try:
+            parsed = json.loads(_repair_raw_json(s))
+        except Exception:
+            parsed = []
+            for chunk in _split_top_level_objects(s):
+                try:
+                    parsed.append(_safe_json_loads(chunk))
+                except Exception:
                     continue
-                seen.add(label)
-                unique_vizzes.append(viz)
+    items = parsed if isinstance(parsed, list) else [parsed]
 
-            obj["visualizations"] = unique_vizzes[:2]
-            results.append(obj)
+    by_id: dict[str, Any] = {}
+    for item in items:
+        if isinstance(item, dict) and item.get("scene_id") is not None:
+            by_id.setdefault(str(item["scene_id"]), item)
+    return by_id
 
-        except Exception:
-            results.append(
-                {
-                    "scene_id": scene.get("scene_id", 0),
-                    "title": scene.get("title", ""),
-                    "narration": scene.get("narration", ""),
-                    "error": "JSON parse failed",
-                    "raw": str(raw)[:800],
-                }
-            )
 
+def _request_batch_structured(
+    batch: list[dict[str, Any]], used_layouts: list[str], model: str | None, max_tokens: int
+) -> tuple[dict[str, Any] | None, str]:
+    """
+    submit_visualizations tool로 배치 분류. 결과 항목별로 VizScene 검증 (틀린 항목만 빠짐).
+    반환: ({str(scene_id): obj} 또는 tool 미호출 시 None, 토큰 추정용 원문)
+    """
+    data = call_claude_tool(
+        build_batch_classify_prompt(batch, used_layouts),
+        VIZ_BATCH_TOOL,
+        model=model or settings.CLAUDE_DEFAULT_MODEL,
+        max_tokens=max_tokens,
+        cached_prefix=BATCH_CLASSIFY_PREFIX,
+    )
+    if data is None or not isinstance(data.get("results"), list):
+        return None, ""
+    by_id: dict[str, Any] = {}
+    for item in data["results"]:
+        try:
+            viz = VizScene.model_validate(item)
+        except ValidationError:
+            continue
+        by_id.setdefault(str(viz.scene_id), viz.model_dump())
+    return by_id, json.dumps(data, ensure_ascii=False)
+
+
+def _batch_size_for(output_budget: int, per_scene_tokens: float) -> int:
+    """출력 토큰 예산 안에 들어가는 scene 수 (여유 10%)"""
+    return max(1, min(settings.VIZ_MAX_BATCH_SCENES, int(output_budget * 0.9 // max(per_scene_tokens, 1))))
+
+
+def classify_scenes_batched(
+    scenes: list[dict[str, Any]],
+    model: str | None = None,
+    max_tokens: int | None = None,
+    batch_size: int | None = None,
+    used_layouts: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    N개 scene을 한 번에 분류 (고정 지시문 1회 전송).
+    - 배치 크기: 출력 토큰 예산 / scene당 출력 토큰 추정치. 추정치는 실제 응답으로 계속 보정.
+    - 응답에 빠진 scene(잘림, 파싱 실패)은 classify_single_scene으로 개별 재요청.
+    - 반환 순서는 입력 scenes 순서와 같음.
+    - used_layouts: 논문 전체 레이아웃 다양성용 공유 목록 (여러 호출에 걸쳐 넘기면 이어서 사용, 스레드 간 공유 가능)
+    """
+    output_budget = max_tokens or settings.VIZ_BATCH_MAX_TOKENS
+    model = _cheap_model(model)
+    per_scene = float(_EST_OUTPUT_TOKENS_PER_SCENE)
+    if used_layouts is None:
+        used_layouts = []
+    results: list[dict[str, Any]] = []
+    round_trips = 0
+
+    i = 0
+    while i < len(scenes):
+        size = batch_size or _batch_size_for(output_budget, per_scene)
+        batch = scenes[i : i + size]
+        i += len(batch)
+
+        # 배치 응답은 scene_id로 짝을 맞추므로, id가 겹치는 scene(예: 숫자가 아닌 id → 0)은
+        # 배치에서 빼고 개별 분류 (한 응답이 두 scene에 들어가지 않게)
+        id_counts = Counter(str(s.get("scene_id")) for s in batch)
+        batched = [s for s in batch if id_counts[str(s.get("scene_id"))] == 1]
+
+        if len(batched) <= 1:
+            for scene in batch:
+                results.append(classify_scene_routed(scene, used_layouts, model))
+                round_trips += 1
+            continue
+
+        started = time.perf_counter()
+        by_id = None
+        with tracing.span("classify", model=model, batch=len(batched)):
+            if settings.LLM_STRUCTURED_OUTPUT:
+                by_id, raw = _request_batch_structured(batched, used_layouts, model, output_budget)
+                round_trips += 1
+            if by_id is None:
+                raw = call_claude(
+                    build_batch_classify_prompt(batched, used_layouts),
+                    model=model,
+                    max_tokens=output_budget,
+                    cached_prefix=BATCH_CLASSIFY_PREFIX,
+                )
+                round_trips += 1
+                by_id = _parse_batch_response(raw)
+
+        # scene당 출력 토큰 추정치 보정 (지수 이동 평균)
+        if by_id:
+            observed = count_tokens(raw) / len(by_id)
+            per_scene = 0.5 * per_scene + 0.5 * observed
+
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        missing = 0
+        for scene in batch:
+            duplicate = id_counts[str(scene.get("scene_id"))] > 1
+            obj = None if duplicate else by_id.get(str(scene.get("scene_id")))
+            if obj is None:
+                if not duplicate:
+                    missing += 1
+                results.append(classify_scene_routed(scene, used_layouts, model))
+                round_trips += 1
+                continue
+            try:
+                result = _postprocess_viz(obj, scene, _layouts_snapshot(used_layouts))
+            except Exception:
+                result = _parse_failed(scene, obj)
+            # 배치 지연시간은 scene 수로 나눠 기록 (batch 필드에 크기 보존)
+            attempt = {"model": model, "latency_ms": batch_ms / len(batched), "batch": len(batched), "outcome": ""}
+            record = RouteRecord(scene.get("scene_id"), [attempt])
+            results.append(_route_result(scene, result, record, used_layouts))
+            round_trips += record.escalated
+        if missing:
+            print(f"[VizClassifier] 배치 응답에서 {missing}/{len(batched)}개 scene 누락 → 개별 재요청")
+        if len(batched) < len(batch):
+            print(f"[VizClassifier] scene_id 중복 {len(batch) - len(batched)}개 → 개별 분류")
+
+    print(f"[VizClassifier] scene {len(scenes)}개 분류, LLM 호출 {round_trips}회")
     return results
@@ -22,6 +22,8 @@ import fitz  # PyMuPDF
 import urllib.request
 import arxiv  # type: ignore
 
+from src.core.config import settings
+
 # ===== 정규식: arXiv ID (버전 포함/clean 그룹) =====
 ARXIV_PAT = re.compile(r"arXiv:(\d{4}\.\d{4,5})(?:v\d+)?", re.I)
 
@@ -93,14 +95,14 @@ def download_direct(arxiv_id: str, pdf_path: Path, src_tar: Path, corp_ca_pem: s
     pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
     src_url = f"https://arxiv.org/e-print/{arxiv_id}"
 
-    with requests.get(pdf_url, stream=True, timeout=60, verify=verify_arg) as r:
+    with requests.get(pdf_url, stream=True, timeout=settings.ARXIV_FETCH_TIMEOUT_S, verify=verify_arg) as r:
         r.raise_for_status()
         with open(pdf_path, "wb") as f:
             for chunk in r.iter_content(1024 * 64):
                 if chunk:
                     f.write(chunk)
 
-    with requests.get(src_url, stream=True, timeout=60, verify=verify_arg) as r:
+    with requests.get(src_url, stream=True, timeout=settings.ARXIV_FETCH_TIMEOUT_S, verify=verify_arg) as r:
         r.raise_for_status()
         with open(src_tar, "wb") as f:
             for chunk in r.iter_content(1024 * 64):
@@ -9,11 +9,12 @@
 
 from io import BytesIO
 import re
-import fitz  # PyMuPDF
-import requests
 import tarfile
-import certifi
-import arxiv  # pip install arxiv
+
+# fitz(PyMuPDF) / arxiv / requests는 import만으로 수백 ms → 처음 쓰는 함수 안에서 로드
+
+from src.core.config import settings
+from src.services import storage
 
 # ===== 정규식: arXiv ID =====
 ARXIV_PAT = re.compile(r"arXiv:(\d{4}\.\d{4,5})(?:v\d+)?", re.I)
@@ -43,6 +44,8 @@ def extract_vertical_text_from_left_margin(page, left_margin_px: int = 120) -> s
 
 
 def extract_arxiv_id_from_pdf_bytes(pdf_bytes: bytes, left_margin_px: int = 120) -> str | None:
+    import fitz  # PyMuPDF
+
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     try:
         page = doc[0]
@@ -72,10 +75,27 @@ def fetch_arxiv_sources(arxiv_id: str) -> dict[str, str]:
     e-print에서 .tex 소스를 인메모리 dict로 반환
     - return: {filename: text}
     """
-    src_bytes: bytes | None = None
+    # 이미 받은 논문이면 저장소의 tarball 재사용 (worker 간 공유)
+    if cached := storage.cached_bytes(f"arxiv/{arxiv_id}"):
+        return _read_tex_members(cached)
+    src_bytes = _download_source(arxiv_id)
+    storage.cache_bytes(f"arxiv/{arxiv_id}", src_bytes)
+    return _read_tex_members(src_bytes)
+
+
+def _download_source(arxiv_id: str) -> bytes:
+    import requests
+
+    # 0) 미러 / 로컬 stand-in이 지정돼 있으면 거기서만 받음
+    if settings.ARXIV_EPRINT_URL:
+        src_r = requests.get(settings.ARXIV_EPRINT_URL.format(arxiv_id=arxiv_id), timeout=settings.ARXIV_FETCH_TIMEOUT_S)
+        src_r.raise_for_status()
+        return src_r.content
 
     # 1) arxiv 라이브러리 우선 시도
     try:
+        import arxiv  # pip install arxiv
+
         search = arxiv.Search(id_list=[arxiv_id])
         result = next(search.results())
         src_buf = BytesIO()
@@ -83,11 +103,17 @@ def fetch_arxiv_sources(arxiv_id: str) -> dict[str, str]:
         src_bytes = src_buf.getvalue()
     except Exception:
         # 2) direct fallback
+        import certifi
+
         src_url = f"https://arxiv.org/e-print/{arxiv_id}"
-        src_r = requests.get(src_url, timeout=60, verify=certifi.where())
+        src_r = requests.get(src_url, timeout=settings.ARXIV_FETCH_TIMEOUT_S, verify=certifi.where())
         src_r.raise_for_status()
         src_bytes = src_r.content
 
+    return src_bytes
+
+
+def _read_tex_members(src_bytes: bytes) -> dict[str, str]:
     # e-print tar.gz 해제
     tex_files: dict[str, str] = {}
     with tarfile.open(fileobj=BytesIO(src_bytes), mode="r:*") as tar:
@@ -0,0 +1,413 @@
+# src/services/storage.py
+"""
+내용 주소(content-addressed) 아티팩트 저장소
+- 객체 key = 내용의 sha256 (objects/ab/abcdef...) → 같은 내용은 한 번만 저장 (중복 제거)
+- ref = 이름 → digest (refs/<name>). 단계 캐시는 "입력 해시 이름 → 출력 digest" ref로 표현
+    예) arxiv/<id> → 소스 tarball, diagram/<dot 해시> → PNG
+- 쓰기/읽기 모두 스트리밍: put(파일 객체 | bytes | bytes 청크 iterable), open(digest) → 파일 객체
+- GC: 마지막 접근 후 STORAGE_TTL_S가 지난 객체/ref 삭제 → 총 크기가 STORAGE_MAX_BYTES를 넘으면 오래 안 쓴 객체부터 삭제(LRU)
+    put 때 STORAGE_GC_INTERVAL_S마다 한 번씩 자동 실행 (gc()로 직접 호출도 가능)
+백엔드 (STORAGE_BACKEND)
+- fs     : STORAGE_DIR 아래 파일 (기본값). 같은 디렉토리를 쓰는 worker끼리 공유, 쓰기는 임시 파일 → rename
+- memory : 프로세스 안 dict (테스트 / 단일 프로세스)
+- s3     : S3 호환 저장소 (boto3 선택 패키지). STORAGE_S3_ENDPOINT로 MinIO 등 로컬 서버 지정 가능
+"""
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+from src.core import metrics
+from src.core.config import settings
+
+BACKENDS = ("fs", "memory", "s3")
+CHUNK_SIZE = 1 << 20
+_SPOOL_MAX = 8 << 20        # 이보다 큰 put은 디스크 임시 파일을 거친다
+_REF_RE = re.compile(r"^[A-Za-z0-9._-]+(/[A-Za-z0-9._-]+)*$")
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass
+class ObjectInfo:
+    key: str
+    size: int
+    accessed: float          # 마지막 접근 시각 (epoch 초). LRU / TTL 기준
+
+
+def object_key(digest: str) -> str:
+    return f"objects/{digest[:2]}/{digest}"
+
+
+def ref_key(name: str) -> str:
+    if not _REF_RE.match(name) or ".." in name:
+        raise ValueError(f"잘못된 ref 이름: {name!r}")
+    return f"refs/{name}"
+
+
+def digest_of(*parts: str | bytes) -> str:
+    """캐시 key용 해시 (입력 여러 개를 구분자와 함께 이어서)"""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8") if isinstance(p, str) else p)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# -------------------------------
+# 백엔드
+# -------------------------------
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self):
+        self._objects: dict[str, tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def exists(self, key: str) -> bool:
+        return key in self._objects
+
+    def write(self, key: str, src: BinaryIO) -> None:
+        data = src.read()
+        with self._lock:
+            self._objects[key] = (data, time.time())
+
+    def open(self, key: str) -> BinaryIO:
+        with self._lock:
+            data, _ = self._objects[key]
+            self._objects[key] = (data, time.time())
+        return io.BytesIO(data)
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            if key in self._objects:
+                self._objects[key] = (self._objects[key][0], time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        with self._lock:
+            items = [(k, v) for k, v in self._objects.items() if k.startswith(prefix)]
+        for key, (data, accessed) in items:
+            yield ObjectInfo(key, len(data), accessed)
+
+
+class FSBackend:
+    """접근 시각은 mtime으로 관리 (noatime 마운트에서도 동작하도록 읽을 때 직접 갱신)"""
+    name = "fs"
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def write(self, key: str, src: BinaryIO) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(src, f, CHUNK_SIZE)
+            os.replace(tmp, path)       # 같은 key를 동시에 써도 내용이 같으므로 마지막 rename이 이겨도 무방
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def open(self, key: str) -> BinaryIO:
+        f = open(self._path(key), "rb")
+        self.touch(key)
+        return f
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        base = self._path(prefix)
+        if not base.exists():
+            return
+        for path in base.rglob("*"):
+            if not path.is_file() or path.name.startswith(".tmp-"):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            yield ObjectInfo(path.relative_to(self.root).as_posix(), st.st_size, st.st_mtime)
+
+
+class S3Backend:
+    """
+    S3 / MinIO. 접근 시각은 LastModified로 근사하고, touch는 STORAGE_S3_TOUCH_INTERVAL_S보다
+    오래된 객체만 자기 자신으로 copy해서 갱신 (읽을 때마다 쓰기 요청이 나가지 않게)
+    """
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str = "", prefix: str = ""):
+        import boto3  # 선택 패키지: pip install boto3
+
+        if not bucket:
+            raise ValueError("STORAGE_S3_BUCKET이 비어 있음")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+
+    def _k(self, key: str) -> str:
+        return self.prefix + key
+
+    def _missing(self, e) -> bool:
+        return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._k(key))
+            return True
+        except self._client_error as e:
+            if self._missing(e):
+                return False
+            raise
+
+    def write(self, key: str, src: BinaryIO) -> None:
+        self.client.upload_fileobj(src, self.bucket, self._k(key))   # 큰 객체는 multipart로 스트리밍
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._k(key))["Body"]
+        except self._client_error as e:
+            if self._missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        self.touch(key)
+        return body
+
+    def touch(self, key: str) -> None:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._k(key))
+        except self._client_error:
+            return
+        if time.time() - head["LastModified"].timestamp() < settings.STORAGE_S3_TOUCH_INTERVAL_S:
+            return
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self._k(key), CopySource={"Bucket": self.bucket, "Key": self._k(key)},
+            MetadataDirective="REPLACE",
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._k(key))
+
+    def list(self, prefix: str) -> Iterator[ObjectInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._k(prefix)):
+            for obj in page.get("Contents", []):
+                yield ObjectInfo(obj["Key"][len(self.prefix):], obj["Size"], obj["LastModified"].timestamp())
+
+
+def _make_backend(name: str):
+    if name == "fs":
+        return FSBackend(settings.STORAGE_DIR)
+    if name == "memory":
+        return MemoryBackend()
+    if name == "s3":
+        return S3Backend(settings.STORAGE_S3_BUCKET, settings.STORAGE_S3_ENDPOINT, settings.STORAGE_S3_PREFIX)
+    raise ValueError(f"알 수 없는 저장소 백엔드: {name} (지원: {', '.join(BACKENDS)})")
+
+
+# -------------------------------
+# 저장소
+# -------------------------------
+def _chunks(src: bytes | BinaryIO | Iterable[bytes]) -> Iterator[bytes]:
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        yield bytes(src)
+    elif hasattr(src, "read"):
+        while chunk := src.read(CHUNK_SIZE):
+            yield chunk
+    else:
+        yield from src
+
+
+class ArtifactStore:
+    def __init__(self, backend):
+        self.backend = backend
+        self._last_gc = time.monotonic()
+        self._gc_lock = threading.Lock()
+
+    # --- 객체 ---
+    def put(self, src: bytes | BinaryIO | Iterable[bytes], kind: str = "") -> str:
+        """내용을 저장하고 sha256 digest를 돌려준다. 이미 있으면 쓰지 않고 접근 시각만 갱신."""
+        h = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX) as spool:
+            for chunk in _chunks(src):
+                h.update(chunk)
+                spool.write(chunk)
+            digest = h.hexdigest()
+            key = object_key(digest)
+            if self.backend.exists(key):
+                self.backend.touch(key)
+                metrics.record_artifact(kind, "dedup")
+            else:
+                spool.seek(0)
+                self.backend.write(key, spool)
+                metrics.record_artifact(kind, "stored")
+        self._maybe_gc()
+        return digest
+
+    def exists(self, digest: str) -> bool:
+        return bool(_DIGEST_RE.match(digest)) and self.backend.exists(object_key(digest))
+
+    def open(self, digest: str) -> BinaryIO:
+        """스트리밍 읽기 (with store.open(d) as f: ...). 없으면 FileNotFoundError"""
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"잘못된 digest: {digest!r}")
+        try:
+            return self.backend.open(object_key(digest))
+        except KeyError as e:
+            raise FileNotFoundError(digest) from e
+
+    def get(self, digest: str) -> bytes:
+        with self.open(digest) as f:
+            return f.read()
+
+    # --- ref (이름 → digest) ---
+    def set_ref(self, name: str, digest: str) -> None:
+        self.backend.write(ref_key(name), io.BytesIO(digest.encode("ascii")))
+
+    def get_ref(self, name: str) -> str | None:
+        """ref가 가리키는 객체가 GC로 지워졌으면 None"""
+        key = ref_key(name)
+        if not self.backend.exists(key):
+            return None
+        try:
+            with self.backend.open(key) as f:
+                digest = f.read().decode("ascii").strip()
+        except (FileNotFoundError, KeyError):
+            return None
+        return digest if self.exists(digest) else None
+
+    def delete_ref(self, name: str) -> None:
+        self.backend.delete(ref_key(name))
+
+    def list_refs(self, prefix: str = "") -> list[str]:
+        base = "refs/" + prefix
+        return [info.key[len("refs/"):] for info in self.backend.list(base)]
+
+    def put_named(self, name: str, src: bytes | BinaryIO | Iterable[bytes], kind: str = "") -> str:
+        digest = self.put(src, kind=kind or name.split("/", 1)[0])
+        self.set_ref(name, digest)
+        return digest
+
+    def get_named(self, name: str, kind: str = "") -> bytes | None:
+        """ref로 캐시 조회 (hit / miss 지표 기록)"""
+        kind = kind or name.split("/", 1)[0]
+        digest = self.get_ref(name)
+        if digest is None:
+            metrics.record_artifact(kind, "miss")
+            return None
+        try:
+            data = self.get(digest)
+        except FileNotFoundError:       # 조회와 읽기 사이에 GC로 지워진 경우
+            metrics.record_artifact(kind, "miss")
+            return None
+        metrics.record_artifact(kind, "hit")
+        return data
+
+    # --- GC ---
+    def _maybe_gc(self) -> None:
+        if not (settings.STORAGE_MAX_BYTES or settings.STORAGE_TTL_S):
+            return
+        if time.monotonic() - self._last_gc < settings.STORAGE_GC_INTERVAL_S:
+            return
+        if not self._gc_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_gc = time.monotonic()
+            self.gc()
+        finally:
+            self._gc_lock.release()
+
+    def gc(self, max_bytes: int | None = None, ttl_s: float | None = None) -> dict[str, int]:
+        """TTL 지난 객체/ref 삭제 후 총 크기가 max_bytes 이하가 될 때까지 LRU 삭제 (0 = 제한 없음)"""
+        max_bytes = settings.STORAGE_MAX_BYTES if max_bytes is None else max_bytes
+        ttl_s = settings.STORAGE_TTL_S if ttl_s is None else ttl_s
+        now = time.time()
+
+        def expired(info: ObjectInfo) -> bool:
+            return bool(ttl_s) and now - info.accessed > ttl_s
+
+        removed = freed = 0
+        for info in list(self.backend.list("refs/")):
+            if expired(info):
+                self.backend.delete(info.key)
+        live = []
+        for info in self.backend.list("objects/"):
+            if expired(info):
+                self.backend.delete(info.key)
+                removed, freed = removed + 1, freed + info.size
+            else:
+                live.append(info)
+
+        total = sum(info.size for info in live)
+        if max_bytes and total > max_bytes:
+            for info in sorted(live, key=lambda i: i.accessed):
+                if total <= max_bytes:
+                    break
+                self.backend.delete(info.key)
+                total -= info.size
+                removed, freed = removed + 1, freed + info.size
+        if removed:
+            print(f"[Storage] GC: 객체 {removed}개 삭제 ({freed / 1024:.0f} KiB), 남은 크기 {total / 1024:.0f} KiB")
+        return {"removed": removed, "freed_bytes": freed, "total_bytes": total}
+
+    def stats(self) -> dict[str, int]:
+        objects = list(self.backend.list("objects/"))
+        return {"objects": len(objects), "bytes": sum(i.size for i in objects), "refs": len(self.list_refs())}
+
+
+@lru_cache(maxsize=None)
+def get_store(name: str | None = None) -> ArtifactStore:
+    """저장소 인스턴스는 프로세스당 하나만 만든다."""
+    return ArtifactStore(_make_backend((name or settings.STORAGE_BACKEND).lower()))
+
+
+def cached_bytes(name: str) -> bytes | None:
+    """STORAGE_CACHE가 켜져 있을 때만 ref 이름으로 조회 (저장소 오류는 캐시 miss로 취급)"""
+    if not settings.STORAGE_CACHE:
+        return None
+    try:
+        return get_store().get_named(name)
+    except Exception as e:
+        print(f"[Storage] 캐시 조회 실패({name}): {e}")
+        return None
+
+
+def cache_bytes(name: str, data: bytes) -> None:
+    """STORAGE_CACHE가 켜져 있을 때만 저장 (실패해도 요청은 계속)"""
+    if not settings.STORAGE_CACHE:
+        return
+    try:
+        get_store().put_named(name, data)
+    except Exception as e:
+        print(f"[Storage] 캐시 저장 실패({name}): {e}")
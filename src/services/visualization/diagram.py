@@ -1,9 +1,12 @@
 from pathlib import Path
-from graphviz import Source
 from io import BytesIO
-from PIL import Image, ImageDraw
 import re
 
+from src.core import metrics
+from src.services import storage
+from src.services.visualization.dot_validator import validate_dot
+from src.services.visualization.render_backend import get_render_backend
+
 _ENGINE_MAP = {
     "dot": "dot",
     "neato": "neato",
@@ -42,15 +45,10 @@ def ensure_graph_wrapper(dot_code) -> str:
         body = 'dummy [label="auto_fixed"];'
     return f"digraph G {{\n{body}\n}}"
 
-def sanitize_dot(dot_code: str) -> str:
-    """닫히지 않은 따옴표 같은 흔한 오류를 보정"""
-    # 닫히지 않은 큰따옴표 제거
-    if dot_code.count('"') % 2 == 1:
-        dot_code = dot_code.rsplit('"', 1)[0] + '"'
-    return dot_code
-
 def _make_fallback_png(message: str) -> BytesIO:
     """Graphviz 실패 시 대체 PNG 생성"""
+    from PIL import Image, ImageDraw
+
     img = Image.new("RGB", (800, 600), "white")
     d = ImageDraw.Draw(img)
     d.text((10, 10), f"Graphviz error:\n{message}", fill="black")
@@ -59,17 +57,44 @@ def _make_fallback_png(message: str) -> BytesIO:
     buf.seek(0)
     return buf
 
+def _timed_render(backend, dot_code: str, engine: str) -> bytes:
+    # 같은 DOT/엔진으로 렌더한 PNG는 저장소에서 재사용 (실패한 렌더는 저장하지 않음)
+    cache_name = f"diagram/{storage.digest_of(backend.name, engine, dot_code)}"
+    if cached := storage.cached_bytes(cache_name):
+        return cached
+    with metrics.stage("render", engine=f"{backend.name}:{engine}"):
+        png_bytes = backend.render(dot_code, engine=engine, fmt="png")
+    storage.cache_bytes(cache_name, png_bytes)
+    return png_bytes
+
 def render_diagram(dot_code: str, out_dir: Path | None = None, scene_id: int = 0, *, in_memory: bool = False):
     dot_code = ensure_graph_wrapper(dot_code)
-    dot_code = sanitize_dot(dot_code)
+
+    # Graphviz subprocess 전에 검증/수리 → 렌더 불가능한 DOT는 바로 fallback
+    check = validate_dot(dot_code)
+    dot_code = check.dot
+    if not check.ok:
+        message = "; ".join(i.message for i in check.unresolved)
+        metrics.record_fallback_render("unrenderable_dot")
+        if in_memory:
+            return _make_fallback_png(message)
+        if out_dir is None:
+            raise ValueError("out_dir must be provided when in_memory=False")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / f"scene_{scene_id}.png"
+        with open(out_path, "wb") as f:
+            f.write(_make_fallback_png(message).getvalue())
+        return out_path
+
     engine = detect_engine(dot_code)
+    backend = get_render_backend()
 
     if in_memory:
         try:
-            src = Source(dot_code, engine=engine)
-            png_bytes = src.pipe(format="png")
+            png_bytes = _timed_render(backend, dot_code, engine)
             return BytesIO(png_bytes)   # 정상 PNG
         except Exception as e:
+            metrics.record_fallback_render("graphviz_error")
             return _make_fallback_png(str(e))   # 실패 시 fallback PNG
     else:
         if out_dir is None:
@@ -83,10 +108,12 @@ def render_diagram(dot_code: str, out_dir: Path | None = None, scene_id: int = 0
             f.write(dot_code)
 
         try:
-            src = Source(dot_code, filename=str(out_path.with_suffix("")), format="png", engine=engine)
-            src.render(cleanup=True)
+            png_bytes = _timed_render(backend, dot_code, engine)
+            with open(out_path, "wb") as f:
+                f.write(png_bytes)
             return out_path
         except Exception as e:
+            metrics.record_fallback_render("graphviz_error")
             # fallback PNG 파일 생성
             buf = _make_fallback_png(str(e))
             with open(out_path, "wb") as f:
@@ -0,0 +1,383 @@
+# src/services/visualization/dot_ast.py
+"""
+경량 DOT 토크나이저 / 파서 / 직렬화기
+- 정규식 하나로 한 번에 토큰화 (선형 시간)
+- 재귀 하강 파서 → 최소한의 AST (Graph / Subgraph / NodeStmt / EdgeStmt / AttrStmt / Assign)
+- 잘못된 DOT는 Graphviz 호출 전에 DotSyntaxError로 검출
+- serialize()는 AST를 한 번에 DOT 문자열로 출력
+"""
+
+import re
+from dataclasses import dataclass, field
+
+
+class DotSyntaxError(ValueError):
+    def __init__(self, message: str, pos: int = -1, line: int = -1):
+        super().__init__(f"{message} (line {line})" if line >= 0 else message)
+        self.message = message
+        self.pos = pos
+        self.line = line
+
+
+# -------------------------------
+# AST
+# -------------------------------
+@dataclass
+class DotValue:
+    """ID 값. kind: "id"(bare/숫자) | "quoted"("...") | "html"(<...>)"""
+    text: str
+    kind: str = "id"
+
+    def serialize(self) -> str:
+        if self.kind == "quoted":
+            return f'"{self.text}"'
+        if self.kind == "html":
+            return f"<{self.text}>"
+        return self.text
+
+
+@dataclass
+class Attr:
+    key: str
+    value: DotValue
+
+
+@dataclass
+class NodeId:
+    id: DotValue
+    port: str = ""          # ":port:compass" 원문 그대로
+
+    def serialize(self) -> str:
+        return self.id.serialize() + self.port
+
+
+@dataclass
+class NodeStmt:
+    node: NodeId
+    attrs: list[Attr] = field(default_factory=list)
+
+
+@dataclass
+class EdgeStmt:
+    operands: list  # NodeId | Subgraph
+    attrs: list[Attr] = field(default_factory=list)
+
+
+@dataclass
+class AttrStmt:
+    target: str             # "graph" | "node" | "edge"
+    attrs: list[Attr] = field(default_factory=list)
+
+
+@dataclass
+class Assign:
+    key: str
+    value: DotValue
+
+
+@dataclass
+class Subgraph:
+    id: DotValue | None = None
+    body: list = field(default_factory=list)
+    keyword: bool = True    # "subgraph" 키워드 명시 여부
+
+
+@dataclass
+class Graph:
+    directed: bool = True
+    strict: bool = False
+    id: DotValue | None = None
+    body: list = field(default_factory=list)
+
+
+# -------------------------------
+# 토크나이저
+# -------------------------------
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/|^\#[^\n]*)
+  | (?P<quoted>"(?:\\.|[^"\\])*")
+  | (?P<edgeop>->|--)
+  | (?P<ellipsis>\.{2,}|…)
+  | (?P<numeral>-?(?:\.\d+|\d+(?:\.\d*)?))
+  | (?P<id>[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*)
+  | (?P<html><)
+  | (?P<punct>[{}\[\];,=:+])
+    """,
+    re.VERBOSE | re.DOTALL | re.MULTILINE,
+)
+
+_ANGLE_RE = re.compile(r"[<>]")
+_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+
+@dataclass
+class Token:
+    kind: str   # id | quoted | html | edgeop | punct | kw | eof
+    value: str
+    pos: int
+
+
+def _line_of(text: str, pos: int) -> int:
+    return text.count("\n", 0, pos) + 1
+
+
+def _scan_html(text: str, start: int) -> int:
+    """'<'에서 시작하는 HTML 문자열의 끝 위치(닫는 '>' 다음) 반환"""
+    depth = 0
+    for m in _ANGLE_RE.finditer(text, start):
+        depth += 1 if m.group() == "<" else -1
+        if depth == 0:
+            return m.end()
+    raise DotSyntaxError("닫히지 않은 HTML label", start, _line_of(text, start))
+
+
+def tokenize(text: str) -> list[Token]:
+    tokens: list[Token] = []
+    pos, n = 0, len(text)
+    match = _TOKEN_RE.match
+    while pos < n:
+        m = match(text, pos)
+        if not m:
+            ch = text[pos]
+            if ch == '"':
+                raise DotSyntaxError("닫히지 않은 따옴표", pos, _line_of(text, pos))
+            raise DotSyntaxError(f"예상치 못한 문자 {ch!r}", pos, _line_of(text, pos))
+        kind = m.lastgroup
+        if kind in ("ws", "comment"):
+            pos = m.end()
+            continue
+        if kind == "html":
+            end = _scan_html(text, pos)
+            tokens.append(Token("html", text[pos + 1 : end - 1], pos))
+            pos = end
+            continue
+        value = m.group()
+        if kind == "quoted":
+            tokens.append(Token("quoted", value[1:-1], pos))
+        elif kind == "ellipsis":
+            tokens.append(Token("id", "...", pos))
+        elif kind in ("id", "numeral"):
+            low = value.lower()
+            tokens.append(Token("kw", low, pos) if low in _KEYWORDS else Token("id", value, pos))
+        else:
+            tokens.append(Token(kind, value, pos))
+        pos = m.end()
+    tokens.append(Token("eof", "", n))
+    return tokens
+
+
+# -------------------------------
+# 파서
+# -------------------------------
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.toks = tokenize(text)
+        self.i = 0
+
+    # --- 토큰 유틸 ---
+    def peek(self, k: int = 0) -> Token:
+        return self.toks[min(self.i + k, len(self.toks) - 1)]
+
+    def next(self) -> Token:
+        tok = self.toks[self.i]
+        if tok.kind != "eof":
+            self.i += 1
+        return tok
+
+    def accept(self, kind: str, value: str | None = None) -> Token | None:
+        tok = self.peek()
+        if tok.kind == kind and (value is None or tok.value == value):
+            return self.next()
+        return None
+
+    def expect(self, kind: str, value: str | None = None) -> Token:
+        tok = self.accept(kind, value)
+        if tok is None:
+            got = self.peek()
+            want = value or kind
+            raise DotSyntaxError(f"'{want}' 필요, '{got.value or got.kind}' 발견", got.pos, _line_of(self.text, got.pos))
+        return tok
+
+    def error(self, msg: str) -> DotSyntaxError:
+        tok = self.peek()
+        return DotSyntaxError(msg, tok.pos, _line_of(self.text, tok.pos))
+
+    # --- 문법 ---
+    def value(self) -> DotValue | None:
+        tok = self.peek()
+        if tok.kind == "id":
+            self.next()
+            return DotValue(tok.value, "id")
+        if tok.kind == "html":
+            self.next()
+            return DotValue(tok.value, "html")
+        if tok.kind == "quoted":
+            self.next()
+            text = tok.value
+            # "a" + "b" 문자열 연결
+            while self.peek().kind == "punct" and self.peek().value == "+" and self.peek(1).kind == "quoted":
+                self.next()
+                text += self.next().value
+            return DotValue(text, "quoted")
+        return None
+
+    def graph(self) -> Graph:
+        g = Graph()
+        if self.accept("kw", "strict"):
+            g.strict = True
+        tok = self.next()
+        if tok.kind != "kw" or tok.value not in ("graph", "digraph"):
+            raise DotSyntaxError("'graph' 또는 'digraph'로 시작해야 함", tok.pos, _line_of(self.text, tok.pos))
+        g.directed = tok.value == "digraph"
+        g.id = self.value()
+        self.expect("punct", "{")
+        g.body = self.stmt_list()
+        self.expect("punct", "}")
+        return g
+
+    def stmt_list(self) -> list:
+        body = []
+        while True:
+            tok = self.peek()
+            if tok.kind == "eof":
+                raise self.error("닫히지 않은 중괄호")
+            if tok.kind == "punct" and tok.value == "}":
+                return body
+            if self.accept("punct", ";"):
+                continue
+            body.append(self.stmt())
+            self.accept("punct", ";")
+
+    def attr_list(self) -> list[Attr]:
+        attrs: list[Attr] = []
+        while self.accept("punct", "["):
+            while not self.accept("punct", "]"):
+                key = self.value()
+                if key is None:
+                    raise self.error("속성 이름 필요")
+                if self.accept("punct", "="):
+                    val = self.value()
+                    if val is None:
+                        raise self.error(f"'{key.text}' 속성 값 필요")
+                else:
+                    val = DotValue("true")
+                attrs.append(Attr(key.text, val))
+                self.accept("punct", ",") or self.accept("punct", ";")
+        return attrs
+
+    def subgraph(self) -> Subgraph:
+        sg = Subgraph(keyword=False)
+        if self.accept("kw", "subgraph"):
+            sg.keyword = True
+            sg.id = self.value()
+        self.expect("punct", "{")
+        sg.body = self.stmt_list()
+        self.expect("punct", "}")
+        return sg
+
+    def node_id(self) -> NodeId:
+        v = self.value()
+        if v is None:
+            raise self.error("노드 ID 필요")
+        port = ""
+        while self.peek().kind == "punct" and self.peek().value == ":":
+            self.next()
+            p = self.value()
+            if p is None:
+                raise self.error("포트 이름 필요")
+            port += ":" + p.serialize()
+        return NodeId(v, port)
+
+    def operand(self):
+        tok = self.peek()
+        if (tok.kind == "kw" and tok.value == "subgraph") or (tok.kind == "punct" and tok.value == "{"):
+            return self.subgraph()
+        return self.node_id()
+
+    def stmt(self):
+        tok = self.peek()
+        if tok.kind == "kw" and tok.value in ("graph", "node", "edge"):
+            self.next()
+            return AttrStmt(tok.value, self.attr_list())
+
+        # ID '=' ID
+        if tok.kind in ("id", "quoted", "html") and self.peek(1).kind == "punct" and self.peek(1).value == "=":
+            key = self.value()
+            self.next()
+            val = self.value()
+            if val is None:
+                raise self.error(f"'{key.text}' 값 필요")
+            return Assign(key.text, val)
+
+        first = self.operand()
+        if self.peek().kind == "edgeop":
+            operands = [first]
+            while self.accept("edgeop"):
+                operands.append(self.operand())
+            return EdgeStmt(operands, self.attr_list())
+        if isinstance(first, Subgraph):
+            return first
+        return NodeStmt(first, self.attr_list())
+
+
+def parse_dot(text: str) -> Graph:
+    """DOT 문자열 → Graph AST. 첫 그래프 뒤의 잔여 텍스트는 무시."""
+    return _Parser(text).graph()
+
+
+# -------------------------------
+# 직렬화
+# -------------------------------
+def _attrs_str(attrs: list[Attr]) -> str:
+    return "[" + ", ".join(f"{a.key}={a.value.serialize()}" for a in attrs) + "]"
+
+
+class _Writer:
+    def __init__(self, edge_op: str):
+        self.edge_op = f" {edge_op} "
+
+    def operand(self, op, indent: str) -> str:
+        if isinstance(op, Subgraph):
+            return self.subgraph(op, indent)
+        return op.serialize()
+
+    def subgraph(self, sg: Subgraph, indent: str) -> str:
+        head = ("subgraph " + (sg.id.serialize() + " " if sg.id else "")) if sg.keyword else ""
+        inner = self.body(sg.body, indent + "  ")
+        if not inner:
+            return head + "{}"
+        return head + "{\n" + "\n".join(inner) + "\n" + indent + "}"
+
+    def stmt(self, stmt, indent: str) -> str:
+        if isinstance(stmt, AttrStmt):
+            return f"{stmt.target} {_attrs_str(stmt.attrs)};"
+        if isinstance(stmt, Assign):
+            return f"{stmt.key}={stmt.value.serialize()};"
+        if isinstance(stmt, NodeStmt):
+            attrs = f" {_attrs_str(stmt.attrs)}" if stmt.attrs else ""
+            return f"{stmt.node.serialize()}{attrs};"
+        if isinstance(stmt, EdgeStmt):
+            chain = self.edge_op.join(self.operand(op, indent) for op in stmt.operands)
+            attrs = f" {_attrs_str(stmt.attrs)}" if stmt.attrs else ""
+            return f"{chain}{attrs};"
+        if isinstance(stmt, Subgraph):
+            return self.subgraph(stmt, indent)
+        raise TypeError(f"알 수 없는 DOT 문장: {stmt!r}")
+
+    def body(self, body: list, indent: str) -> list[str]:
+        return [indent + self.stmt(stmt, indent) for stmt in body]
+
+
+def serialize(graph: Graph) -> str:
+    """Graph AST → DOT 문자열 (한 번에 출력)"""
+    writer = _Writer("->" if graph.directed else "--")
+    head = ("strict " if graph.strict else "") + ("digraph" if graph.directed else "graph")
+    if graph.id:
+        head += " " + graph.id.serialize()
+    lines = [head + " {"]
+    lines.extend(writer.body(graph.body, "  "))
+    lines.append("}")
+    return "\n".join(lines)
@@ -2,17 +2,19 @@
 import re
 import textwrap
 
+from src.services.visualization.dot_ast import (
+    Assign, Attr, AttrStmt, DotSyntaxError, DotValue, EdgeStmt, Graph, NodeId, NodeStmt, Subgraph,
+    parse_dot, serialize,
+)
+
 # -------------------------------
 # 유틸 함수
 # -------------------------------
+_UNESCAPE_MAP = {"\\n": "\n", '\\"': '"', "\\t": "\t", "\\r": ""}
+_UNESCAPE_RE = re.compile(r'\\[n"tr]')
+
 def _unescape_dot_string(dot_str: str) -> str:
-    return (
-        dot_str
-        .replace("\\n", "\n")
-        .replace('\\"', '"')
-        .replace("\\t", "\t")
-        .replace("\\r", "")
-    )
+    return _UNESCAPE_RE.sub(lambda m: _UNESCAPE_MAP[m.group()], dot_str)
 
 def _insert_after_open_brace(dot_code: str, lines_to_insert: list[str]) -> str:
     """DOT 본문 블록 내부에 안전 삽입"""
@@ -187,6 +189,183 @@ def inject_style(dot_code: str) -> str:
         dot_code = _insert_after_open_brace(dot_code, additions)
     return dot_code
 
+# -------------------------------
+# AST 기반 정규화 (한 번 순회 + 한 번 직렬화)
+# -------------------------------
+_GRAPH_DEFAULTS = [
+    ("bgcolor", DotValue("white", "quoted")),
+    ("ranksep", DotValue("0.6")),
+    ("nodesep", DotValue("0.4")),
+    ("splines", DotValue("true")),
+    ("overlap", DotValue("false")),
+    ("sep", DotValue("0.3")),
+    ("clusterrank", DotValue("local")),
+    ("outputorder", DotValue("edgesfirst")),
+]
+_RECORD_SHAPES = {"record", "mrecord"}
+_LABEL_ESCAPES = {
+    "&": "&amp;", "<": "&lt;", ">": "&gt;", "+": "&#43;",
+    "|": "&#124;", "[": "&#91;", "]": "&#93;", '"': "'",
+}
+_LABEL_ESCAPE_RE = re.compile(r'[&<>+|\[\]"]')
+_DOT_LINEBREAK_RE = re.compile(r"\\[nlr]|\n")
+
+
+def _html_label(raw: str, max_len: int = 200) -> str:
+    """quoted label 원문 → HTML label 본문 (escape + 긴 줄 자동 줄바꿈)"""
+    text = raw.replace('\\"', '"').replace("\\\\", "\\")
+    parts = []
+    for line in _DOT_LINEBREAK_RE.split(text):
+        wrapped = textwrap.wrap(line, width=max_len) if len(line) > max_len else [line]
+        parts.extend(wrapped or [""])
+    return "<BR/>".join(_LABEL_ESCAPE_RE.sub(lambda m: _LABEL_ESCAPES[m.group()], p) for p in parts)
+
+
+class _DotFacts:
+    """순회 중 수집한 정보 (기존 regex 패스들의 `"xxx=" in dot_code` 검사 대체)"""
+
+    def __init__(self):
+        self.keys: set[str] = set()         # 어디서든 등장한 속성 키
+        self.layout: str | None = None
+        self.cluster_hint = False           # cluster_encoder / cluster_decoder
+        self.edge_color_default = False     # edge [color=...] 존재
+        self.first_graph_attrs: AttrStmt | None = None
+        self.first_attr_node: str | None = None
+        self.uses_ellipsis = False
+        self.defines_ellipsis = False
+
+
+def _visit(body: list, facts: _DotFacts, top_level: bool, max_label_len: int) -> None:
+    for stmt in body:
+        if isinstance(stmt, Subgraph):
+            if stmt.id and stmt.id.text in ("cluster_encoder", "cluster_decoder"):
+                facts.cluster_hint = True
+            _visit(stmt.body, facts, False, max_label_len)
+            continue
+
+        if isinstance(stmt, Assign):
+            facts.keys.add(stmt.key)
+            if stmt.key == "layout":
+                facts.layout = facts.layout or stmt.value.text
+            elif stmt.key == "label" and stmt.value.kind == "quoted":
+                stmt.value = DotValue(_html_label(stmt.value.text, max_label_len), "html")
+            continue
+
+        if isinstance(stmt, EdgeStmt):
+            for i, op in enumerate(stmt.operands):
+                if isinstance(op, Subgraph):
+                    _visit(op.body, facts, False, max_label_len)
+                elif op.id.text == "..." and op.id.kind == "id":
+                    # a -> ... -> b 체인 → ellipsis 노드
+                    stmt.operands[i] = NodeId(DotValue("ellipsis"), op.port)
+                    facts.uses_ellipsis = True
+        elif isinstance(stmt, NodeStmt):
+            if stmt.node.id.text == "ellipsis":
+                facts.defines_ellipsis = True
+            if stmt.attrs and facts.first_attr_node is None:
+                facts.first_attr_node = stmt.node.id.serialize()
+        elif isinstance(stmt, AttrStmt):
+            if stmt.target == "graph" and top_level and facts.first_graph_attrs is None:
+                facts.first_graph_attrs = stmt
+            if stmt.target == "edge" and any(a.key == "color" for a in stmt.attrs):
+                facts.edge_color_default = True
+
+        attrs = getattr(stmt, "attrs", [])
+        is_record = any(a.key == "shape" and a.value.text.lower() in _RECORD_SHAPES for a in attrs)
+        for a in attrs:
+            facts.keys.add(a.key)
+            if a.key == "layout" and facts.layout is None:
+                facts.layout = a.value.text
+            # quoted label → HTML label (record shape는 필드 구분자 때문에 유지)
+            if a.key == "label" and a.value.kind == "quoted" and not is_record:
+                a.value = DotValue(_html_label(a.value.text, max_label_len), "html")
+
+
+def _detect_engine_from_facts(facts: _DotFacts) -> str:
+    if "rankdir" in facts.keys or facts.cluster_hint:
+        return "dot"
+    if facts.layout:
+        return _ENGINE_MAP.get(facts.layout.lower(), "dot")
+    return "dot"
+
+
+def normalize_dot(dot_code: str, font: str = "Malgun Gothic", max_label_len: int = 200) -> tuple[str, str]:
+    """
+    DOT 문자열 → (정규화된 DOT, 엔진)
+    - 파싱 1회 + 순회 1회 + 직렬화 1회
+    - 파싱 불가능한 DOT는 DotSyntaxError
+    """
+    graph: Graph = parse_dot(dot_code)
+    facts = _DotFacts()
+    _visit(graph.body, facts, True, max_label_len)
+
+    ellipsis_stmts, font_stmts, default_stmts, hint_stmts, style_stmts = [], [], [], [], []
+
+    if facts.uses_ellipsis and not facts.defines_ellipsis:
+        ellipsis_stmts.append(NodeStmt(NodeId(DotValue("ellipsis")), [
+            Attr("shape", DotValue("point")), Attr("width", DotValue("0.02")), Attr("label", DotValue("", "quoted")),
+        ]))
+
+    if "fontname" not in facts.keys:
+        font_value = DotValue(font, "quoted")
+        font_stmts.append(AttrStmt("node", [Attr("fontname", font_value)]))
+        font_stmts.append(AttrStmt("edge", [Attr("fontname", font_value)]))
+        facts.keys.add("fontname")
+
+    # 겹침 방지 기본 graph 속성: 첫 graph [...]에 병합, 없으면 새로 삽입
+    target = facts.first_graph_attrs
+    present = {a.key for a in target.attrs} if target else set()
+    missing = [Attr(k, v) for k, v in _GRAPH_DEFAULTS if k not in present]
+    if target:
+        target.attrs.extend(missing)
+    else:
+        default_stmts.append(AttrStmt("graph", missing))
+    facts.keys.update(a.key for a in missing)
+
+    engine = _detect_engine_from_facts(facts)
+    if engine == "twopi" and "root" not in facts.keys and facts.first_attr_node:
+        hint_stmts.append(AttrStmt("graph", [Attr("root", DotValue(facts.first_attr_node))]))
+    if engine == "neato":
+        if "mode" not in facts.keys:
+            hint_stmts.append(AttrStmt("graph", [Attr("mode", DotValue("KK"))]))
+        if "sep" not in facts.keys:
+            hint_stmts.append(AttrStmt("graph", [Attr("sep", DotValue("+1", "quoted"))]))
+
+    if "bgcolor" not in facts.keys:
+        style_stmts.append(AttrStmt("graph", [Attr("bgcolor", DotValue("#fffdf7", "quoted")), Attr("style", DotValue("filled"))]))
+    if "fillcolor" not in facts.keys:
+        style_stmts.append(AttrStmt("node", [
+            Attr("style", DotValue("filled,rounded", "quoted")),
+            Attr("fillcolor", DotValue("#fff2b2:#ffd966", "quoted")),
+            Attr("gradientangle", DotValue("90")),
+            Attr("color", DotValue("#e6a700", "quoted")),
+            Attr("fontcolor", DotValue("#000000", "quoted")),
+            Attr("shape", DotValue("box")),
+        ]))
+    if not facts.edge_color_default:
+        style_stmts.append(AttrStmt("edge", [Attr("color", DotValue("#d4a017", "quoted")), Attr("penwidth", DotValue("1.5"))]))
+
+    # 기존 regex 패스들의 "맨 위 삽입" 순서와 동일하게: 나중에 삽입된 것이 위로
+    graph.body = style_stmts + hint_stmts + default_stmts + font_stmts + ellipsis_stmts + graph.body
+    return serialize(graph), engine
+
+
+def _legacy_clean(dot_code: str) -> str:
+    """파싱 불가능한 DOT용 기존 regex 패스 체인"""
+    dot_code = sanitize_ellipsis(dot_code)
+    dot_code = force_html_labels(dot_code)
+    dot_code = sanitize_labels(dot_code)
+    dot_code = inject_font(dot_code, "Malgun Gothic")
+    dot_code = inject_graph_defaults(dot_code)
+
+    # 엔진 감지 후 힌트 삽입
+    engine = detect_engine(dot_code)
+    dot_code = inject_engine_hints(dot_code, engine)
+
+    # 스타일 주입
+    return inject_style(dot_code)
+
+
 # -------------------------------
 # 메인 엔트리
 # -------------------------------
@@ -205,18 +384,13 @@ def clean_viz_entry(entry: dict[str, object]) -> dict[str, object]:
         dot_code = "digraph G { dummy [label=\"auto_fallback\"]; }"
 
     dot_code = _unescape_dot_string(dot_code)
-    dot_code = sanitize_ellipsis(dot_code)
-    dot_code = force_html_labels(dot_code)
-    dot_code = sanitize_labels(dot_code)   # ✅ 추가
-    dot_code = inject_font(dot_code, "Malgun Gothic")
-    dot_code = inject_graph_defaults(dot_code)
-
-    # 엔진 감지 후 힌트 삽입
-    engine = detect_engine(dot_code)
-    dot_code = inject_engine_hints(dot_code, engine)
-
-    # 스타일 주입
-    dot_code = inject_style(dot_code)
+    try:
+        dot_code, engine = normalize_dot(dot_code, "Malgun Gothic")
+        entry.pop("dot_error", None)
+    except DotSyntaxError as e:
+        # Graphviz 호출 전에 문법 오류 기록, 기존 regex 보정으로 최대한 살림
+        entry["dot_error"] = str(e)
+        dot_code = _legacy_clean(dot_code)
 
     entry["diagram"] = dot_code
     return entry
@@ -0,0 +1,331 @@
+# src/services/visualization/dot_validator.py
+"""
+렌더 전 DOT 검증 + 결정적 자동 수리
+- 괄호/따옴표 균형, HTML label 태그 중첩, 노드 ID 규칙, 크기 제한(노드/에지/label 길이)
+- 고칠 수 있는 것은 바로 고치고, 못 고친 것은 구조화된 issue로 반환
+  → 해당 scene 하나만 LLM에 싸게 다시 물어볼 수 있음 (ensure_valid_dot의 reask)
+- Graphviz subprocess를 띄우기 전에 실패할 DOT를 걸러낸다
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from src.services.visualization.dot_cleaner import clean_viz_entry
+from src.services.visualization.dot_ast import (
+    Attr, AttrStmt, DotSyntaxError, DotValue, EdgeStmt, Graph, NodeId, NodeStmt, Subgraph,
+    parse_dot, serialize,
+)
+
+
+@dataclass(frozen=True)
+class DotLimits:
+    max_nodes: int = 40
+    max_edges: int = 80
+    max_label_len: int = 100     # 태그 제외 글자 수
+    max_chars: int = 20000       # DOT 전체 길이
+
+
+DEFAULT_LIMITS = DotLimits()
+
+
+@dataclass
+class DotIssue:
+    code: str                    # unbalanced_braces | unterminated_quote | syntax | html_label | illegal_node_id | label_too_long | too_many_nodes | too_many_edges | too_large
+    message: str
+    severity: str = "error"      # error: Graphviz 실패 예상 / warning: 렌더는 되지만 품질 저하
+    line: int = -1
+    repaired: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class DotValidation:
+    dot: str
+    issues: list[DotIssue] = field(default_factory=list)
+
+    @property
+    def unresolved(self) -> list[DotIssue]:
+        return [i for i in self.issues if not i.repaired]
+
+    @property
+    def ok(self) -> bool:
+        """Graphviz에 넘겨도 되는지 (수리 안 된 error 없음)"""
+        return not any(i.severity == "error" for i in self.unresolved)
+
+    @property
+    def clean(self) -> bool:
+        """수리 안 된 issue가 하나도 없음"""
+        return not self.unresolved
+
+
+# -------------------------------
+# 1) 텍스트 단계: 따옴표 / 중괄호
+# -------------------------------
+_STRUCT_RE = re.compile(r'"(?:\\.|[^"\\])*"|"|//[^\n]*|/\*.*?\*/|[{}<>]', re.S)
+
+
+def _repair_structure(text: str, issues: list[DotIssue], repair: bool) -> str:
+    """
+    한 번의 스캔으로 닫히지 않은 따옴표, 남는/모자란 중괄호를 찾는다.
+    HTML label(<...>) 내부의 중괄호는 세지 않는다.
+    """
+    start_issues = len(issues)
+    out: list[str] = []
+    last = 0
+    depth = 0
+    angle = 0
+    for m in _STRUCT_RE.finditer(text):
+        tok = m.group()
+        if tok == '"':
+            # 닫히지 않은 따옴표 → 같은 줄의 ']' 또는 ';' 앞(없으면 줄 끝)에서 닫는다
+            line_end = text.find("\n", m.start())
+            line_end = len(text) if line_end == -1 else line_end
+            seg = text[m.start() + 1 : line_end]
+            cut = min((p for p in (seg.find("]"), seg.find(";")) if p != -1), default=len(seg))
+            del issues[start_issues:]
+            issues.append(DotIssue("unterminated_quote", "닫히지 않은 따옴표", line=text.count("\n", 0, m.start()) + 1, repaired=repair))
+            if not repair:
+                return text
+            # 따옴표를 닫은 텍스트로 처음부터 다시 스캔 (닫을 때마다 짝 없는 따옴표가 하나씩 줄어든다)
+            pos = m.start() + 1 + cut
+            return _repair_structure(text[:pos] + '"' + text[pos:], issues, repair)
+        if tok in "<>":
+            angle = max(0, angle + (1 if tok == "<" else -1))
+            continue
+        if angle or tok[0] in '"/':
+            continue
+        if tok == "{":
+            depth += 1
+        elif tok == "}":
+            if depth == 0:
+                issues.append(DotIssue("unbalanced_braces", "짝 없는 '}'", line=text.count("\n", 0, m.start()) + 1, repaired=repair))
+                if repair:
+                    out.append(text[last : m.start()])
+                    last = m.end()
+                continue
+            depth -= 1
+    out.append(text[last:])
+    fixed = "".join(out)
+    if depth > 0:
+        issues.append(DotIssue("unbalanced_braces", f"닫히지 않은 '{{' {depth}개", repaired=repair))
+        if repair:
+            fixed = fixed.rstrip() + "\n" + "}" * depth
+    return fixed
+
+
+# -------------------------------
+# 2) AST 단계: label / 노드 ID / 크기
+# -------------------------------
+# bare ID 규칙 (dot_ast 토크나이저와 동일, 한글 등 유니코드 허용). quoted / HTML ID는 항상 합법
+_LEGAL_ID_RE = re.compile(r"^(?:[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*|-?(?:\.\d+|\d+(?:\.\d*)?))$")
+_TAG_RE = re.compile(r"<\s*(/?)\s*([A-Za-z]+)[^<>]*?(/?)\s*>")
+_HTML_TAGS = {"font", "b", "i", "u", "o", "s", "sub", "sup", "br", "hr", "vr", "table", "tr", "td", "img"}
+_VOID_TAGS = {"br", "hr", "vr", "img"}
+_BARE_AMP_RE = re.compile(r"&(?!#?\w+;)")
+
+
+def _check_html(text: str) -> str | None:
+    """HTML label 태그 중첩 검사. 문제 없으면 None, 있으면 사유"""
+    stack: list[str] = []
+    for m in _TAG_RE.finditer(text):
+        closing, name, self_close = m.group(1), m.group(2).lower(), m.group(3)
+        if name not in _HTML_TAGS:
+            return f"허용되지 않는 태그 <{name}>"
+        if self_close or name in _VOID_TAGS:
+            continue
+        if closing:
+            if not stack or stack[-1] != name:
+                return f"짝이 맞지 않는 </{name}>"
+            stack.pop()
+        else:
+            stack.append(name)
+    if stack:
+        return f"닫히지 않은 <{stack[-1]}>"
+    # 태그 밖에 남은 꺾쇠는 HTML 문법 오류
+    if "<" in _TAG_RE.sub("", text) or ">" in _TAG_RE.sub("", text):
+        return "escape되지 않은 '<' 또는 '>'"
+    return None
+
+
+def _html_text(text: str) -> str:
+    """태그를 걷어낸 표시 텍스트 (<BR/>는 공백)"""
+    return _TAG_RE.sub(lambda m: " " if m.group(2).lower() == "br" else "", text).strip()
+
+
+def _escape_html(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _unescape_entities(text: str) -> str:
+    return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+class _AstChecker:
+    def __init__(self, limits: DotLimits, issues: list[DotIssue], repair: bool):
+        self.limits = limits
+        self.issues = issues
+        self.repair = repair
+        self.nodes: set[str] = set()
+        self.edges = 0
+        self.renamed: dict[str, str] = {}
+        self.labeled: set[str] = set()      # label을 가진 NodeStmt의 노드 (수리 후 ID)
+        self.node_stmts: dict[str, NodeStmt] = {}
+
+    def issue(self, code: str, message: str, severity: str = "error", repaired: bool = False) -> None:
+        self.issues.append(DotIssue(code, message, severity=severity, repaired=repaired))
+
+    # --- 노드 ID ---
+    def node(self, nid: NodeId) -> None:
+        raw = nid.id.text
+        if raw in self.renamed:
+            nid.id = DotValue(self.renamed[raw])
+        elif nid.id.kind == "id" and not _LEGAL_ID_RE.match(raw):
+            self.issue("illegal_node_id", f"노드 ID 규칙 위반: {raw[:30]!r}", repaired=self.repair)
+            if self.repair:
+                new_id = f"fixed_node_{len(self.renamed) + 1}"
+                self.renamed[raw] = new_id
+                nid.id = DotValue(new_id)
+        self.nodes.add(nid.id.text)
+
+    # --- label ---
+    def label(self, attr: Attr) -> None:
+        v = attr.value
+        if v.kind == "html":
+            problem = _check_html(v.text)
+            if problem:
+                self.issue("html_label", f"HTML label 오류: {problem}", repaired=self.repair)
+                if self.repair:
+                    v = DotValue(_escape_html(_unescape_entities(_html_text(v.text))), "html")
+            elif _BARE_AMP_RE.search(v.text):
+                self.issue("html_label", "escape되지 않은 '&'", severity="warning", repaired=self.repair)
+                if self.repair:
+                    v = DotValue(_BARE_AMP_RE.sub("&amp;", v.text), "html")
+            shown = _unescape_entities(_html_text(v.text))
+        else:
+            shown = v.text
+
+        if len(shown) > self.limits.max_label_len:
+            self.issue("label_too_long", f"label {len(shown)}자 > {self.limits.max_label_len}자", severity="warning", repaired=self.repair)
+            if self.repair:
+                cut = shown[: self.limits.max_label_len - 1] + "…"
+                v = DotValue(_escape_html(cut), "html") if v.kind == "html" else DotValue(cut.replace('"', "'"), v.kind)
+        attr.value = v
+
+    def attrs(self, attrs: list[Attr]) -> None:
+        for a in attrs:
+            if a.key in ("label", "xlabel", "headlabel", "taillabel"):
+                self.label(a)
+
+    # --- 순회 ---
+    def walk(self, body: list) -> None:
+        for stmt in body:
+            if isinstance(stmt, Subgraph):
+                self.walk(stmt.body)
+            elif isinstance(stmt, NodeStmt):
+                self.node(stmt.node)
+                self.attrs(stmt.attrs)
+                self.node_stmts.setdefault(stmt.node.id.text, stmt)
+                if any(a.key == "label" for a in stmt.attrs):
+                    self.labeled.add(stmt.node.id.text)
+            elif isinstance(stmt, EdgeStmt):
+                for op in stmt.operands:
+                    if isinstance(op, Subgraph):
+                        self.walk(op.body)
+                    else:
+                        self.node(op)
+                self.edges += len(stmt.operands) - 1
+                self.attrs(stmt.attrs)
+            elif isinstance(stmt, AttrStmt):
+                self.attrs(stmt.attrs)
+            elif stmt.key == "label":
+                attr = Attr(stmt.key, stmt.value)
+                self.label(attr)
+                stmt.value = attr.value
+
+    def finish(self, graph: Graph) -> None:
+        # 이름이 바뀐 노드는 원래 ID를 label로 보존
+        for raw, new_id in self.renamed.items():
+            if new_id in self.labeled:
+                continue
+            label = Attr("label", DotValue(raw.replace('"', "'")[: self.limits.max_label_len], "quoted"))
+            stmt = self.node_stmts.get(new_id)
+            if stmt is not None:
+                stmt.attrs.append(label)
+            else:
+                graph.body.append(NodeStmt(NodeId(DotValue(new_id)), [label]))
+
+        if len(self.nodes) > self.limits.max_nodes:
+            self.issue("too_many_nodes", f"노드 {len(self.nodes)}개 > {self.limits.max_nodes}개", severity="warning")
+        if self.edges > self.limits.max_edges:
+            self.issue("too_many_edges", f"에지 {self.edges}개 > {self.limits.max_edges}개", severity="warning")
+
+
+# -------------------------------
+# 공개 API
+# -------------------------------
+def validate_dot(dot_code: str, limits: DotLimits = DEFAULT_LIMITS, *, repair: bool = True) -> DotValidation:
+    """
+    DOT 검증 (+ repair=True면 결정적 수리).
+    반환 DotValidation.dot는 수리된 DOT (수리 불가 시 원문).
+    """
+    issues: list[DotIssue] = []
+    if len(dot_code) > limits.max_chars:
+        issues.append(DotIssue("too_large", f"DOT {len(dot_code)}자 > {limits.max_chars}자"))
+        return DotValidation(dot_code, issues)
+
+    text = _repair_structure(dot_code, issues, repair)
+    try:
+        graph = parse_dot(text)
+    except DotSyntaxError as e:
+        issues.append(DotIssue("syntax", e.message, line=e.line))
+        return DotValidation(text, issues)
+
+    checker = _AstChecker(limits, issues, repair)
+    checker.walk(graph.body)
+    checker.finish(graph)
+
+    if not any(i.repaired for i in issues):
+        return DotValidation(dot_code, issues)
+    return DotValidation(serialize(graph), issues)
+
+
+def fallback_dot(title: str) -> str:
+    """수리도 재요청도 실패했을 때 쓰는 최소 다이어그램 (항상 렌더 가능)"""
+    safe = re.sub(r'[\[\]{}`"<>]', "", title or "제목 없음").strip()[:17] or "제목 없음"
+    return (
+        "digraph G {\n"
+        '  node [shape=box, fontname="NanumGothic", fontsize=12];\n'
+        f'  n1 [label="{safe}"];\n'
+        '  n2 [label="다음 단계"];\n'
+        "  n1 -> n2;\n"
+        "}"
+    )
+
+
+def ensure_valid_dot(
+    dot_code: str,
+    *,
+    reask: Callable[[str, list[DotIssue]], str | None] | None = None,
+    limits: DotLimits = DEFAULT_LIMITS,
+) -> DotValidation:
+    """
+    검증 + 수리 후에도 error가 남으면 reask(dot, issues)로 해당 scene만 한 번 재요청.
+    warning만 남은 경우(노드 수 초과 등)는 렌더 가능하므로 재요청하지 않는다.
+    재요청 결과가 렌더 가능할 때만 채택한다.
+    """
+    result = validate_dot(dot_code, limits)
+    if result.ok or reask is None:
+        return result
+
+    new_dot = reask(result.dot, result.unresolved)
+    if not new_dot:
+        return result
+
+    cleaned = clean_viz_entry({"diagram": new_dot})["diagram"]
+    retry = validate_dot(cleaned, limits)
+    if retry.ok:
+        return retry
+    return result
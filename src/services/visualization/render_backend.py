@@ -0,0 +1,66 @@
+# src/services/visualization/render_backend.py
+"""
+Graphviz 렌더 백엔드
+- subprocess : graphviz 패키지 (호출마다 dot/neato 프로세스 spawn, 기본값)
+- pygraphviz : cgraph/gvc 라이브러리 바인딩으로 프로세스 안에서 렌더 (spawn/fontconfig 초기화 비용 없음)
+- auto       : pygraphviz가 설치돼 있으면 pygraphviz, 아니면 subprocess
+설정: GRAPHVIZ_BACKEND 환경변수 (src.core.config.settings)
+"""
+
+import threading
+from functools import lru_cache
+
+from src.core.config import settings
+
+BACKENDS = ("subprocess", "pygraphviz", "auto")
+
+
+class SubprocessBackend:
+    name = "subprocess"
+
+    def render(self, dot_code: str, engine: str = "dot", fmt: str = "png") -> bytes:
+        from graphviz import Source
+
+        return Source(dot_code, engine=engine).pipe(format=fmt)
+
+
+class PygraphvizBackend:
+    """
+    libgraphviz를 프로세스 안에서 직접 호출.
+    Graphviz C 라이브러리는 스레드 안전하지 않으므로 렌더는 lock으로 직렬화한다.
+    """
+    name = "pygraphviz"
+
+    def __init__(self):
+        import pygraphviz  # 선택 패키지: pip install pygraphviz (libgraphviz-dev 필요)
+
+        self._pgv = pygraphviz
+        self._lock = threading.Lock()
+
+    def render(self, dot_code: str, engine: str = "dot", fmt: str = "png") -> bytes:
+        with self._lock:
+            graph = self._pgv.AGraph(string=dot_code)
+            try:
+                # args가 비어 있으면 pygraphviz는 gvLayout/gvRenderData를 in-process로 사용
+                return graph.draw(format=fmt, prog=engine)
+            finally:
+                graph.close()
+
+
+def _make_backend(name: str):
+    if name == "subprocess":
+        return SubprocessBackend()
+    if name == "pygraphviz":
+        return PygraphvizBackend()
+    if name == "auto":
+        try:
+            return PygraphvizBackend()
+        except ImportError:
+            return SubprocessBackend()
+    raise ValueError(f"알 수 없는 Graphviz 백엔드: {name} (지원: {', '.join(BACKENDS)})")
+
+
+@lru_cache(maxsize=None)
+def get_render_backend(name: str | None = None):
+    """백엔드 인스턴스는 프로세스당 하나만 만든다."""
+    return _make_backend((name or settings.GRAPHVIZ_BACKEND).lower())
@@ -1,29 +1,69 @@
 # src/tasks.py
-from rq import Queue
+import shutil
+from pathlib import Path
+
+from rq import Queue, get_current_job
 from redis import Redis
+from src.core import metrics, profiling, tracing
 from src.texprep.pipeline import run_pipeline
-from src.api.config import settings
+from src.core.config import settings
 
 # Redis 연결
 redis_conn = Redis(
-    host=settings.redis_host,
-    port=settings.redis_port,
-    db=settings.redis_db,
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
 )
-q = Queue(settings.queue_name, connection=redis_conn)
+q = Queue(settings.QUEUE_NAME, connection=redis_conn)
 
 
-def preprocess_task(cfg: dict, main_tex: str | None = None) -> dict:
+def preprocess_task(cfg: dict, main_tex: str | None = None, profile: str | None = None) -> dict:
     """
     Worker에서 실행할 전처리 태스크
+    단계별 span timeline은 job.meta["timeline"]에 남김 (GET /v1/jobs/{job_id}로 조회)
+    profile(sample / cprofile / html)을 주면 프로파일링 결과를 결과 out_dir/profile/에 저장
     """
-    result = run_pipeline(cfg, main_tex=main_tex)
+    job = get_current_job()
+    trace_id = ""
+    try:
+        with tracing.trace("preprocess_task", job_id=job.id if job else "") as root:
+            trace_id = root.trace_id
+            if not profile:
+                with metrics.stage("texprep", engine="worker"):
+                    return run_pipeline(cfg, main_tex=main_tex)
+            return _run_profiled(cfg, main_tex, profile, job.id if job else trace_id)
+    finally:
+        # 실패한 작업도 어디까지 갔는지 볼 수 있게 항상 저장
+        _save_timeline(job, trace_id)
+
+
+def _run_profiled(cfg: dict, main_tex: str | None, profile: str, profile_id: str) -> dict:
+    """작업 중에는 PROFILE_DIR/<id>에 쓰고, 성공하면 결과 디렉토리 옆(out_dir/profile)으로 옮긴다"""
+    work_dir = profiling.profile_path(profile_id)
+    with profiling.profile_session(profile, work_dir, label=f"preprocess_task {profile_id}"):
+        with metrics.stage("texprep", engine="worker"):
+            result = run_pipeline(cfg, main_tex=main_tex)
+    target = Path(result["out_dir"]) / "profile"
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.move(str(work_dir), str(target))
+    result["profile_dir"] = str(target)
     return result
 
 
-def enqueue_preprocess(cfg: dict, main_tex: str | None = None):
+def _save_timeline(job, trace_id: str) -> None:
+    if job is None or not trace_id:
+        return
+    job.meta["trace_id"] = trace_id
+    job.meta["timeline"] = tracing.timeline(trace_id)
+    job.save_meta()
+
+
+def enqueue_preprocess(cfg: dict, main_tex: str | None = None, profile: str | None = None):
     """
     API에서 호출할 함수. 실제 Job을 큐에 넣는다.
+    profile: 이 작업만 프로파일링 (sample / cprofile / html)
     """
-    job = q.enqueue(preprocess_task, cfg, main_tex)
+    if profile and profile not in profiling.PROFILE_MODES:
+        raise ValueError(f"알 수 없는 프로파일 모드: {profile}")
+    job = q.enqueue(preprocess_task, cfg, main_tex, profile)
     return {"job_id": job.get_id(), "status": job.get_status()}
@@ -4,6 +4,8 @@ from pathlib import Path
 import re
 import hashlib
 
+from src.core import tracing
+from src.core.config import settings
 from src.texprep.tex.expander import expand_file
 from src.texprep.tex.strip import preclean_for_body, clean_text
 
@@ -47,9 +49,11 @@ def _score_name(p: Path) -> int:
 
 
 def expand_to_body_clean(p: Path, drop_envs: list[str]) -> str:
-    raw, _ = expand_file(str(p))
-    body = preclean_for_body(raw)  # 본문만
-    body = clean_text(body, drop_env_list=tuple(drop_envs), also_drop_inline_todos=True)
+    with tracing.span("texprep.expand", file=p.name):
+        raw, _ = expand_file(str(p))
+    with tracing.span("texprep.strip", file=p.name):
+        body = preclean_for_body(raw)  # 본문만
+        body = clean_text(body, drop_env_list=tuple(drop_envs), also_drop_inline_todos=True)
     return body.strip()
 
 
@@ -136,7 +140,7 @@ def auto_merge_corpus(root_dir: str, drop_envs: list[str]) -> dict[str, object]:
     if not bodies:
         return {"text": "", "provenance": [], "roots": []}
 
-    groups = group_near_duplicates(bodies, threshold=0.8)
+    groups = group_near_duplicates(bodies, threshold=settings.TEX_DEDUP_THRESHOLD)
     bests = [choose_best(g) for g in groups]
     merged_text, prov = merge_unique(bests)
 
@@ -7,6 +7,8 @@ In-memory auto-merge
 import re
 import hashlib
 
+from src.core import tracing
+from src.core.config import settings
 from src.texprep.tex.expander_inmemory import expand_string_inmemory
 from src.texprep.tex.strip import preclean_for_body, clean_text
 
@@ -103,11 +105,13 @@ def auto_merge_corpus_inmemory(tex_files: dict[str, str], drop_envs: list[str])
             continue
 
         # 확장
-        expanded, _ = expand_string_inmemory(text, filename=name, all_files=tex_files)
+        with tracing.span("texprep.expand", file=name):
+            expanded, _ = expand_string_inmemory(text, filename=name, all_files=tex_files)
         # 본문 + 클린
-        body = preclean_for_body(expanded)
-        body = clean_text(body, drop_env_list=tuple(drop_envs), also_drop_inline_todos=True)
-        body = body.strip()
+        with tracing.span("texprep.strip", file=name):
+            body = preclean_for_body(expanded)
+            body = clean_text(body, drop_env_list=tuple(drop_envs), also_drop_inline_todos=True)
+            body = body.strip()
         if not body:
             continue
 
@@ -122,9 +126,10 @@ def auto_merge_corpus_inmemory(tex_files: dict[str, str], drop_envs: list[str])
     if not bodies:
         return {"text": "", "provenance": [], "roots": []}
 
-    groups = group_near_duplicates(bodies, threshold=0.8)
-    bests = [choose_best(g) for g in groups]
-    merged_text, prov = merge_unique(bests)
+    with tracing.span("texprep.merge", roots=len(bodies)):
+        groups = group_near_duplicates(bodies, threshold=settings.TEX_DEDUP_THRESHOLD)
+        bests = [choose_best(g) for g in groups]
+        merged_text, prov = merge_unique(bests)
 
     return {
         "text": merged_text,
@@ -2,6 +2,7 @@
 
 from pathlib import Path
 
+from src.core import tracing
 from src.texprep.io.discover import guess_main
 from src.texprep.io.auto_merge import auto_merge_corpus
 from src.texprep.tex.expander import expand_file
@@ -28,13 +29,16 @@ def run_pipeline(cfg: dict[str, object], main_tex: str | None = None) -> dict[st
 
     # 1) 병합 or 확장
     if cfg.get("select", {}).get("mode", "auto_merge") == "auto_merge":
-        merged = auto_merge_corpus(str(main_path.parent), drop_envs)
+        with tracing.span("texprep.merge", root_dir=str(main_path.parent)):
+            merged = auto_merge_corpus(str(main_path.parent), drop_envs)
         source_text = merged["text"]
     else:
-        expanded_text, _ = expand_file(str(main_path))
-        body_only = preclean_for_body(expanded_text)
-        body_only = drop_after_markers(body_only, [r"\\appendix\b"])
-        source_text = clean_text(body_only, drop_env_list=tuple(drop_envs))
+        with tracing.span("texprep.expand", file=main_path.name):
+            expanded_text, _ = expand_file(str(main_path))
+        with tracing.span("texprep.strip"):
+            body_only = preclean_for_body(expanded_text)
+            body_only = drop_after_markers(body_only, [r"\\appendix\b"])
+            source_text = clean_text(body_only, drop_env_list=tuple(drop_envs))
 
     # 2) 저장 (postprocess 적용)
     merged_tex_path = out_dir / "merged_body.tex"
@@ -42,7 +46,8 @@ def run_pipeline(cfg: dict[str, object], main_tex: str | None = None) -> dict[st
 
     # 후처리 적용
     processed_path = out_dir / "final_text.txt"
-    run_postprocess(merged_tex_path, processed_path)
+    with tracing.span("texprep.postprocess"):
+        run_postprocess(merged_tex_path, processed_path)
 
     return {
         "doc_id": doc_id,
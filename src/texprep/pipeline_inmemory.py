@@ -7,6 +7,7 @@ In-memory TeX pipeline
 from typing import Optional
 import re
 
+from src.core import tracing
 from src.texprep.io.auto_merge_inmemory import auto_merge_corpus_inmemory
 
 def _guess_main_inmemory(tex_files: dict[str, str]) -> str:
@@ -44,6 +45,7 @@ def run_pipeline_inmemory(tex_files: dict[str, str], main_tex: Optional[str] = N
     source_text = merged["text"]
 
     # appendix 이후 제거 같은 후처리
-    source_text = re.split(r"\\appendix\b", source_text, flags=re.I)[0]
+    with tracing.span("texprep.postprocess"):
+        source_text = re.split(r"\\appendix\b", source_text, flags=re.I)[0]
 
     return source_text.strip()
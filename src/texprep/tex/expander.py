@@ -11,6 +11,8 @@ TeX 입력 확장기
 from __future__ import annotations
 from pathlib import Path
 import re
+
+from src.core.config import settings
 # from typing import List, Tuple
 
 INPUT_CMDS = (r"\input", r"\include", r"\InputIfFileExists")
@@ -131,9 +133,11 @@ def expand_string(
     base_dir: Path,
     visited: set[Path] | None = None,
     deps: list[Path] | None = None,
-    max_depth: int = 20,
+    max_depth: int | None = None,
 ) -> tuple[str, list[Path]]:
-    """문자열 입력을 재귀 확장"""
+    """문자열 입력을 재귀 확장 (max_depth 기본값: TEX_MAX_INPUT_DEPTH)"""
+    if max_depth is None:
+        max_depth = settings.TEX_MAX_INPUT_DEPTH
     visited = visited or set()
     deps = deps or []
     masked_text, masked = _mask_protected_blocks(text)
@@ -153,7 +157,7 @@ def expand_string(
     return cur, deps
 
 
-def expand_file(main_tex_path: str, max_depth: int = 20) -> tuple[str, list[Path]]:
+def expand_file(main_tex_path: str, max_depth: int | None = None) -> tuple[str, list[Path]]:
     """파일 경로 입력을 재귀 확장"""
     main = Path(main_tex_path).resolve()
     if not main.exists():
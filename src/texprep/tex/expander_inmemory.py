@@ -9,6 +9,8 @@ In-memory TeX expander
 import re
 from typing import Iterable
 
+from src.core.config import settings
+
 INPUT_CMDS = (r"\input", r"\include")
 PROTECT_ENVS = ("verbatim", "Verbatim", "lstlisting", "lstlisting*", "minted", "tikzpicture")
 _PROTECT_TOKEN = "§§PROTECT_BLOCK_{}§§"
@@ -85,12 +87,14 @@ def expand_string_inmemory(
     filename: str,
     all_files: dict[str, str],
     *,
-    max_depth: int = 20,
+    max_depth: int | None = None,
 ):
     """
-    문자열 입력을 메모리 dict 기반으로 확장한다.
+    문자열 입력을 메모리 dict 기반으로 확장한다. (max_depth 기본값: TEX_MAX_INPUT_DEPTH)
     반환: (expanded_text, deps[list[str]])
     """
+    if max_depth is None:
+        max_depth = settings.TEX_MAX_INPUT_DEPTH
     text = _normalize_newlines(text)
     visited: set[str] = {filename}
     deps: list[str] = [filename]
@@ -0,0 +1,191 @@
+# src/worker.py
+"""
+warm worker pool (기본 `rq worker`를 대체)
+- 기본 rq worker는 작업마다 fork → 무거운 라이브러리 import / Anthropic client / 폰트 / fontconfig 캐시를
+  작업마다 다시 준비한다
+- 이 모드: 부모 프로세스가 한 번 preload() → gc.freeze() → WORKER_PROCESSES개 자식을 fork
+  자식은 fork 없는 SimpleWorker로 여러 작업을 이어서 처리 (preload된 상태를 copy-on-write로 공유)
+- 메모리 누적 방지
+    * WORKER_MAX_JOBS_PER_CHILD개 처리하면 자식 종료 → 부모가 warm 상태에서 다시 fork
+    * 작업 후 RSS가 WORKER_MAX_RSS_MB를 넘으면 그 작업을 끝으로 자식 종료 (0 = 검사 안 함)
+- SIGTERM / SIGINT: 자식에게 전달 (RQ warm shutdown: 처리 중인 작업은 끝내고 종료)
+여러 프로세스의 Prometheus 지표를 모으려면 PROMETHEUS_MULTIPROC_DIR를 지정
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import signal
+import time
+
+from rq import SimpleWorker
+
+from src.core import warmup
+from src.core.config import settings
+
+_RESPAWN_BACKOFF_S = 5     # 자식이 이보다 빨리 죽으면 다시 띄우기 전에 대기 (crash loop 방지)
+
+
+def _rss_mb() -> float:
+    """현재 RSS (Linux /proc). 없으면 최대 RSS로 대신"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class WarmWorker(SimpleWorker):
+    """같은 프로세스에서 작업을 이어서 처리. 작업 후 메모리가 한도를 넘으면 스스로 종료."""
+
+    max_rss_mb: float = 0
+
+    def execute_job(self, job, queue):
+        super().execute_job(job, queue)
+        if self.max_rss_mb and (rss := _rss_mb()) > self.max_rss_mb:
+            print(f"[Worker] {self.name}: RSS {rss:.0f}MB > {self.max_rss_mb:.0f}MB → 교체")
+            self._stop_requested = True
+
+
+# -------------------------------
+# preload
+# -------------------------------
+def _warm_fonts() -> None:
+    from src.services.compositor.layout_engine import get_layout
+    from src.services.compositor.scene_composer import _DEFAULT_FONT
+    from src.services.compositor.text_layout import get_font
+
+    layout = get_layout(settings.STORYBOOK_LAYOUT)
+    for size in range(min(layout.font_min, layout.font_max), layout.font_max + 1):
+        get_font(str(_DEFAULT_FONT), size)
+
+
+def _warm_render_backend() -> None:
+    # 첫 렌더가 fontconfig 캐시를 채운다 (dot 프로세스 / libgraphviz 공통)
+    from src.services.visualization.render_backend import get_render_backend
+
+    get_render_backend().render('digraph G { a -> b; }', engine="dot", fmt="png")
+
+
+def _warm_llm_client() -> None:
+    from src.services.llm.backends import get_llm_backend
+
+    get_llm_backend()
+
+
+def preload() -> dict[str, float]:
+    """작업 경로에서 쓰는 모듈 / client / 폰트 / 렌더 백엔드를 미리 준비. 단계별 소요시간(ms)"""
+    timings: dict[str, float] = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:      # 준비 실패는 첫 작업에서 다시 시도될 뿐 → 워커는 계속 뜬다
+            print(f"[Worker] preload {name} 실패: {e}")
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    step("modules", warmup.preload_modules)
+    # 모듈 수준 정규식 / 스키마 / 레이아웃 템플릿이 여기서 컴파일된다
+    step("pipeline", lambda: [
+        __import__(m)
+        for m in (
+            "src.tasks",
+            "src.texprep.pipeline_inmemory",
+            "src.services.llm.scene_splitter",
+            "src.services.llm.viz_classifier",
+            "src.services.visualization.diagram",
+            "src.services.compositor.scene_composer",
+            "src.services.compositor.pdf_exporter",
+        )
+    ])
+    step("llm_client", _warm_llm_client)
+    step("fonts", _warm_fonts)
+    step("render_backend", _warm_render_backend)
+    return timings
+
+
+# -------------------------------
+# pool
+# -------------------------------
+def _child_main(queues: list[str], max_jobs: int, max_rss_mb: float) -> None:
+    from src.tasks import redis_conn
+
+    # 부모의 pool 관리용 signal handler는 버리고 RQ 기본 처리(warm shutdown)를 쓴다
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker = WarmWorker(queues, connection=redis_conn)
+    worker.max_rss_mb = max_rss_mb
+    worker.work(max_jobs=max_jobs or None, logging_level="INFO")
+
+
+def run_pool(queues: list[str], processes: int, max_jobs: int, max_rss_mb: float, preload_first: bool = True) -> None:
+    if preload_first:
+        timings = preload()
+        print("[Worker] preload 완료: " + ", ".join(f"{k}={v:.0f}ms" for k, v in timings.items()))
+    # preload된 객체를 GC 추적에서 빼서 자식에서 copy-on-write 페이지가 깨지지 않게
+    gc.freeze()
+
+    ctx = multiprocessing.get_context("fork")
+    children: dict[int, tuple[multiprocessing.Process, float]] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        proc = ctx.Process(target=_child_main, args=(queues, max_jobs, max_rss_mb), name=f"rq-warm-{slot}")
+        proc.start()
+        children[slot] = (proc, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for proc, _ in children.values():
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(processes):
+        spawn(slot)
+    print(f"[Worker] 자식 {processes}개 시작 (queues={','.join(queues)}, max_jobs={max_jobs}, max_rss={max_rss_mb:.0f}MB)")
+
+    while True:
+        for slot, (proc, started) in list(children.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            if stopping:
+                children.pop(slot)
+                continue
+            lived = time.monotonic() - started
+            print(f"[Worker] {proc.name} 종료 (exit={proc.exitcode}, {lived:.0f}s) → 다시 fork")
+            if lived < _RESPAWN_BACKOFF_S:
+                time.sleep(_RESPAWN_BACKOFF_S)
+            spawn(slot)
+        if stopping and not children:
+            break
+        time.sleep(0.5)
+    print("[Worker] 모든 자식 종료")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="warm RQ worker pool")
+    parser.add_argument("queues", nargs="*", default=[settings.QUEUE_NAME])
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES)
+    parser.add_argument("--max-jobs", type=int, default=settings.WORKER_MAX_JOBS_PER_CHILD, help="자식당 처리 작업 수 (0 = 제한 없음)")
+    parser.add_argument("--max-rss-mb", type=float, default=settings.WORKER_MAX_RSS_MB, help="작업 후 이 RSS를 넘으면 자식 교체 (0 = 검사 안 함)")
+    parser.add_argument("--no-preload", action="store_true", help="preload 없이 시작 (비교 측정용)")
+    args = parser.parse_args()
+    preload_first = settings.WORKER_PRELOAD and not args.no_preload
+    run_pool(args.queues, max(1, args.processes), args.max_jobs, args.max_rss_mb, preload_first=preload_first)
+
+
+if __name__ == "__main__":
+    main()
+
+# 실행 예시:
+# (.venv) python -m src.worker                              # WORKER_PROCESSES개, 큐 = QUEUE_NAME
+# (.venv) python -m src.worker storybook --processes 4 --max-jobs 200 --max-rss-mb 1500
@@ -0,0 +1,125 @@
+# tests/benchmarks/corpus.py
+"""
+벤치마크용 합성 arXiv 소스 생성기 (실제 논문/네트워크 없이 재현 가능한 입력)
+- 여러 root: main.tex + 거의 같은 arxiv 버전(near-duplicate) + 별도 supplementary
+- 깊은 \\input 트리: sections/secK.tex → sections/secK/part1.tex → .../part2.tex ...
+- 무거운 verbatim(lstlisting / verbatim), 긴 수식(align), 많은 figure(+ tikzpicture)
+- seed가 같으면 항상 같은 dict[str, str]
+"""
+
+import random
+
+PROFILES: dict[str, dict[str, int]] = {
+    # sections: 절 수, depth: \input 중첩 깊이, paras: 파일당 문단 수
+    # verbatim / math / figures: 논문 전체 블록 수, roots: root 후보 파일 수
+    "small": {"sections": 4, "depth": 2, "paras": 4, "verbatim": 2, "math": 3, "figures": 4, "roots": 1},
+    "medium": {"sections": 10, "depth": 3, "paras": 8, "verbatim": 8, "math": 12, "figures": 20, "roots": 2},
+    "large": {"sections": 24, "depth": 5, "paras": 12, "verbatim": 30, "math": 40, "figures": 80, "roots": 3},
+}
+
+_WORDS = (
+    "model training attention encoder decoder layer residual gradient loss dataset benchmark "
+    "representation token embedding convolution feature inference latency throughput baseline "
+    "ablation objective regularization optimizer network parameter scaling generalization"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(8, 20))
+    extra = rng.choice(["", f" with $\\alpha_{{{rng.randint(1, 9)}}} = {rng.random():.2f}$", f" \\cite{{ref{rng.randint(1, 99)}}}",
+                        " (see \\ref{fig:0})", " \\emph{significantly}", " % TODO: 수정"])
+    return " ".join(words).capitalize() + extra + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def _verbatim(rng: random.Random, k: int) -> str:
+    lines = [f"    x_{i} = layer_{i}(x_{i - 1})  # step {i}" for i in range(1, rng.randint(30, 80))]
+    env = "lstlisting" if k % 2 else "verbatim"
+    opt = "[language=Python]" if env == "lstlisting" else ""
+    return f"\\begin{{{env}}}{opt}\ndef forward(x_0):\n" + "\n".join(lines) + f"\n    return x\n\\end{{{env}}}"
+
+
+def _math(rng: random.Random, k: int) -> str:
+    rows = [
+        f"  \\mathcal{{L}}_{{{i}}} &= \\sum_{{j=1}}^{{N}} \\log p_\\theta(x_j^{{({i})}} \\mid x_{{<j}}) "
+        f"+ \\lambda \\lVert W_{{{i}}} \\rVert_2^2 \\label{{eq:{k}_{i}}} \\\\"
+        for i in range(rng.randint(6, 20))
+    ]
+    return "\\begin{align}\n" + "\n".join(rows) + "\n\\end{align}"
+
+
+def _figure(rng: random.Random, k: int) -> str:
+    tikz = ""
+    if k % 3 == 0:
+        nodes = "\n".join(f"  \\node (n{i}) at ({i},0) {{Block {i}}};" for i in range(rng.randint(5, 15)))
+        tikz = f"\\begin{{tikzpicture}}\n{nodes}\n\\end{{tikzpicture}}\n"
+    return (
+        "\\begin{figure}[t]\n\\centering\n"
+        f"{tikz}\\includegraphics[width=0.9\\linewidth]{{figures/fig{k}.pdf}}\n"
+        f"\\caption{{{_sentence(rng)}}}\n\\label{{fig:{k}}}\n\\end{{figure}}"
+    )
+
+
+def _spread(total: int, n: int) -> list[int]:
+    base, rem = divmod(total, n)
+    return [base + (1 if i < rem else 0) for i in range(n)]
+
+
+def generate_paper(profile: str = "medium", seed: int = 0) -> dict[str, str]:
+    """합성 논문 소스 {경로: 내용}"""
+    p = PROFILES[profile]
+    rng = random.Random(seed)
+    files: dict[str, str] = {}
+    n = p["sections"]
+    verbatims, maths, figures = _spread(p["verbatim"], n), _spread(p["math"], n), _spread(p["figures"], n)
+    fig_id = 0
+
+    for s in range(1, n + 1):
+        # 가장 깊은 파일부터 만들어 위로 \input 연결
+        child = None
+        for d in range(p["depth"], 0, -1):
+            path = f"sections/sec{s}/" + "/".join(f"part{i}" for i in range(1, d + 1)) + ".tex"
+            body = [f"\\subsection{{Part {s}.{d}}}"] + [_paragraph(rng) for _ in range(max(1, p["paras"] // 2))]
+            if child:
+                body.append(f"\\input{{{child[:-4]}}}")
+            files[path] = "\n\n".join(body)
+            child = path
+
+        blocks = [_paragraph(rng) for _ in range(p["paras"])]
+        blocks += [_verbatim(rng, k) for k in range(verbatims[s - 1])]
+        blocks += [_math(rng, k) for k in range(maths[s - 1])]
+        for _ in range(figures[s - 1]):
+            blocks.append(_figure(rng, fig_id))
+            fig_id += 1
+        rng.shuffle(blocks)
+        heading = f"\\section{{Section {s}: {rng.choice(_WORDS).capitalize()}}}"
+        files[f"sections/sec{s}.tex"] = "\n\n".join([heading, *blocks, f"\\input{{{child[:-4]}}}"])
+
+    files["macros.tex"] = "\n".join(f"\\newcommand{{\\m{chr(97 + i)}}}{{\\mathbf{{{chr(97 + i)}}}}}" for i in range(20))
+    files["appendix.tex"] = "\\section{Extra}\n" + "\n\n".join(_paragraph(rng) for _ in range(p["paras"]))
+
+    inputs = "\n".join(f"\\input{{sections/sec{s}}}" for s in range(1, n + 1))
+    main = (
+        "\\documentclass{article}\n\\usepackage{amsmath,graphicx,listings,tikz}\n\\input{macros}\n"
+        "\\title{Synthetic Paper}\n\\begin{document}\n\\maketitle\n"
+        f"\\begin{{abstract}}\n{_paragraph(rng)}\n\\end{{abstract}}\n{inputs}\n"
+        "\\appendix\n\\input{appendix}\n\\end{document}\n"
+    )
+    files["main.tex"] = main
+    if p["roots"] >= 2:
+        # arXiv 제출용 사본: 거의 같은 root (near-duplicate 그룹핑 대상)
+        files["arxiv_version.tex"] = main.replace("Synthetic Paper", "Synthetic Paper (arXiv)")
+    for r in range(3, p["roots"] + 1):
+        files[f"supplementary{r - 2}.tex"] = (
+            "\\documentclass{article}\n\\begin{document}\n\\section{Supplementary}\n"
+            + "\n\n".join(_paragraph(rng) for _ in range(p["paras"] * 2))
+            + "\n\\end{document}\n"
+        )
+    return files
+
+
+def corpus_stats(files: dict[str, str]) -> dict[str, int]:
+    return {"files": len(files), "chars": sum(len(t) for t in files.values())}
@@ -0,0 +1,270 @@
+# tests/benchmarks/json_repair.py
+"""
+LLM 응답 JSON 복구 벤치마크: 기존 정규식 복구 vs json_repair 한 번 훑기
+- corpus: --corpus 디렉토리의 저장된 응답 원문(*.txt, LLM_RAW_RESPONSE_DIR로 수집)
+  없으면 실제 응답 형태를 흉내 낸 합성 응답 (따옴표 없는 DOT, 깨진 따옴표, tool 필드 DOT, LaTeX escape)
+- 응답별 복구 시간과 json.loads 성공 여부를 비교
+- --scale: DOT 블록 수를 늘려가며 응답 하나의 복구 시간 (기존 방식의 비선형 증가 확인)
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+
+from src.services.llm.json_repair import repair_json
+from src.services.llm.viz_classifier import _extract_first_balanced_json
+
+# -------------------------------
+# 비교 기준: 기존 정규식 복구 체인 (제품 코드에서는 제거됨)
+# -------------------------------
+# 이스케이프된 따옴표를 건너뛰며 "tool": "..." 전체를 잡아 DOT면 diagram으로 이동
+def _fix_tool_field_digraphs(s: str) -> str:
+    # "tool": " ... " 에서 내부는 (\\.|[^"\\])* 로 캡처 → 이스케이프된 따옴표도 통과
+    pat = re.compile(r'"tool"\s*:\s*"((?:\\.|[^"\\])*)"')
+
+    def repl(m: re.Match[str]) -> str:
+        inner_escaped = m.group(1)
+        try:
+            # JSON 문자열 디코딩으로 실제 값 복원
+            value = json.loads(f'"{inner_escaped}"')
+        except Exception:
+            value = inner_escaped
+
+        if isinstance(value, str) and value.lstrip().startswith(("digraph", "graph")):
+            # tool → graphviz, diagram에 DOT 삽입
+            return f'"tool": "graphviz", "diagram": {json.dumps(value, ensure_ascii=False)}'
+        return m.group(0)
+
+    return pat.sub(repl, s)
+
+
+def _repair_raw_json_legacy(s: str) -> str:
+    """이전 정규식 + alias 반복 find 복구 (viz_classifier에서 json_repair로 대체되기 전 방식)"""
+    if not s:
+        return ""
+    s = s.strip()
+    s = re.sub(r"^```(?:json)?\s*", "", s, flags=re.IGNORECASE)
+    s = re.sub(r"\s*```$", "", s)
+
+    s = s.replace('"excalidraw"', '"graphviz"')
+    s = s.replace('"stable-diffusion"', '"stability"')
+
+    # 중복 diagram 키 보정 그대로 두고...
+    s = re.sub(r'("diagram"\s*:\s*)",\s*"diagram"\s*:\s*', r'\1', s)
+
+    # tool에 박힌 DOT를 이스케이프-안전하게 끌어내기
+    s = _fix_tool_field_digraphs(s)
+
+    # 이하 기존 alias 블록 추출 루프 그대로...
+    aliases = ['"diagram"', '"graphviz"', '"graph"', '"graphviz_code"', '"dot"', '"scene_graph"']
+
+    def _encode_graph_block(text: str, key_pos: int) -> tuple[str, int] | None:
+        colon = text.find(":", key_pos)
+        if colon == -1:
+            return None
+        i = colon + 1
+        while i < len(text) and text[i].isspace():
+            i += 1
+        had_quote = False
+        if i < len(text) and text[i] == '"':
+            had_quote = True
+            i += 1
+
+        m = re.search(r'(digraph\s+[^{]+\{|\bgraph\s*\{)', text[i:], re.IGNORECASE)
+        if not m:
+            return None
+        start = i + m.start()
+
+        depth = 0
+        j = start
+        in_str = False
+        while j < len(text):
+            ch = text[j]
+            prev = text[j-1] if j > 0 else ""
+            if ch == '"' and prev != '\\':
+                in_str = not in_str
+            if not in_str:
+                if ch == '{':
+                    depth += 1
+                elif ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        end = j + 1
+                        break
+            j += 1
+        else:
+            return None
+
+        block = text[start:end]
+        encoded = json.dumps(block, ensure_ascii=False)
+
+        k = end
+        if had_quote and k < len(text) and text[k] == '"':
+            k += 1
+
+        new_text = text[:colon+1] + " " + encoded + text[k:]
+        return new_text, colon + 1 + 1 + len(encoded)
+
+    idx = 0
+    while True:
+        next_pos = None
+        which = None
+        for a in aliases:
+            p = s.find(a, idx)
+            if p != -1 and (next_pos is None or p < next_pos):
+                next_pos = p
+                which = a
+        if next_pos is None:
+            break
+
+        res = _encode_graph_block(s, next_pos + len(which))
+        if res is None:
+            idx = next_pos + len(which)
+            continue
+        s, idx = res
+
+    return s
+
+
+def _fix_invalid_escapes(s: str) -> str:
+    r"""
+    JSON 문자열에서 잘못된 백슬래시 escape들을 고친다.
+    - 허용된 escape: \", \\, \/, \b, \f, \n, \r, \t, \uXXXX
+    - 나머지는 그냥 백슬래시를 지워서 안전화
+    """
+    # \u 로 시작하지 않는 모든 \X 를 잡아서 → 그냥 X로 치환
+    return re.sub(r'\\(?!["\\/bfnrtu])', '', s)
+
+
+_DOT_TEMPLATE = 'digraph G{k} {{\n  rankdir=LR;\n  n{k}a [label=<<FONT FACE="NanumGothic">입력 {k}</FONT>>];\n  n{k}b [label="Stage {k}"];\n  n{k}a -> n{k}b [label="x_{k}"];\n}}'
+
+
+def _viz_object(k: int, rng: random.Random) -> str:
+    dot = _DOT_TEMPLATE.format(k=k)
+    style = rng.choice(["unquoted", "raw_quoted", "escaped", "tool"])
+    if style == "unquoted":
+        body = f'"diagram": {dot}'
+    elif style == "raw_quoted":
+        body = f'"diagram": "{dot}"'
+    elif style == "escaped":
+        body = f'"diagram": {json.dumps(dot, ensure_ascii=False)}'
+    else:
+        body = f'"tool": "{dot}"'
+    return f'{{"viz_type": "diagram", "layout": "{rng.choice(["dot", "neato", "circo"])}", {body}}}'
+
+
+def synthetic_response(n_viz: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vizzes = ", ".join(_viz_object(k, rng) for k in range(n_viz))
+    return (
+        "```json\n"
+        f'{{"scene_id": {seed}, "title": "장면 {seed}", "narration": "수식 \\alpha 와 \\beta 설명",\n'
+        f'"visualizations": [{vizzes}]}}\n'
+        "```"
+    )
+
+
+def load_corpus(corpus_dir: Path | None, n: int) -> list[str]:
+    if corpus_dir and corpus_dir.is_dir():
+        files = sorted(corpus_dir.glob("*.txt"))
+        if files:
+            return [f.read_text(encoding="utf-8") for f in files]
+        print(f"[Bench] {corpus_dir}에 저장된 응답이 없어 합성 corpus 사용")
+    return [synthetic_response(n_viz=1 + i % 3, seed=i) for i in range(n)]
+
+
+def legacy_parse(s: str):
+    fixed = _fix_invalid_escapes(_repair_raw_json_legacy(s))
+    try:
+        return json.loads(fixed)
+    except Exception:
+        only = _extract_first_balanced_json(fixed)
+        return json.loads(_fix_invalid_escapes(only)) if only else None
+
+
+def engine_parse(s: str):
+    fixed = repair_json(s)
+    try:
+        return json.loads(fixed)
+    except Exception:
+        only = _extract_first_balanced_json(fixed)
+        return json.loads(only) if only else None
+
+
+def _diagrams_ok(obj) -> bool:
+    """파싱된 객체의 모든 diagram 값이 DOT로 시작하는지 (잘못 복구된 값 검출)"""
+    if not isinstance(obj, dict):
+        return False
+    vizzes = obj.get("visualizations") or []
+    return all(
+        str(v.get("diagram", "")).lstrip().startswith(("digraph", "graph"))
+        for v in vizzes
+        if isinstance(v, dict) and "diagram" in v
+    )
+
+
+def bench(name: str, parse, corpus: list[str], repeat: int) -> dict:
+    times: list[float] = []
+    parsed = correct = 0
+    for text in corpus:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                obj = parse(text)
+            except Exception:
+                obj = None
+        times.append((time.perf_counter() - t0) * 1000 / repeat)
+        parsed += obj is not None
+        correct += _diagrams_ok(obj)
+    return {
+        "impl": name,
+        "responses": len(corpus),
+        "parsed": parsed,
+        "correct": correct,
+        "mean_ms": statistics.fmean(times),
+        "max_ms": max(times),
+    }
+
+
+def bench_scale(sizes: list[int]) -> None:
+    print(f"\n[Bench] 응답 하나의 DOT 블록 수별 복구 시간")
+    print(f"{'blocks':>7} {'chars':>9} {'legacy':>10} {'engine':>10}")
+    for n in sizes:
+        text = synthetic_response(n_viz=n, seed=n)
+        row = []
+        for fn in (_repair_raw_json_legacy, repair_json):
+            t0 = time.perf_counter()
+            fn(text)
+            row.append((time.perf_counter() - t0) * 1000)
+        print(f"{n:>7} {len(text):>9} {row[0]:>8.1f}ms {row[1]:>8.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 복구: 기존 정규식 vs 한 번 훑기")
+    parser.add_argument("--corpus", type=Path, default=Path("data/raw_responses"), help="저장된 응답 원문 디렉토리")
+    parser.add_argument("--n", type=int, default=200, help="합성 corpus 크기 (저장된 응답이 없을 때)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, nargs="*", default=[10, 50, 200, 800])
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.n)
+    results = [bench("legacy", legacy_parse, corpus, args.repeat), bench("engine", engine_parse, corpus, args.repeat)]
+
+    print(f"[Bench] 응답 {len(corpus)}개, 응답당 {args.repeat}회 반복")
+    print(f"{'impl':<8} {'parsed':>7} {'correct':>8} {'mean':>10} {'max':>10}")
+    for r in results:
+        print(f"{r['impl']:<8} {r['parsed']:>7} {r['correct']:>8} {r['mean_ms']:>8.3f}ms {r['max_ms']:>8.3f}ms")
+    if args.scale:
+        bench_scale(args.scale)
+
+
+if __name__ == "__main__":
+    main()
+
+# 실행 예시:
+# (.venv) LLM_RAW_RESPONSE_DIR=data/raw_responses python -m tests.run_viz_pipeline   # 응답 수집
+# (.venv) python -m tests.benchmarks.json_repair --corpus data/raw_responses
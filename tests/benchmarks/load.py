@@ -0,0 +1,397 @@
+# tests/benchmarks/load.py
+"""
+스토리북 API 부하 테스트 + 용량 모델 (실제 arXiv / LLM 없이)
+- 로컬 arXiv stand-in: /e-print/<id> 로 tests/benchmarks/corpus.py 합성 소스를 tar.gz로 응답
+  (서버에는 ARXIV_EPRINT_URL로 연결, --fetch-latency-ms로 네트워크 지연 흉내)
+- API 서버: uvicorn을 하위 프로세스로 띄움 (LLM_BACKEND=fake, --llm-latency-ms). --url이면 떠 있는 서버 사용
+- 요청 구성: --hot-ratio 비율은 소수의 같은 논문(반복 요청 → 아티팩트 저장소 캐시 적중), 나머지는 매번 새 논문
+- 동시성 sweep: 단계마다 closed-loop 클라이언트 N개가 POST /v1/storybook을 연속 호출
+- 보고: 처리량, 종단 p50/p95/p99, 단계별(Server-Timing 헤더) p50/p95/p99, 서버 대기열 시간, worker 포화도
+- 용량 모델: 단계 비용을 CPU 구간(texprep/dot_clean/render/compose/export)과 대기 구간(arxiv_fetch/LLM)으로 나눠
+    storybooks/min/worker (요청 하나씩 처리하는 현재 구조) 와 storybooks/min/core (CPU 구간만 묶였을 때 상한)
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import requests
+
+from tests.benchmarks.corpus import PROFILES, generate_paper
+from tests.benchmarks.suite import environment
+
+# 서버 쪽 CPU를 쓰는 단계 / 외부를 기다리는 단계 (metrics.stage 이름 기준)
+CPU_STAGES = ("texprep", "dot_clean", "render", "compose", "export")
+WAIT_STAGES = ("arxiv_fetch", "llm_call")
+REPORT_STAGES = ("storybook", "arxiv_fetch", "texprep", "scene_split", "classify", "llm_call", *CPU_STAGES[1:])
+
+
+# -------------------------------
+# 로컬 arXiv stand-in
+# -------------------------------
+def _tarball(files: dict[str, str]) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path, text in files.items():
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+class ArxivStandIn:
+    """arxiv id마다 고정 seed의 합성 논문을 tar.gz로 돌려주는 HTTP 서버 (스레드)"""
+
+    def __init__(self, profile: str, latency_ms: float):
+        self.profile = profile
+        self.latency_s = latency_ms / 1000
+        self.requests = 0
+        self._cache: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, name="arxiv-standin", daemon=True)
+
+    @property
+    def url_template(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/e-print/{{arxiv_id}}"
+
+    def tarball(self, arxiv_id: str) -> bytes:
+        with self._lock:
+            self.requests += 1
+            if arxiv_id not in self._cache:
+                seed = int(hashlib.sha1(arxiv_id.encode()).hexdigest()[:8], 16)
+                self._cache[arxiv_id] = _tarball(generate_paper(self.profile, seed))
+            return self._cache[arxiv_id]
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                arxiv_id = self.path.rsplit("/", 1)[-1]
+                if not self.path.startswith("/e-print/") or not arxiv_id:
+                    self.send_error(404)
+                    return
+                time.sleep(standin.latency_s)
+                body = standin.tarball(arxiv_id)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_pdf(arxiv_id: str) -> bytes:
+    """첫 페이지에 arXiv 식별자가 찍힌 PDF (extract_arxiv_id_from_pdf_bytes 입력)"""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), f"arXiv:{arxiv_id}v1  [cs.LG]  19 Oct 2026")
+    page.insert_text((72, 100), "Synthetic Paper")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+# -------------------------------
+# API 서버 (하위 프로세스)
+# -------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(eprint_url: str, workers: int, llm_latency_ms: float, log_path: Path) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "fake",
+        "LLM_FAKE_LATENCY_MS": str(llm_latency_ms),
+        "LLM_FAKE_ERROR_RATES": "",
+        "ARXIV_EPRINT_URL": eprint_url,
+        "TRACING_ENABLED": "true",
+        # 실행마다 빈 저장소에서 시작 (hot 논문만 캐시 적중)
+        "STORAGE_BACKEND": "fs",
+        "STORAGE_DIR": tempfile.mkdtemp(prefix="load-artifacts-"),
+    }
+    log = open(log_path, "w", encoding="utf-8")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API 서버가 바로 종료됨 (로그: {log_path})")
+        try:
+            if requests.get(f"{url}/healthz", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"API 서버 준비 시간 초과 (로그: {log_path})")
+
+
+# -------------------------------
+# 부하 생성
+# -------------------------------
+def parse_server_timing(header: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for item in filter(None, (p.strip() for p in header.split(","))):
+        name, _, params = item.partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                out[name.strip()] = float(value)
+    return out
+
+
+class PaperMix:
+    """hot_ratio 확률로 hot 논문 중 하나, 아니면 처음 보는 논문 id"""
+
+    def __init__(self, hot_ratio: float, hot_papers: int, seed: int):
+        import random
+
+        self.rng = random.Random(seed)
+        self.hot_ratio = hot_ratio
+        self.hot = [f"2401.{i:05d}" for i in range(1, hot_papers + 1)]
+        self._next = 50000
+        self._lock = threading.Lock()
+        self._pdfs: dict[str, bytes] = {}
+
+    def next(self) -> tuple[str, bool, bytes]:
+        with self._lock:
+            hot = self.rng.random() < self.hot_ratio
+            if hot:
+                arxiv_id = self.rng.choice(self.hot)
+            else:
+                arxiv_id = f"2402.{self._next:05d}"
+                self._next += 1
+            if arxiv_id not in self._pdfs:
+                self._pdfs[arxiv_id] = make_pdf(arxiv_id)
+            return arxiv_id, hot, self._pdfs[arxiv_id]
+
+
+def _one_request(url: str, mix: PaperMix, timeout_s: float) -> dict:
+    arxiv_id, hot, pdf = mix.next()
+    t0 = time.perf_counter()
+    try:
+        r = requests.post(f"{url}/v1/storybook", files={"pdf": (f"{arxiv_id}.pdf", pdf, "application/pdf")}, timeout=timeout_s)
+        body = r.content  # 스트리밍 응답 끝까지
+        status = r.status_code
+        stages = parse_server_timing(r.headers.get("Server-Timing", ""))
+    except requests.RequestException as e:
+        body, status, stages = b"", type(e).__name__, {}
+    return {
+        "arxiv_id": arxiv_id,
+        "hot": hot,
+        "status": status,
+        "latency_ms": (time.perf_counter() - t0) * 1000,
+        "bytes": len(body),
+        "stages": stages,
+    }
+
+
+def run_level(url: str, mix: PaperMix, concurrency: int, n_requests: int, timeout_s: float) -> tuple[list[dict], float]:
+    """closed-loop: concurrency개 클라이언트가 합쳐서 n_requests개를 보낼 때까지 연속 호출"""
+    results: list[dict] = []
+    remaining = [n_requests]
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            res = _one_request(url, mix, timeout_s)
+            with lock:
+                results.append(res)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return results, time.perf_counter() - started
+
+
+# -------------------------------
+# 집계 / 용량 모델
+# -------------------------------
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def _dist(values: list[float]) -> dict[str, float]:
+    return {"p50": _pct(values, 0.50), "p95": _pct(values, 0.95), "p99": _pct(values, 0.99)}
+
+
+def summarize_level(results: list[dict], wall_s: float, concurrency: int, server_workers: int) -> dict:
+    ok = [r for r in results if r["status"] == 200]
+    service_ms = [r["stages"].get("storybook", 0.0) for r in ok]
+    stages = {
+        name: _dist([r["stages"][name] for r in ok if name in r["stages"]])
+        for name in REPORT_STAGES
+        if any(name in r["stages"] for r in ok)
+    }
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "hot_requests": sum(r["hot"] for r in ok),
+        "wall_s": wall_s,
+        "throughput_per_min": len(ok) / wall_s * 60 if wall_s else 0.0,
+        "latency_ms": _dist([r["latency_ms"] for r in ok]),
+        "hot_latency_ms": _dist([r["latency_ms"] for r in ok if r["hot"]]),
+        "cold_latency_ms": _dist([r["latency_ms"] for r in ok if not r["hot"]]),
+        # 클라이언트 지연 - 서버 처리 시간 = 서버 앞에서 기다린 시간 (+ 전송)
+        "queue_ms": _dist([r["latency_ms"] - s for r, s in zip(ok, service_ms)]),
+        "stages_ms": stages,
+        # 서버 worker들이 storybook을 처리하느라 바빴던 비율
+        "worker_saturation": sum(service_ms) / 1000 / (wall_s * server_workers) if wall_s else 0.0,
+    }
+
+
+def capacity_model(results: list[dict], target_per_min: float) -> dict:
+    """
+    동시성 1 (대기열 없음) 결과의 단계 비용 중앙값으로 계산
+    - service_s   : 요청 하나 처리 시간. 요청을 하나씩 처리하는 worker 1개 = 60 / service_s 권/분
+    - cpu_s       : CPU 단계 합. CPU 코어 하나가 낼 수 있는 상한 = 60 / cpu_s 권/분
+    - wait_s      : arXiv / LLM 대기 (동시 처리를 늘리면 겹칠 수 있는 부분)
+    """
+    ok = [r for r in results if r["status"] == 200 and "storybook" in r["stages"]]
+    if not ok:
+        return {}
+    service_s = statistics.median(r["stages"]["storybook"] for r in ok) / 1000
+    cpu_s = statistics.median(sum(r["stages"].get(s, 0.0) for s in CPU_STAGES) for r in ok) / 1000
+    wait_s = statistics.median(sum(r["stages"].get(s, 0.0) for s in WAIT_STAGES) for r in ok) / 1000
+    per_worker = 60 / service_s if service_s else 0.0
+    per_core = 60 / cpu_s if cpu_s else 0.0
+    return {
+        "service_s": service_s,
+        "cpu_s": cpu_s,
+        "wait_s": wait_s,
+        "storybooks_per_min_per_worker": per_worker,
+        "storybooks_per_min_per_core": per_core,
+        "target_per_min": target_per_min,
+        "workers_for_target": -(-target_per_min // per_worker) if per_worker else None,
+        "cores_for_target": -(-target_per_min // per_core) if per_core else None,
+    }
+
+
+def _print_level(s: dict) -> None:
+    lat, q = s["latency_ms"], s["queue_ms"]
+    print(
+        f"c={s['concurrency']:<3} ok={s['ok']:<4} err={s['errors']:<3} {s['throughput_per_min']:>7.1f}/min  "
+        f"p50={lat['p50']:>8.0f}ms p95={lat['p95']:>8.0f}ms p99={lat['p99']:>8.0f}ms  "
+        f"queue p50={q['p50']:>7.0f}ms  saturation={s['worker_saturation']:.0%}"
+    )
+    for name, d in s["stages_ms"].items():
+        print(f"      {name:<12} p50={d['p50']:>8.1f}ms p95={d['p95']:>8.1f}ms p99={d['p99']:>8.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="스토리북 API 부하 테스트 (fake LLM + 로컬 arXiv stand-in)")
+    parser.add_argument("--url", default="", help="이미 떠 있는 API 서버 (기본: 하위 프로세스로 띄움)")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker 수 (포화도 계산에도 사용)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="sweep할 동시 클라이언트 수 (쉼표)")
+    parser.add_argument("--requests-per-client", type=int, default=3, help="단계별 요청 수 = 동시성 × 이 값")
+    parser.add_argument("--hot-ratio", type=float, default=0.5, help="반복 요청되는 hot 논문 비율")
+    parser.add_argument("--hot-papers", type=int, default=3)
+    parser.add_argument("--profile", choices=list(PROFILES), default="small", help="합성 논문 크기")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="fake LLM 호출당 평균 지연")
+    parser.add_argument("--fetch-latency-ms", type=float, default=50, help="arXiv stand-in 응답 지연")
+    parser.add_argument("--timeout", type=float, default=600, help="요청당 클라이언트 timeout(초)")
+    parser.add_argument("--target", type=float, default=60, help="용량 계산 목표 (storybooks/min)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("bench_results/load.json"))
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    mix = PaperMix(args.hot_ratio, args.hot_papers, args.seed)
+
+    with ArxivStandIn(args.profile, args.fetch_latency_ms) as standin:
+        proc = None
+        url = args.url.rstrip("/")
+        if not url:
+            proc, url = start_server(standin.url_template, args.server_workers, args.llm_latency_ms,
+                                     args.out.with_suffix(".server.log"))
+            print(f"[Load] API 서버 {url} (workers={args.server_workers}, arXiv stand-in {standin.url_template})")
+        try:
+            # warmup: import / 첫 렌더 비용을 측정에서 제외
+            _one_request(url, mix, args.timeout)
+            levels_out, raw = [], {}
+            for c in levels:
+                results, wall_s = run_level(url, mix, c, c * args.requests_per_client, args.timeout)
+                summary = summarize_level(results, wall_s, c, args.server_workers)
+                _print_level(summary)
+                levels_out.append(summary)
+                raw[c] = results
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    base = raw.get(1) or raw[levels[0]]
+    model = capacity_model(base, args.target)
+    if model:
+        print(
+            f"\n[Load] 용량 모델 (동시성 {1 if 1 in raw else levels[0]} 기준): "
+            f"처리 {model['service_s']:.2f}s = CPU {model['cpu_s']:.2f}s + 대기 {model['wait_s']:.2f}s"
+        )
+        print(f"  worker당 {model['storybooks_per_min_per_worker']:.1f} storybooks/min (요청 하나씩 처리)")
+        print(f"  코어당   {model['storybooks_per_min_per_core']:.1f} storybooks/min (CPU 단계만 묶일 때 상한)")
+        print(f"  목표 {args.target:.0f}/min → worker {model['workers_for_target']:.0f}개 / 코어 {model['cores_for_target']:.0f}개")
+
+    report = {
+        "env": environment(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "arxiv_standin_requests": standin.requests,
+        "levels": levels_out,
+        "capacity": model,
+    }
+    args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[Load] 결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
+
+# 실행 예시:
+# (.venv) python -m tests.benchmarks.load                                   # 1,2,4,8 동시성 sweep
+# (.venv) python -m tests.benchmarks.load --server-workers 4 --concurrency 4,8,16 --llm-latency-ms 800
+# (.venv) python -m tests.benchmarks.load --url http://localhost:8000 --hot-ratio 0.8 --target 120
+#         (떠 있는 서버는 LLM_BACKEND=fake, ARXIV_EPRINT_URL=<stand-in 주소>로 띄워야 함)
@@ -0,0 +1,96 @@
+# tests/benchmarks/render_backends.py
+"""
+Graphviz 렌더 백엔드 벤치마크
+- subprocess(dot 프로세스 spawn) vs pygraphviz(in-process) 다이어그램당 지연시간 비교
+- 실제 스토리북과 비슷한 작은 다이어그램 몇 종을 clean_viz_entry로 정규화한 뒤 반복 렌더
+- 설치되지 않은 백엔드는 건너뛴다
+"""
+
+import argparse
+import statistics
+import time
+
+from src.services.visualization.diagram import detect_engine
+from src.services.visualization.dot_cleaner import clean_viz_entry
+from src.services.visualization.render_backend import BACKENDS, _make_backend
+
+SAMPLE_DIAGRAMS = [
+    # 파이프라인 (dot + rankdir=LR)
+    """digraph G { rankdir=LR; input [label="Input"]; enc [label="Encoder"]; dec [label="Decoder"];
+       out [label="Output"]; input -> enc -> dec -> out; }""",
+    # 계층 구조 (clusters)
+    """digraph G { rankdir=TB;
+       subgraph cluster_encoder { label="Encoder"; e1 [label="Self-Attn"]; e2 [label="FFN"]; e1 -> e2; }
+       subgraph cluster_decoder { label="Decoder"; d1 [label="Masked Attn"]; d2 [label="Cross Attn"]; d1 -> d2; }
+       e2 -> d2; }""",
+    # 관계 네트워크 (neato)
+    """graph G { layout=neato; a [label="Q"]; b [label="K"]; c [label="V"]; d [label="Softmax"];
+       a -- d; b -- d; d -- c; }""",
+    # 원형 (circo)
+    """digraph G { layout=circo; s1 [label="Gen"]; s2 [label="Disc"]; s3 [label="Loss"]; s1 -> s2 -> s3 -> s1; }""",
+]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def bench_backend(name: str, dots: list[str], repeat: int, warmup: int = 2) -> dict | None:
+    try:
+        backend = _make_backend(name)
+    except ImportError as e:
+        print(f"[Bench] {name}: 건너뜀 ({e})")
+        return None
+
+    jobs = [(d, detect_engine(d)) for d in dots]
+    try:
+        for dot_code, engine in jobs[:warmup]:
+            backend.render(dot_code, engine=engine)
+    except Exception as e:
+        print(f"[Bench] {name}: 렌더 불가, 건너뜀 ({e})")
+        return None
+
+    samples: list[float] = []
+    for _ in range(repeat):
+        for dot_code, engine in jobs:
+            t0 = time.perf_counter()
+            backend.render(dot_code, engine=engine)
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "backend": backend.name,
+        "renders": len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": _percentile(samples, 0.50),
+        "p95_ms": _percentile(samples, 0.95),
+        "max_ms": max(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Graphviz 렌더 백엔드 지연시간 비교")
+    parser.add_argument("--repeat", type=int, default=20, help="샘플 다이어그램 세트 반복 횟수")
+    args = parser.parse_args()
+
+    dots = [clean_viz_entry({"diagram": d})["diagram"] for d in SAMPLE_DIAGRAMS]
+    results = [r for name in BACKENDS if name != "auto" for r in [bench_backend(name, dots, args.repeat)] if r]
+
+    print(f"\n[Bench] 다이어그램 {len(dots)}종 x {args.repeat}회")
+    print(f"{'backend':<12} {'renders':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+    for r in results:
+        print(
+            f"{r['backend']:<12} {r['renders']:>8} {r['mean_ms']:>7.1f}ms {r['p50_ms']:>7.1f}ms "
+            f"{r['p95_ms']:>7.1f}ms {r['max_ms']:>7.1f}ms"
+        )
+    if len(results) == 2:
+        speedup = results[0]["mean_ms"] / results[1]["mean_ms"]
+        print(f"[Bench] pygraphviz 대비 subprocess 평균 지연 = {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
+
+# 실행 예시:
+# (.venv) python -m tests.benchmarks.render_backends --repeat 30
@@ -0,0 +1,324 @@
+# tests/benchmarks/suite.py
+"""
+파이프라인 벤치마크 모음 (asv 방식: 벤치마크별 setup → 반복 측정 → 결과 JSON → 커밋 간 비교)
+- 입력은 전부 합성: tests/benchmarks/corpus.py의 TeX 소스, 고정 DOT 샘플, PIL로 만든 PNG
+- 구간별: auto_merge_corpus_inmemory, run_pipeline_inmemory, clean_viz_entry, render_diagram,
+  compose_scene, export_pdf
+- end-to-end: TeX → scene split → viz 분류 → 렌더 → 합성 → PDF (LLM은 fake 백엔드, 지연 0)
+- startup: 새 인터프리터에서 src.api.main / src.tasks import 시간 (cold start).
+  메타에 python -X importtime 요약(최상위 패키지별 self 시간 상위)을 함께 저장
+- 결과: --out JSON (메타: 커밋/파이썬/플랫폼/Graphviz 유무)
+- 회귀 검사: --compare 기준 JSON과 중앙값 비교, --threshold 넘게 느려진 항목이 있으면 종료 코드 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from src.core.config import settings
+from src.services.llm.backends import get_llm_backend
+from tests.benchmarks.corpus import PROFILES, corpus_stats, generate_paper
+from tests.benchmarks.render_backends import SAMPLE_DIAGRAMS
+
+_DROP_ENVS = ["tikzpicture", "minted", "lstlisting", "verbatim", "Verbatim", "framed", "mdframed", "tcolorbox"]
+
+# 이름 → setup 함수. setup은 (측정할 무인자 함수, 메타 dict)를 돌려준다.
+BENCHMARKS: dict[str, Callable[[], tuple[Callable[[], object], dict]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _png_bytes(size=(900, 500)) -> bytes:
+    img = Image.new("RGBA", size, (255, 255, 255, 255))
+    d = ImageDraw.Draw(img)
+    for i in range(6):
+        d.rectangle((40 + i * 140, 200, 140 + i * 140, 300), outline=(0, 0, 0, 255), width=3)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _use_fake_llm() -> None:
+    """LLM 호출을 지연 0의 fake 백엔드로 (네트워크/키 없이 LLM 외 구간만 측정)"""
+    settings.LLM_BACKEND = "fake"
+    settings.LLM_FAKE_LATENCY_MS = 0
+    settings.LLM_FAKE_ERROR_RATES = ""
+    settings.LLM_HEDGE = False
+    get_llm_backend.cache_clear()
+
+
+# -------------------------------
+# 구간별 벤치마크
+# -------------------------------
+def _texprep_benchmarks(profile: str) -> None:
+    @benchmark(f"texprep.auto_merge[{profile}]")
+    def _merge():
+        from src.texprep.io.auto_merge_inmemory import auto_merge_corpus_inmemory
+
+        files = generate_paper(profile)
+        return (lambda: auto_merge_corpus_inmemory(files, _DROP_ENVS)), corpus_stats(files)
+
+    @benchmark(f"texprep.pipeline[{profile}]")
+    def _pipeline():
+        from src.texprep.pipeline_inmemory import run_pipeline_inmemory
+
+        files = generate_paper(profile)
+        return (lambda: run_pipeline_inmemory(files)), corpus_stats(files)
+
+
+for _profile in PROFILES:
+    _texprep_benchmarks(_profile)
+
+
+@benchmark("viz.clean_viz_entry")
+def _clean():
+    from src.services.visualization.dot_cleaner import clean_viz_entry
+
+    return (lambda: [clean_viz_entry({"diagram": d}) for d in SAMPLE_DIAGRAMS]), {"diagrams": len(SAMPLE_DIAGRAMS)}
+
+
+@benchmark("viz.render_diagram")
+def _render():
+    from src.services.visualization.diagram import render_diagram
+    from src.services.visualization.dot_cleaner import clean_viz_entry
+
+    dots = [clean_viz_entry({"diagram": d})["diagram"] for d in SAMPLE_DIAGRAMS]
+    return (lambda: [render_diagram(d, in_memory=True) for d in dots]), {"diagrams": len(dots)}
+
+
+@benchmark("compose.compose_scene")
+def _compose():
+    from src.services.compositor.scene_composer import compose_scene
+
+    png = _png_bytes()
+    narration = "이 장면은 인코더와 디코더 사이의 어텐션 흐름을 설명합니다. " * 4
+    return (lambda: compose_scene(io.BytesIO(png), narration, in_memory=True)), {}
+
+
+@benchmark("export.export_pdf")
+def _export():
+    from src.services.compositor.pdf_exporter import export_pdf
+
+    pages = [_png_bytes((1280, 720)) for _ in range(10)]
+    return (lambda: export_pdf([io.BytesIO(p) for p in pages], in_memory=True)), {"pages": len(pages)}
+
+
+# -------------------------------
+# end-to-end (fake LLM)
+# -------------------------------
+def _storybook_once(files: dict[str, str]) -> int:
+    from src.api.storybooks import _classify_and_render
+    from src.services.compositor.layout_engine import get_layout
+    from src.services.compositor.pdf_exporter import export_pdf
+    from src.services.compositor.scene_composer import compose_pages
+    from src.services.llm.scene_splitter import stream_scenes_with_narration
+    from src.texprep.pipeline_inmemory import run_pipeline_inmemory
+
+    full_text = run_pipeline_inmemory(files)
+    scenes = list(stream_scenes_with_narration(full_text))
+    rendered = _classify_and_render(scenes, [])
+    pages = compose_pages(rendered, get_layout(settings.STORYBOOK_LAYOUT))
+    return len(export_pdf(pages, in_memory=True).getvalue())
+
+
+def _e2e_benchmark(profile: str) -> None:
+    @benchmark(f"e2e.storybook_fake_llm[{profile}]")
+    def _e2e():
+        _use_fake_llm()
+        files = generate_paper(profile)
+        return (lambda: _storybook_once(files)), corpus_stats(files)
+
+
+for _profile in ("small", "medium"):
+    _e2e_benchmark(_profile)
+
+
+# -------------------------------
+# startup (cold import)
+# -------------------------------
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def importtime_summary(module: str, top: int = 12) -> dict:
+    """python -X importtime 출력 → 전체 시간과 최상위 패키지별 self 시간(ms) 상위 top개"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    by_package: dict[str, float] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+    ranked = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {"total_ms": total_us / 1000, "top_packages_ms": {k: round(v, 1) for k, v in ranked}}
+
+
+def _startup_benchmark(module: str) -> None:
+    @benchmark(f"startup.import[{module}]")
+    def _startup():
+        cmd = [sys.executable, "-c", f"import {module}"]
+        return (lambda: subprocess.run(cmd, cwd=_REPO_ROOT, check=True, capture_output=True)), importtime_summary(module)
+
+
+for _module in ("src.api.main", "src.tasks"):
+    _startup_benchmark(_module)
+
+
+# -------------------------------
+# 실행 / 저장 / 비교
+# -------------------------------
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_benchmark(name: str, min_rounds: int, min_time_s: float, verbose: bool) -> dict:
+    """warmup 1회 후 min_rounds회 이상, 총 min_time_s 이상 반복"""
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        fn, meta = BENCHMARKS[name]()
+        fn()
+        samples: list[float] = []
+        started = time.perf_counter()
+        while len(samples) < min_rounds or time.perf_counter() - started < min_time_s:
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+            if len(samples) >= 1000:
+                break
+    return {
+        "rounds": len(samples),
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p95_ms": _percentile(samples, 0.95),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        **({"meta": meta} if meta else {}),
+    }
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "graphviz_dot": bool(shutil.which("dot")),
+        "graphviz_backend": settings.GRAPHVIZ_BACKEND,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        # 튜닝 값까지 남겨야 커밋 간 / 배포 간 결과를 비교할 수 있음
+        "settings": settings.as_dict(),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[dict]:
+    """
+    기준 대비 중앙값 비율. 느려진 비율 > threshold 이고 절대 차이 > min_delta_ms면 회귀
+    (아주 짧은 구간의 측정 잡음으로 게이트가 깨지지 않게)
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = cur["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        delta = cur["median_ms"] - base["median_ms"]
+        rows.append({
+            "name": name,
+            "base_ms": base["median_ms"],
+            "current_ms": cur["median_ms"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold and delta > min_delta_ms,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="파이프라인 벤치마크 (합성 corpus, fake LLM)")
+    parser.add_argument("--filter", default="", help="이름에 이 문자열이 들어간 벤치마크만 (쉼표로 여러 개)")
+    parser.add_argument("--list", action="store_true", help="벤치마크 이름만 출력")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=1.0, help="벤치마크당 최소 측정 시간(초)")
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON (기본: bench_results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="기준 결과 JSON (회귀 게이트)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="허용 속도 저하 비율 (0.15 = 15%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="이보다 작은 절대 차이는 회귀로 보지 않음")
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 로그 출력")
+    args = parser.parse_args()
+
+    filters = [f for f in args.filter.split(",") if f]
+    names = [n for n in BENCHMARKS if not filters or any(f in n for f in filters)]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    # 저장소 캐시가 켜져 있으면 반복 측정이 캐시 적중만 재게 되므로 끔
+    settings.STORAGE_CACHE = False
+    env = environment()
+    if not env["graphviz_dot"] and settings.GRAPHVIZ_BACKEND != "pygraphviz":
+        print("[Bench] dot 실행 파일 없음 → render 구간은 fallback PNG 경로를 측정")
+
+    results = {}
+    print(f"{'benchmark':<40} {'rounds':>6} {'median':>10} {'p95':>10} {'min':>10}")
+    for name in names:
+        r = run_benchmark(name, args.min_rounds, args.min_time, args.verbose)
+        results[name] = r
+        print(f"{name:<40} {r['rounds']:>6} {r['median_ms']:>8.2f}ms {r['p95_ms']:>8.2f}ms {r['min_ms']:>8.2f}ms")
+
+    report = {"env": env, "results": results}
+    out = args.out or Path("bench_results") / f"{env['commit']}{'-dirty' if env['dirty'] else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[Bench] 결과 저장: {out}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n[Bench] 기준 {baseline.get('env', {}).get('commit', args.compare.name)} 대비 (허용 +{args.threshold:.0%})")
+        for row in rows:
+            flag = "  ← 회귀" if row["regression"] else ""
+            print(f"{row['name']:<40} {row['base_ms']:>8.2f}ms → {row['current_ms']:>8.2f}ms  x{row['ratio']:.2f}{flag}")
+        regressions = [r for r in rows if r["regression"]]
+        if regressions:
+            print(f"[Bench] 회귀 {len(regressions)}건")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+# 실행 예시:
+# (.venv) python -m tests.benchmarks.suite --out bench_results/base.json          # 기준 커밋에서
+# (.venv) python -m tests.benchmarks.suite --compare bench_results/base.json      # 변경 후 (회귀 시 exit 1)
+# (.venv) python -m tests.benchmarks.suite --filter texprep,e2e --min-time 3
+# (.venv) python -m tests.benchmarks.suite --filter startup                         # API / worker cold import
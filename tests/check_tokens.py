@@ -1,36 +1,82 @@
 # tests/check_tokens.py
+"""
+입력 토큰 예산 리포트
+- data/processed/**/*.txt 각 논문에 대해: 근사 토큰 수(prompt_budget.count_tokens), tiktoken 기준(설치돼 있으면),
+  scene 분할 경로(single / map-reduce)와 chunk 수, single 경로에서 잘려 나가는 토큰 수
+- 고정 프롬프트(SCENE_SPLIT_PROMPT, viz 분류 prefix)의 토큰 비용
+"""
 
-import tiktoken
 from pathlib import Path
 
-def count_tokens(file_path: Path):
-    enc = tiktoken.get_encoding("cl100k_base")
+from src.services.llm.prompt_budget import count_tokens
+from src.services.llm.scene_splitter import (
+    SCENE_SPLIT_PROMPT,
+    _CHUNK_MAX_CHARS,
+    _SPLIT_INPUT_TOKENS,
+    chunk_by_sections,
+)
+from src.services.llm.viz_classifier import (
+    BATCH_CLASSIFY_PREFIX,
+    CLASSIFY_PREFIX,
+    _SCENE_INPUT_TOKENS,
+)
+
+try:
+    import tiktoken
+
+    _ENC = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENC = None
+
+
+def count_tokens_tiktoken(text: str) -> int | None:
+    return len(_ENC.encode(text)) if _ENC else None
+
+
+def report_paper(file_path: Path) -> dict:
     text = file_path.read_text(encoding="utf-8")
-    return len(enc.encode(text))
+    approx = count_tokens(text)
+    mapreduce = approx > _SPLIT_INPUT_TOKENS
+    return {
+        "file": str(file_path),
+        "chars": len(text),
+        "approx_tokens": approx,
+        "tiktoken": count_tokens_tiktoken(text),
+        "path": "map-reduce" if mapreduce else "single",
+        "chunks": len(chunk_by_sections(text, _CHUNK_MAX_CHARS)) if mapreduce else 1,
+        "dropped_tokens": 0 if mapreduce else max(0, approx - _SPLIT_INPUT_TOKENS),
+    }
+
+
+def report_static_prompts() -> None:
+    print("\n[Budget] 고정 프롬프트 토큰 (근사, cached_prefix로 전송)")
+    print(f"  SCENE_SPLIT_PROMPT       : {count_tokens(SCENE_SPLIT_PROMPT):>6} tokens (본문 예산 {_SPLIT_INPUT_TOKENS})")
+    print(f"  CLASSIFY_PREFIX          : {count_tokens(CLASSIFY_PREFIX):>6} tokens (scene 예산 {_SCENE_INPUT_TOKENS})")
+    print(f"  BATCH_CLASSIFY_PREFIX    : {count_tokens(BATCH_CLASSIFY_PREFIX):>6} tokens")
 
 
 if __name__ == "__main__":
     base_dir = Path("data/processed")
-    txt_files = list(base_dir.rglob("*.txt"))
+    txt_files = sorted(base_dir.rglob("*.txt"))
 
     if not txt_files:
         print(f"[Error] {base_dir} 안에 .txt 파일이 없습니다")
     else:
+        print(f"{'file':<40} {'chars':>8} {'approx':>8} {'tiktoken':>9} {'path':>11} {'chunks':>7} {'dropped':>8}")
         for f in txt_files:
             try:
-                token_count = count_tokens(f)
-                print(f"[Token Count] {f}: {token_count} tokens")
+                r = report_paper(f)
+                tk = r["tiktoken"] if r["tiktoken"] is not None else "-"
+                print(
+                    f"{r['file']:<40} {r['chars']:>8} {r['approx_tokens']:>8} {tk:>9} "
+                    f"{r['path']:>11} {r['chunks']:>7} {r['dropped_tokens']:>8}"
+                )
             except Exception as e:
                 print(f"[Error] {f}: {e}")
+    report_static_prompts()
 
 # 실행 예시:
 # (.venv) python -m tests.check_tokens
-
-# [Token Count] data\processed\BERT.txt: 12934 tokens
-# [Token Count] data\processed\DCGAN.txt: 4892 tokens
-# [Token Count] data\processed\LLaMA.txt: 13278 tokens
-# [Token Count] data\processed\LoRA.txt: 14641 tokens
-# [Token Count] data\processed\ResNet.txt: 15052 tokens
-# [Token Count] data\processed\Transformer.txt: 10084 tokens
-# [Token Count] data\processed\VGGNet.txt: 9916 tokens
-# [Token Count] data\processed\YOLOv1.txt: 10506 tokens
\ No newline at end of file
+#
+# 참고 (tiktoken cl100k_base 기준, 이전 리포트):
+# BERT 12934 / DCGAN 4892 / LLaMA 13278 / LoRA 14641 / ResNet 15052 / Transformer 10084 / VGGNet 9916 / YOLOv1 10506 tokens
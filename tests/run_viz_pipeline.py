@@ -3,11 +3,11 @@
 import argparse
 import json
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable
 
+from src.core import tracing
 from src.services.llm.scene_splitter import split_into_scenes_with_narration
 from src.services.llm.viz_classifier import classify_scenes_iteratively
 
@@ -37,9 +37,21 @@ def _summarize_vizzes(v: dict) -> str:
     return f"viz_types={vt}"
 
 
+def _print_timeline(trace_id: str) -> None:
+    for item in tracing.timeline(trace_id) or []:
+        indent = "  " * item["depth"]
+        print(f"[Pipeline]   {indent}{item['name']:<20} +{item['start_ms']:>9.1f}ms {item['duration_ms']:>9.1f}ms")
+
+
 def run_once(paper_name: str, out_dir: Path, max_scenes: int | None, debug: bool) -> None:
-    start_total = time.perf_counter()
+    with tracing.trace("run_viz_pipeline", paper=paper_name) as root:
+        _run_once(paper_name, out_dir, max_scenes, debug)
+    # 시간 요약 (LLM 호출 단위까지)
+    print("[Pipeline] 시간 요약:")
+    _print_timeline(root.trace_id)
+
 
+def _run_once(paper_name: str, out_dir: Path, max_scenes: int | None, debug: bool) -> None:
     text_path = Path(f"data/processed/{paper_name}.txt")
     if not text_path.exists():
         print(f"[Pipeline][ERROR] 입력 파일 없음: {text_path}")
@@ -52,9 +64,8 @@ def run_once(paper_name: str, out_dir: Path, max_scenes: int | None, debug: bool
 
     # 1) Scene Split
     _print_header("STEP 1: Scene Splitter 실행")
-    t0 = time.perf_counter()
-    scenes = split_into_scenes_with_narration(full_text)
-    dt_split = time.perf_counter() - t0
+    with tracing.span("scene_split"):
+        scenes = split_into_scenes_with_narration(full_text)
 
     if not isinstance(scenes, list) or len(scenes) == 0:
         print("[Pipeline][ERROR] Scene Splitter 결과가 유효하지 않음")
@@ -79,9 +90,8 @@ def run_once(paper_name: str, out_dir: Path, max_scenes: int | None, debug: bool
 
     # 2) Viz Classifier
     _print_header("STEP 2: Viz Classifier 반복 호출")
-    t1 = time.perf_counter()
-    viz_results = classify_scenes_iteratively(scenes)
-    dt_viz = time.perf_counter() - t1
+    with tracing.span("viz_classify", scenes=len(scenes)):
+        viz_results = classify_scenes_iteratively(scenes)
 
     # 요약 출력
     print(f"[Pipeline] Viz Classifier 결과 개수: {len(viz_results)}")
@@ -98,13 +108,6 @@ def run_once(paper_name: str, out_dir: Path, max_scenes: int | None, debug: bool
     _save_json(viz_file, viz_results)
     print(f"[Pipeline] 최종 viz 결과 저장 완료: {viz_file}")
 
-    # 시간 요약
-    dt_total = time.perf_counter() - start_total
-    print(
-        f"[Pipeline] 시간 요약: split={dt_split:.2f}s, "
-        f"viz={dt_viz:.2f}s, total={dt_total:.2f}s"
-    )
-
 
 def parse_papers(arg: str | None) -> Iterable[str]:
     if not arg: